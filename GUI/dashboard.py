@@ -1,26 +1,116 @@
-from typing import Tuple, List, Union, Any
+import json
+import logging
+import os
+from dataclasses import replace
+from typing import Tuple, List, Union, Any, Dict, Optional
 import dash
 from dash import dcc, html, dash_table, Input, Output, State
 import pandas as pd
-import plotly.express as px
-import plotly.figure_factory as ff
 import plotly.graph_objects as go
-import base64
-import io
+import pyarrow as pa
+from services.column_index import (
+    BrushFilter,
+    ColumnIndex,
+    brush_ranges_from,
+    parse_sample_query,
+)
+from services.column_profile import DatasetProfile, profile_dataset_from
+from services.dataset_store import DatasetStore, DatasetNotFoundError
+from services.instrumentation import (
+    DEBUG_PANEL_REFRESH_MS,
+    instrument_dash_app,
+    payload_rows_from,
+    timing_rows_from,
+)
+from services.jobs import (
+    JOB_POLL_INTERVAL_MS,
+    JobManager,
+    JobStatus,
+    load_upload_job,
+    parallel_coordinates_job,
+    parallel_coordinates_key_for,
+)
+from services.payloads import (
+    FIGURE_CACHE_MAX_BYTES,
+    enable_response_compression,
+    figure_json_from,
+    typed_figure_from,
+)
+from services.pipeline import PipelineRunner, TransformPipeline, step_from
+from services.sampling import DEFAULT_SEED, stored_sample_from
+from services.table_backend import query_page_from, table_columns_from
+from services.cache import LRUCache
 from services.data_tools import (
-    generate_missing_data_matrix_from,
+    MissingDataSummary,
+    summarize_missing_data_from,
+    summarize_missing_mask_from,
+    restrict_missing_data_summary_to,
+    remove_nan_rows_from_summary,
+    render_missing_data_summary,
     remove_nan_rows_from,
     remove_object_columns_from,
-    normalize_data_from,
+    NormalizationTransform,
+    dimension_axis_for,
+    normalize_with_statistics_from,
+    correlation_matrix_from,
+    order_axes_by_correlation_from,
+    reduce_dimensions_from,
+    detect_year_columns_from,
+    wide_to_long_from,
+    long_to_wide_from,
     plot_parallel_coordinates_from,
+    plot_axis_histograms_from,
 )
 
+logger = logging.getLogger(__name__)
+
 
 class Dashboard:
     def __init__(self) -> None:
         self.app: dash.Dash = dash.Dash(__name__)
-        self.dataframe: pd.DataFrame = pd.DataFrame()
-        self.label_column: str = ""
+        # Tempos por callback/etapa e bytes trafegados, em /metrics; precisa
+        # vir antes do registro dos callbacks
+        self.profiler = instrument_dash_app(self.app)
+        # Depois da instrumentação, para que ela registre os bytes já
+        # comprimidos
+        enable_response_compression(self.app.server)
+        # Painel com as métricas dentro do próprio app
+        self.debug_panel: bool = os.environ.get("DASHBOARD_DEBUG_PANEL") == "1"
+        self.dataset_store: DatasetStore = DatasetStore()
+        # Upload e gráfico rodam num pool de processos, fora das requisições
+        self.jobs: JobManager = JobManager(self.dataset_store.directory)
+        # Resumo e matriz de dados ausentes por versão do dataset
+        self.missing_data_cache: LRUCache = LRUCache(max_entries=32)
+        # Perfil por coluna (tipo, ausentes, mín/máx, média/desvio, valores
+        # distintos, quantis) por versão; calculado no upload e derivado a
+        # cada passo
+        self.profile_cache: LRUCache = LRUCache(max_entries=32)
+        # Ordem dos eixos por correlação, por versão e método
+        self.axis_order_cache: LRUCache = LRUCache(max_entries=32)
+        # Índices por coluna da versão usada na amostragem personalizada
+        self.column_index_cache: LRUCache = LRUCache(max_entries=8)
+        # Bitmaps por eixo da seleção feita no gráfico (brushing), por versão
+        self.brush_cache: LRUCache = LRUCache(max_entries=8)
+        # Gráficos de coordenadas paralelas já montados, serializados em JSON,
+        # pela chave de parallel_coordinates_key_for; o limite é em bytes
+        self.figure_cache: LRUCache = LRUCache(
+            max_entries=64, max_bytes=FIGURE_CACHE_MAX_BYTES, size_of=len
+        )
+        # Passos do pipeline e checkpoints de cada prefixo já calculado
+        self.pipeline_runner: PipelineRunner = PipelineRunner(
+            self.dataset_store,
+            {
+                "remove_missing": self._remove_missing_step,
+                "label_column": self._label_column_step,
+                "normalize": self._normalize_step,
+                "reduce": self._reduce_step,
+                "reshape_years": self._reshape_years_step,
+                "random_sample": self._random_sample_step,
+                "user_sample": self._user_sample_step,
+            },
+            on_checkpoint=self._derive_metadata,
+            streaming_operations={"random_sample"},
+        )
         self.layout()
 
     def layout(self) -> None:
@@ -51,10 +141,18 @@ class Dashboard:
                                     [
                                         html.H3("Carregar Dados"),
                                         dcc.Store(id="dataset-state", data=None),
+                                        dcc.Store(id="data-job", data=None),
+                                        dcc.Interval(
+                                            id="data-job-poll",
+                                            interval=JOB_POLL_INTERVAL_MS,
+                                            disabled=True,
+                                        ),
                                         dcc.Upload(
                                             id="upload-data",
                                             children=html.Div(
-                                                ["selecione um arquivo CSV"]
+                                                [
+                                                    "selecione um arquivo CSV, Parquet ou Feather"
+                                                ]
                                             ),
                                             style={
                                                 "width": "100%",
@@ -68,6 +166,18 @@ class Dashboard:
                                             },
                                             multiple=False,
                                         ),
+                                        # Compacta os tipos ao carregar: float32, inteiros
+                                        # menores e category para texto repetido
+                                        dcc.Checklist(
+                                            id="upload-options",
+                                            options=[
+                                                {
+                                                    "label": "Compactar tipos",
+                                                    "value": "optimize",
+                                                }
+                                            ],
+                                            value=["optimize"],
+                                        ),
                                     ],
                                     className="mb-4",
                                 ),
@@ -153,12 +263,73 @@ class Dashboard:
                                                     className="button-primary mb-2",
                                                     style={"width": "100%"},
                                                 ),
+                                                dcc.Dropdown(
+                                                    id="normalize-method",
+                                                    options=[
+                                                        {
+                                                            "label": "Mín-máx",
+                                                            "value": "minmax",
+                                                        },
+                                                        {
+                                                            "label": "Z-score",
+                                                            "value": "zscore",
+                                                        },
+                                                    ],
+                                                    value="minmax",
+                                                    clearable=False,
+                                                    className="mb-2",
+                                                ),
                                                 html.Button(
-                                                    "Reduzir Dimensões",
-                                                    id="dimension-button",
+                                                    "Anos: colunas ↔ linhas",
+                                                    id="reshape-years-button",
                                                     className="button-primary mb-2",
                                                     style={"width": "100%"},
                                                 ),
+                                                html.Div(
+                                                    [
+                                                        html.Button(
+                                                            "Reduzir Dimensões",
+                                                            id="dimension-button",
+                                                            className="button-primary mb-2",
+                                                            style={
+                                                                "width": "70%",
+                                                                "marginRight": "10px",
+                                                            },
+                                                        ),
+                                                        dcc.Input(
+                                                            id="dimension-amount",
+                                                            type="number",
+                                                            min=1,
+                                                            placeholder="Eixos",
+                                                            style={
+                                                                "width": "30%",
+                                                                "textAlign": "center",
+                                                            },
+                                                        ),
+                                                    ],
+                                                    style={
+                                                        "display": "inline-flex",
+                                                        "alignItems": "center",
+                                                        "width": "100%",
+                                                    },
+                                                ),
+                                                dcc.Dropdown(
+                                                    id="dimension-method",
+                                                    options=[
+                                                        {
+                                                            "label": "Correlação",
+                                                            "value": "correlation",
+                                                        },
+                                                        {
+                                                            "label": "Variância",
+                                                            "value": "variance",
+                                                        },
+                                                        {"label": "PCA", "value": "pca"},
+                                                    ],
+                                                    value="correlation",
+                                                    clearable=False,
+                                                    className="mb-2",
+                                                ),
                                                 html.Div(
                                                     [
                                                         html.Button(
@@ -192,6 +363,78 @@ class Dashboard:
                                                     className="button-primary mb-2",
                                                     style={"width": "100%"},
                                                 ),
+                                                dcc.Input(
+                                                    id="user-sample-query",
+                                                    type="text",
+                                                    debounce=True,
+                                                    placeholder="Year: 2000..2010; Entity: Brazil, Chile",
+                                                    style={"width": "100%"},
+                                                ),
+                                                html.H3("Etapas"),
+                                                html.Div(
+                                                    [
+                                                        html.Button(
+                                                            "Desfazer",
+                                                            id="undo-button",
+                                                            className="button-primary mb-2",
+                                                            style={
+                                                                "width": "50%",
+                                                                "marginRight": "10px",
+                                                            },
+                                                        ),
+                                                        html.Button(
+                                                            "Refazer",
+                                                            id="redo-button",
+                                                            className="button-primary mb-2",
+                                                            style={"width": "50%"},
+                                                        ),
+                                                    ],
+                                                    style={
+                                                        "display": "inline-flex",
+                                                        "alignItems": "center",
+                                                        "width": "100%",
+                                                    },
+                                                ),
+                                                # Passos aplicados; desmarcar um passo o desliga
+                                                # sem perder os demais
+                                                dcc.Checklist(
+                                                    id="pipeline-steps",
+                                                    options=[],
+                                                    value=[],
+                                                ),
+                                                # Eixos limitados pelos quantis
+                                                # do perfil, sem os outliers
+                                                dcc.Checklist(
+                                                    id="axis-options",
+                                                    options=[
+                                                        {
+                                                            "label": "Eixos sem outliers (1%–99%)",
+                                                            "value": "quantile",
+                                                        }
+                                                    ],
+                                                    value=[],
+                                                    style={"marginTop": "20px"},
+                                                ),
+                                                dcc.Dropdown(
+                                                    id="axis-order",
+                                                    options=[
+                                                        {
+                                                            "label": "Ordem original",
+                                                            "value": "original",
+                                                        },
+                                                        {
+                                                            "label": "Correlação (Pearson)",
+                                                            "value": "pearson",
+                                                        },
+                                                        {
+                                                            "label": "Correlação (Spearman)",
+                                                            "value": "spearman",
+                                                        },
+                                                    ],
+                                                    value="original",
+                                                    clearable=False,
+                                                    style={"marginTop": "10px"},
+                                                ),
                                                 html.Button(
                                                     "Gerar Visualização",
                                                     id="visualize-graph-button",
@@ -223,11 +466,29 @@ class Dashboard:
                                 html.Div(
                                     [
                                         html.H2("Gráfico de Coordenadas Paralelas"),
+                                        html.Div(id="plot-status"),
+                                        html.Div(id="brush-status"),
+                                        dcc.Store(id="plot-job", data=None),
+                                        # Eixos do gráfico atual e faixas
+                                        # marcadas neles (brushing)
+                                        dcc.Store(id="plot-axes", data=None),
+                                        dcc.Store(id="brush-ranges", data=None),
+                                        dcc.Interval(
+                                            id="plot-job-poll",
+                                            interval=JOB_POLL_INTERVAL_MS,
+                                            disabled=True,
+                                        ),
                                         dcc.Graph(
                                             id="parallel-coordinates-plot",
                                             # style={"height": "calc(100vh - 400px)"},
                                             style={"height": "500px"},
                                         ),
+                                        # Distribuição de cada eixo, a partir
+                                        # dos histogramas do perfil
+                                        dcc.Graph(
+                                            id="axis-histograms",
+                                            style={"height": "180px"},
+                                        ),
                                     ]
                                 ),
                                 # Exploration Area
@@ -240,7 +501,33 @@ class Dashboard:
                                                     children=[
                                                         html.Div(
                                                             id="output-data-upload"
-                                                        )
+                                                        ),
+                                                        # Paginação, ordenação e
+                                                        # filtro feitos no servidor
+                                                        dash_table.DataTable(
+                                                            id="data-table",
+                                                            columns=[],
+                                                            data=[],
+                                                            page_current=0,
+                                                            page_size=10,
+                                                            page_action="custom",
+                                                            sort_action="custom",
+                                                            sort_mode="multi",
+                                                            sort_by=[],
+                                                            filter_action="custom",
+                                                            filter_query="",
+                                                            style_table={
+                                                                "overflowX": "auto"
+                                                            },
+                                                            style_cell={
+                                                                "textAlign": "left",
+                                                                "padding": "5px",
+                                                            },
+                                                            style_header={
+                                                                "backgroundColor": "lightgrey",
+                                                                "fontWeight": "bold",
+                                                            },
+                                                        ),
                                                     ],
                                                 ),
                                                 dcc.Tab(
@@ -268,46 +555,633 @@ class Dashboard:
                 ),
             ]
         )
+        if self.debug_panel:
+            self.app.layout.children.append(
+                html.Details(
+                    [
+                        html.Summary("Depuração: tempos e payloads"),
+                        dcc.Interval(
+                            id="debug-panel-refresh", interval=DEBUG_PANEL_REFRESH_MS
+                        ),
+                        html.Div(id="debug-panel-content"),
+                    ],
+                    style={"padding": "10px 20px", "borderTop": "1px solid #dee2e6"},
+                )
+            )
+
+    def _missing_data_for(
+        self, dataset_id: str, dataframe: Union[pd.DataFrame, None] = None
+    ) -> Tuple[MissingDataSummary, go.Figure]:
+        # Resumo e matriz de dados ausentes da versão, calculados uma única vez
+        def compute() -> Tuple[MissingDataSummary, go.Figure]:
+            source = dataframe
+            if source is None:
+                source = self.dataset_store.get(dataset_id)
+            summary = summarize_missing_data_from(source)
+            return summary, render_missing_data_summary(summary)
+
+        return self.missing_data_cache.get_or_compute(dataset_id, compute)
+
+    def _profile_for(
+        self, dataset_id: str, dataframe: Union[pd.DataFrame, None] = None
+    ) -> DatasetProfile:
+        # Só lê os dados se o perfil da versão saiu do cache
+        def compute() -> DatasetProfile:
+            source = dataframe
+            if source is None:
+                source = self.dataset_store.get(dataset_id)
+            return profile_dataset_from(source)
+
+        return self.profile_cache.get_or_compute(dataset_id, compute)
+
+    def _brush_filter_for(self, dataset_id: str) -> BrushFilter:
+        def compute() -> BrushFilter:
+            column_index = self.column_index_cache.get_or_compute(
+                dataset_id, lambda: ColumnIndex(self.dataset_store.get(dataset_id))
+            )
+            return BrushFilter(column_index)
+
+        return self.brush_cache.get_or_compute(dataset_id, compute)
+
+    def _brushed_positions_for(
+        self, dataset_state: Union[dict, None], brush_ranges: Union[dict, None]
+    ) -> Union[Any, None]:
+        # Linhas selecionadas no gráfico, se a seleção é da versão exibida
+        if (
+            not dataset_state
+            or not brush_ranges
+            or brush_ranges["dataset_id"] != dataset_state["dataset_id"]
+        ):
+            return None
+        return self._brush_filter_for(brush_ranges["dataset_id"]).select(
+            brush_ranges["ranges"]
+        )
+
+    def _axis_order_for(self, dataset_id: str, method: str) -> List[str]:
+        # Correlação (numa amostra) e ordenação calculadas uma vez por versão;
+        # reordenar de novo sai direto do cache
+        def compute() -> List[str]:
+            columns = self._profile_for(dataset_id).numeric_columns()
+            correlation = correlation_matrix_from(
+                self.dataset_store.get(dataset_id, columns), columns, method
+            )
+            return [
+                columns[position]
+                for position in order_axes_by_correlation_from(correlation)
+            ]
+
+        return self.axis_order_cache.get_or_compute((dataset_id, method), compute)
+
+    def _plot_axes_for(
+        self, dataset_state: dict, axis_options: List[str], axis_order: str
+    ) -> Tuple[List[str], DatasetProfile, List[str], Dict[str, Tuple[float, float]]]:
+        # Colunas lidas pelo gráfico (eixos numéricos e o rótulo), eixos na
+        # ordem pedida e intervalos pelos quantis, todos a partir do perfil
+        label_column = dataset_state["label_column"]
+        columns = [
+            column["id"]
+            for column in table_columns_from(
+                self.dataset_store.schema(dataset_state["dataset_id"])
+            )
+            if column["type"] == "numeric" or column["id"] == label_column
+        ]
+        profile = self._profile_for(dataset_state["dataset_id"])
+        axes = [column for column in columns if column in profile.numeric_columns()]
+        if axis_order in ("pearson", "spearman"):
+            ordered_axes = self._axis_order_for(dataset_state["dataset_id"], axis_order)
+            axes = [column for column in ordered_axes if column in axes]
+        axis_ranges = (
+            profile.axis_ranges_for(axes) if "quantile" in (axis_options or []) else {}
+        )
+        return columns, profile, axes, axis_ranges
+
+    @staticmethod
+    def _axis_ranges_patch_for(
+        axes: List[str],
+        axis_ranges: Dict[str, Tuple[float, float]],
+        profile: DatasetProfile,
+        normalization: Union[dict, None],
+    ) -> dash.Patch:
+        # Só intervalo e marcas de cada eixo; os valores já estão no navegador
+        transform = (
+            NormalizationTransform.from_dict(normalization) if normalization else None
+        )
+        patch = dash.Patch()
+        for position, axis in enumerate(axes):
+            column = profile.columns[axis]
+            dimension = patch["data"][0]["dimensions"][position]
+            for key, value in dimension_axis_for(
+                axis, (column.minimum, column.maximum), axis_ranges.get(axis), transform
+            ).items():
+                if value is None:
+                    del dimension[key]
+                else:
+                    dimension[key] = value
+        return patch
+
+    @staticmethod
+    def _histogram_ranges_patch_for(
+        histogram_axes: List[str], axis_ranges: Dict[str, Tuple[float, float]]
+    ) -> dash.Patch:
+        patch = dash.Patch()
+        for position, axis in enumerate(histogram_axes):
+            name = "yaxis" if position == 0 else f"yaxis{position + 1}"
+            yaxis = patch["layout"][name]
+            if axis in axis_ranges:
+                yaxis["range"] = list(axis_ranges[axis])
+                yaxis["autorange"] = False
+            else:
+                yaxis["autorange"] = True
+        return patch
+
+    def _show_dataset(
+        self, dataset_state: dict, dataframe: Union[pd.DataFrame, None] = None
+    ) -> Tuple[str, List[dict], int, go.Figure, dict]:
+        # A tabela recebe apenas as colunas; as linhas vêm de update_table_page
+        columns = table_columns_from(
+            self.dataset_store.schema(dataset_state["dataset_id"])
+        )
+        _, missing_data_figure = self._missing_data_for(
+            dataset_state["dataset_id"], dataframe
+        )
+        return "", columns, 0, missing_data_figure, dataset_state
+
+    def _show_pipeline(
+        self, dataset_state: dict, pipeline: TransformPipeline
+    ) -> Tuple[str, List[dict], int, go.Figure, dict, List[dict], List[int]]:
+        # O handle guarda o pipeline e o registro da versão que ele produz
+        try:
+            record = self.pipeline_runner.materialize(
+                dataset_state["session_id"], pipeline
+            )
+            shown = self._show_dataset(
+                {
+                    "session_id": dataset_state["session_id"],
+                    **record,
+                    "pipeline": pipeline.to_dict(),
+                }
+            )
+        except DatasetNotFoundError:
+            return (
+                "Os dados expiraram, carregue o arquivo novamente.",
+                [],
+                0,
+                go.Figure(),
+                None,
+                [],
+                [],
+            )
+        except ValueError as e:
+            return (
+                str(e),
+                dash.no_update,
+                dash.no_update,
+                dash.no_update,
+                dash.no_update,
+                dash.no_update,
+                dash.no_update,
+            )
+        options = [
+            {"label": self._describe_step(step), "value": position}
+            for position, step in enumerate(pipeline.applied_steps())
+        ]
+        enabled = [
+            position
+            for position, step in enumerate(pipeline.applied_steps())
+            if step["enabled"]
+        ]
+        return (*shown, options, enabled)
+
+    @staticmethod
+    def _progress_message(status: JobStatus) -> str:
+        stages = {
+            "queued": "Na fila",
+            "decode": "Decodificando arquivo",
+            "parse": "Lendo CSV",
+            "optimize": "Compactando tipos",
+            "store": "Gravando dados",
+            "missing": "Resumindo dados ausentes",
+            "profile": "Resumindo colunas",
+            "load": "Lendo dados",
+            "plot": "Gerando gráfico",
+        }
+        return f"{stages.get(status.stage, 'Processando')}... {status.progress:.0%}"
+
+    @staticmethod
+    def _describe_step(step: dict) -> str:
+        params = step["params"]
+        descriptions = {
+            "remove_missing": lambda: "Remover dados ausentes",
+            "label_column": lambda: f"Rótulo: {params['label_column']}",
+            "normalize": lambda: f"Normalizar ({params['method']})",
+            "reduce": lambda: (
+                f"Reduzir dimensões ({params['method']}, {params['n_components']})"
+            ),
+            "reshape_years": lambda: "Anos: colunas ↔ linhas",
+            "random_sample": lambda: f"Amostragem randômica ({params['size']})",
+            "user_sample": lambda: f"Amostragem personalizada: {params['query']}",
+        }
+        return descriptions[step["operation"]]()
+
+    def _remove_missing_step(
+        self, dataframe: pd.DataFrame, params: dict, record: dict
+    ) -> Tuple[pd.DataFrame, dict]:
+        summary, _ = self._missing_data_for(record["dataset_id"], dataframe)
+        return remove_nan_rows_from(dataframe, summary), {}
+
+    def _label_column_step(
+        self, dataframe: pd.DataFrame, params: dict, record: dict
+    ) -> Tuple[pd.DataFrame, dict]:
+        label_column = params["label_column"]
+        # Texto comum ou category (colunas compactadas no carregamento)
+        text_columns = self._profile_for(record["dataset_id"], dataframe).text_columns()
+        if label_column not in text_columns:
+            raise ValueError(f"Coluna rótulo indisponível: {label_column}")
+        dataframe = remove_object_columns_from(dataframe, label_column, text_columns)
+        # Gravado como category, o rótulo já traz os códigos inteiros usados
+        # na cor do gráfico; nenhuma renderização precisa fatorar de novo
+        if not isinstance(dataframe[label_column].dtype, pd.CategoricalDtype):
+            dataframe[label_column] = dataframe[label_column].astype("category")
+        return dataframe, {"label_column": label_column}
+
+    def _normalize_step(
+        self, dataframe: pd.DataFrame, params: dict, record: dict
+    ) -> Tuple[pd.DataFrame, dict]:
+        # Mín/máx e média/desvio saem do perfil, sem outra passada nos dados
+        profile = self._profile_for(record["dataset_id"], dataframe)
+        dataframe, _, transform = normalize_with_statistics_from(
+            dataframe, params["method"], profile.statistics_for()
+        )
+        # Guarda a transformação acumulada para rotular os eixos com os
+        # valores originais
+        previous = record.get("normalization")
+        return dataframe, {
+            "normalization": transform.then(
+                NormalizationTransform.from_dict(previous) if previous else None
+            ).to_dict()
+        }
+
+    def _reduce_step(
+        self, dataframe: pd.DataFrame, params: dict, record: dict
+    ) -> Tuple[pd.DataFrame, dict]:
+        return (
+            reduce_dimensions_from(dataframe, params["n_components"], params["method"]),
+            {},
+        )
+
+    def _reshape_years_step(
+        self, dataframe: pd.DataFrame, params: dict, record: dict
+    ) -> Tuple[pd.DataFrame, dict]:
+        # Uma coluna por ano vira uma linha por ano e vice-versa; o checkpoint
+        # do pipeline guarda o resultado de cada versão
+        if detect_year_columns_from(dataframe.columns.tolist()) is not None:
+            return wide_to_long_from(dataframe), {}
+        label_column = record["label_column"]
+        return (
+            long_to_wide_from(
+                dataframe, index_columns=[label_column] if label_column else None
+            ),
+            {},
+        )
+
+    def _random_sample_step(
+        self, dataframe: Optional[pd.DataFrame], params: dict, record: dict
+    ) -> Tuple[pd.DataFrame, dict]:
+        # Estratifica pelo rótulo da versão de entrada, quando houver; a
+        # entrada é lida em blocos do DatasetStore, não do DataFrame
+        sampled = stored_sample_from(
+            self.dataset_store,
+            record["dataset_id"],
+            params["size"],
+            params["seed"],
+            record["label_column"] or None,
+        )
+        return sampled, {}
+
+    def _user_sample_step(
+        self, dataframe: pd.DataFrame, params: dict, record: dict
+    ) -> Tuple[pd.DataFrame, dict]:
+        column_index = self.column_index_cache.get_or_compute(
+            record["dataset_id"], lambda: ColumnIndex(dataframe)
+        )
+        predicates = parse_sample_query(params["query"], column_index.dataframe)
+        positions = column_index.select(predicates)
+        # Só as linhas selecionadas saem da tabela Arrow de entrada
+        subset = (
+            self.dataset_store.get_table(record["dataset_id"])
+            .take(positions)
+            .to_pandas()
+        )
+        return subset, {}
+
+    def _derive_metadata(
+        self, step: dict, previous: dict, record: dict, dataframe: pd.DataFrame
+    ) -> None:
+        self._derive_missing_data(step, previous, record, dataframe)
+        self._derive_profile(step, previous, record, dataframe)
+
+    def _derive_profile(
+        self, step: dict, previous: dict, record: dict, dataframe: pd.DataFrame
+    ) -> None:
+        # Perfil derivado do anterior quando o passo mantém as linhas; os
+        # que mudam as linhas recalculam numa passada sobre o resultado
+        profile = self.profile_cache.get(previous["dataset_id"])
+        operation = step["operation"]
+        columns = dataframe.columns.to_list()
+        if profile is None:
+            derived = profile_dataset_from(dataframe)
+        elif operation == "normalize":
+            derived = profile.normalized(step["params"]["method"])
+        elif operation == "label_column":
+            derived = profile.restrict_to(columns)
+            label_column = step["params"]["label_column"]
+            derived.columns[label_column] = replace(
+                derived.columns[label_column],
+                dtype=str(dataframe[label_column].dtype),
+            )
+        elif operation == "remove_missing" and len(dataframe) == profile.row_count:
+            derived = profile.restrict_to(columns)
+        elif operation == "reduce":
+            # Só os componentes principais são colunas novas
+            kept = [column for column in columns if column in profile.columns]
+            derived = profile_dataset_from(dataframe, profile.restrict_to(kept))
+        else:
+            derived = profile_dataset_from(dataframe)
+        self.profile_cache.put(record["dataset_id"], derived)
+
+    def _derive_missing_data(
+        self, step: dict, previous: dict, record: dict, dataframe: pd.DataFrame
+    ) -> None:
+        # Resumo de dados ausentes derivado da versão anterior, sem varrer os
+        # dados de novo quando o passo só recorta linhas ou colunas
+        cached = self.missing_data_cache.get(previous["dataset_id"])
+        operation = step["operation"]
+        if cached is not None and operation == "normalize":
+            # A normalização preserva os NaN
+            self.missing_data_cache.put(record["dataset_id"], cached)
+            return
+        if cached is not None and operation == "remove_missing":
+            summary = remove_nan_rows_from_summary(cached[0], len(dataframe))
+        elif cached is not None and (
+            operation == "label_column"
+            or (operation == "reduce" and step["params"]["method"] != "pca")
+        ):
+            summary = restrict_missing_data_summary_to(
+                cached[0], dataframe.columns.to_list()
+            )
+        else:
+            self._missing_data_for(record["dataset_id"], dataframe)
+            return
+        self.missing_data_cache.put(
+            record["dataset_id"], (summary, render_missing_data_summary(summary))
+        )
 
     def setup_callbacks(self) -> None:
 
         @self.app.callback(
             Output("parallel-coordinates-plot", "figure"),
+            Output("plot-status", "children"),
+            Output("plot-job", "data"),
+            Output("plot-job-poll", "disabled"),
+            Output("axis-histograms", "figure"),
+            Output("plot-axes", "data"),
             Input("visualize-graph-button", "n_clicks"),
+            Input("plot-job-poll", "n_intervals"),
+            Input("axis-options", "value"),
+            Input("axis-order", "value"),
             State("parallel-coordinates-plot", "figure"),
+            State("dataset-state", "data"),
+            State("plot-job", "data"),
+            State("plot-axes", "data"),
             # prevent_initial_call=True,
         )
-        def update_parallel_coordinates(n_clicks, graph_state):
+        def update_parallel_coordinates(
+            n_clicks,
+            n_intervals,
+            axis_options,
+            axis_order,
+            graph_state,
+            dataset_state,
+            plot_job,
+            plot_axes,
+        ):
             ctx = dash.callback_context
 
-            if not ctx.triggered or n_clicks is None:
+            if not ctx.triggered:
                 raise dash.exceptions.PreventUpdate
 
-            if not self.dataframe.empty:
-                return plot_parallel_coordinates_from(self.dataframe)
+            triggered_input = ctx.triggered[0]["prop_id"].split(".")[0]
+
+            # Consulta o andamento do gráfico montado em segundo plano
+            if triggered_input == "plot-job-poll":
+                if not plot_job:
+                    return (
+                        dash.no_update,
+                        "",
+                        None,
+                        True,
+                        dash.no_update,
+                        dash.no_update,
+                    )
+                status = self.jobs.status(plot_job["job_id"])
+                if status.state == "running":
+                    return (
+                        dash.no_update,
+                        self._progress_message(status),
+                        dash.no_update,
+                        dash.no_update,
+                        dash.no_update,
+                        dash.no_update,
+                    )
+                self.jobs.forget(plot_job["job_id"])
+                if status.state == "done":
+                    if plot_job.get("figure_key"):
+                        self.figure_cache.put(
+                            plot_job["figure_key"], figure_json_from(status.result)
+                        )
+                    return status.result, "", None, True, dash.no_update, dash.no_update
+                if status.state in ("failed", "missing"):
+                    logger.error("Tarefa %s: %s", status.state, status.error)
+                    return (
+                        go.Figure(),
+                        "Erro ao gerar o gráfico.",
+                        None,
+                        True,
+                        go.Figure(),
+                        None,
+                    )
+                return dash.no_update, "", None, True, dash.no_update, dash.no_update
+
+            # Opções dos eixos com o gráfico da versão atual na tela: vai ao
+            # navegador só o que mudou, não a figura inteira
+            if triggered_input in ("axis-options", "axis-order"):
+                if (
+                    plot_job
+                    or not dataset_state
+                    or not plot_axes
+                    or plot_axes["dataset_id"] != dataset_state["dataset_id"]
+                ):
+                    raise dash.exceptions.PreventUpdate
+                try:
+                    _, profile, axes, axis_ranges = self._plot_axes_for(
+                        dataset_state, axis_options, axis_order
+                    )
+                except DatasetNotFoundError:
+                    raise dash.exceptions.PreventUpdate
+                if set(axes) != set(plot_axes["axes"]):
+                    raise dash.exceptions.PreventUpdate
+                if triggered_input == "axis-options":
+                    return (
+                        self._axis_ranges_patch_for(
+                            plot_axes["axes"],
+                            axis_ranges,
+                            profile,
+                            dataset_state.get("normalization"),
+                        ),
+                        dash.no_update,
+                        dash.no_update,
+                        dash.no_update,
+                        self._histogram_ranges_patch_for(
+                            list(profile.histograms_for(plot_axes["axes"])),
+                            axis_ranges,
+                        ),
+                        dash.no_update,
+                    )
+                # Nova ordem: o navegador reordena os eixos que já tem (callback
+                # no cliente, abaixo); só os histogramas, pequenos, são refeitos
+                return (
+                    dash.no_update,
+                    dash.no_update,
+                    dash.no_update,
+                    dash.no_update,
+                    typed_figure_from(
+                        plot_axis_histograms_from(
+                            profile.histograms_for(axes), axis_ranges
+                        )
+                    ),
+                    {
+                        "dataset_id": dataset_state["dataset_id"],
+                        "axes": axes,
+                        "reordered": True,
+                    },
+                )
+
+            if n_clicks is None:
+                raise dash.exceptions.PreventUpdate
+
+            # Um novo pedido substitui o gráfico que ainda estava sendo montado
+            if plot_job:
+                self.jobs.cancel(plot_job["job_id"])
+
+            if dataset_state:
+                # Lê só a projeção desenhada; histogramas e intervalos dos
+                # eixos saem dos sketches do perfil, sem ler os dados
+                label_column = dataset_state["label_column"]
+                try:
+                    columns, profile, axes, axis_ranges = self._plot_axes_for(
+                        dataset_state, axis_options, axis_order
+                    )
+                except DatasetNotFoundError:
+                    return go.Figure(), "", None, True, go.Figure(), None
+                plot_args = (
+                    dataset_state["dataset_id"],
+                    columns,
+                    label_column or None,
+                    dataset_state.get("normalization"),
+                    axis_ranges,
+                    axes,
+                )
+                histograms = typed_figure_from(
+                    plot_axis_histograms_from(profile.histograms_for(axes), axis_ranges)
+                )
+                plot_axes = {"dataset_id": dataset_state["dataset_id"], "axes": axes}
+                # Mesma versão e mesmas opções de um gráfico já montado: vai
+                # direto do cache, sem passar pelo pool de processos
+                figure_key = parallel_coordinates_key_for(*plot_args)
+                cached = self.figure_cache.get(figure_key)
+                if cached is not None:
+                    return json.loads(cached), "", None, True, histograms, plot_axes
+                job_id = self.jobs.submit(
+                    parallel_coordinates_job, self.dataset_store.directory, *plot_args
+                )
+                return (
+                    dash.no_update,
+                    "Gerando gráfico...",
+                    {"job_id": job_id, "figure_key": figure_key},
+                    False,
+                    histograms,
+                    plot_axes,
+                )
 
             return (
-                go.Figure()
+                go.Figure(),
+                "",
+                None,
+                True,
+                go.Figure(),
+                None,
             )  # Retornar um gráfico vazio caso o DataFrame esteja vazio
 
         @self.app.callback(
             Output("output-data-upload", "children"),
+            Output("data-table", "columns"),
+            Output("data-table", "page_current"),
             Output("missing-data-matrix", "figure"),
+            Output("dataset-state", "data"),
+            Output("pipeline-steps", "options"),
+            Output("pipeline-steps", "value"),
+            Output("data-job", "data"),
+            Output("data-job-poll", "disabled"),
             Input("upload-data", "contents"),
+            Input("data-job-poll", "n_intervals"),
             Input("save-modal-button", "n_clicks"),
             Input("normalize-data-button", "n_clicks"),
             Input("remove-missing-data-button", "n_clicks"),
-            State("output-data-upload", "children"),
+            Input("dimension-button", "n_clicks"),
+            Input("reshape-years-button", "n_clicks"),
+            Input("random-sample", "n_clicks"),
+            Input("user-sample", "n_clicks"),
+            Input("user-sample-query", "n_submit"),
+            Input("undo-button", "n_clicks"),
+            Input("redo-button", "n_clicks"),
+            Input("pipeline-steps", "value"),
+            State("dropdown-options", "value"),
+            State("dimension-amount", "value"),
+            State("dimension-method", "value"),
+            State("normalize-method", "value"),
+            State("random-sample-amount", "value"),
+            State("user-sample-query", "value"),
+            State("dataset-state", "data"),
+            State("data-job", "data"),
+            State("upload-options", "value"),
+            State("brush-ranges", "data"),
             # prevent_initial_call=True,
         )
         def update_data(
             encoded_dataset,
+            data_job_intervals,
             n_clicks,
             normalize_clicks,
             missing_data_clicks,
-            state,
+            dimension_clicks,
+            reshape_clicks,
+            random_sample_clicks,
+            user_sample_clicks,
+            user_sample_submits,
+            undo_clicks,
+            redo_clicks,
+            enabled_steps,
+            selected_label,
+            dimension_amount,
+            dimension_method,
+            normalize_method,
+            random_sample_amount,
+            user_sample_query,
+            dataset_state,
+            data_job,
+            upload_options,
+            brush_ranges,
         ):
-            # print("Callback disparado")
 
             # Identificar qual input disparou o callback
             ctx = dash.callback_context
@@ -318,209 +1192,332 @@ class Dashboard:
 
             # Caso o input seja o upload de um arquivo
             if triggered_input == "upload-data":
-                # print("Arquivo carregado")
-                try:
-                    _, content_string = encoded_dataset.split(",")
-                    decoded = base64.b64decode(content_string)
-                    self.dataframe = pd.read_csv(io.StringIO(decoded.decode("utf-8")))
-                    missing_data_matrix = generate_missing_data_matrix_from(
-                        self.dataframe
-                    )
-
-                    first_column = self.dataframe.columns[0]
+                # Um novo upload cancela o anterior e substitui as versões
+                # anteriores da sessão
+                if data_job:
+                    self.jobs.cancel(data_job["job_id"])
+                if dataset_state:
+                    session_id = dataset_state["session_id"]
+                elif data_job:
+                    session_id = data_job["session_id"]
+                else:
+                    session_id = self.dataset_store.new_session_id()
+                self.dataset_store.drop_session(session_id)
 
-                    if pd.api.types.is_numeric_dtype(self.dataframe[first_column]):
+                # A leitura roda no pool de processos; o andamento chega pelo
+                # dcc.Interval "data-job-poll"
+                job_id = self.jobs.submit(
+                    load_upload_job,
+                    self.dataset_store.directory,
+                    session_id,
+                    encoded_dataset,
+                    "optimize" in (upload_options or []),
+                )
+                return (
+                    "Carregando arquivo...",
+                    [],
+                    0,
+                    go.Figure(),
+                    None,
+                    [],
+                    [],
+                    {"job_id": job_id, "session_id": session_id},
+                    False,
+                )
 
-                        self.dataframe = self.dataframe.drop(columns=[first_column])
+            # Caso o input seja a consulta ao andamento do upload
+            if triggered_input == "data-job-poll":
+                no_update = [dash.no_update] * 9
+                if not data_job:
+                    return (*no_update[:7], None, True)
+                status = self.jobs.status(data_job["job_id"])
+                if status.state == "running":
+                    return (self._progress_message(status), *no_update[1:])
+                self.jobs.forget(data_job["job_id"])
+                if status.state == "done":
+                    # A versão carregada é a base imutável do pipeline
+                    base_id, summary, profile, memory_report = status.result
+                    self.missing_data_cache.put(
+                        base_id, (summary, render_missing_data_summary(summary))
+                    )
+                    self.profile_cache.put(base_id, profile)
+                    shown = self._show_pipeline(
+                        {"session_id": data_job["session_id"]},
+                        TransformPipeline(base_id),
+                    )
+                    if memory_report is not None and not shown[0]:
+                        shown = (memory_report.describe(), *shown[1:])
+                    return (*shown, None, True)
+                # Tarefa que nenhum worker conhece também é um erro, não um
+                # fim silencioso da consulta
+                if status.state in ("failed", "missing"):
+                    logger.error("Tarefa %s: %s", status.state, status.error)
                     return (
-                        dash_table.DataTable(
-                            data=self.dataframe.to_dict("records"),
-                            columns=[
-                                {"name": i, "id": i} for i in self.dataframe.columns
-                            ],
-                            page_size=10,
-                            style_table={"overflowX": "auto"},
-                            style_cell={"textAlign": "left", "padding": "5px"},
-                            style_header={
-                                "backgroundColor": "lightgrey",
-                                "fontWeight": "bold",
-                            },
-                        ),
-                        {
-                            "data": [],
-                            "layout": go.Layout(
-                                images=[
-                                    dict(
-                                        source=missing_data_matrix,
-                                        x=0,
-                                        y=1,
-                                        xref="paper",
-                                        yref="paper",
-                                        sizex=1,
-                                        sizey=1,
-                                        xanchor="left",
-                                        yanchor="top",
-                                        opacity=1,
-                                        layer="above",
-                                    )
-                                ],
-                                width=700,
-                                height=500,
-                                margin=dict(l=0, r=0, t=0, b=0),
-                                hovermode="closest",
-                            ),
-                        },
+                        "Erro ao carregar arquivo.",
+                        [],
+                        0,
+                        go.Figure(),
+                        None,
+                        [],
+                        [],
+                        None,
+                        True,
                     )
-                except Exception as e:
-                    print(f"Erro: {e}")
-                    return "Erro ao carregar arquivo.", go.Figure()
+                return (*no_update[:7], None, True)
 
-            # Caso o input seja o botão para remover dados ausentes
-            if triggered_input == "remove-missing-data-button" and missing_data_clicks > 0:
-                print("Botão remover dados ausentes clicado")
-                if self.dataframe.empty:
-                    return dash_table.DataTable(), go.Figure()
-                self.dataframe = remove_nan_rows_from(self.dataframe)
-                missing_data_matrix = generate_missing_data_matrix_from(self.dataframe)
+            if not dataset_state:
                 return (
-                    dash_table.DataTable(
-                        data=self.dataframe.to_dict("records"),
-                        columns=[{"name": i, "id": i} for i in self.dataframe.columns],
-                        page_size=10,
-                        style_table={"overflowX": "auto"},
-                        style_cell={"textAlign": "left", "padding": "5px"},
-                        style_header={
-                            "backgroundColor": "lightgrey",
-                            "fontWeight": "bold",
-                        },
-                    ),
-                    {
-                        "data": [],
-                        "layout": go.Layout(
-                            images=[
-                                dict(
-                                    source=missing_data_matrix,
-                                    x=0,
-                                    y=1,
-                                    xref="paper",
-                                    yref="paper",
-                                    sizex=1,
-                                    sizey=1,
-                                    xanchor="left",
-                                    yanchor="top",
-                                    opacity=1,
-                                    layer="above",
-                                )
-                            ],
-                            width=700,
-                            height=500,
-                            margin=dict(l=0, r=0, t=0, b=0),
-                            hovermode="closest",
-                        ),
-                    },
+                    "",
+                    [],
+                    0,
+                    go.Figure(),
+                    dash.no_update,
+                    [],
+                    [],
+                    dash.no_update,
+                    dash.no_update,
                 )
+
+            pipeline = TransformPipeline.from_dict(dataset_state["pipeline"])
+
+            # Desfazer, refazer e ligar/desligar passos só mudam o pipeline; o
+            # resultado sai dos checkpoints sempre que possível
+            if triggered_input == "undo-button":
+                if not pipeline.can_undo():
+                    raise dash.exceptions.PreventUpdate
+                pipeline = pipeline.undo()
+            elif triggered_input == "redo-button":
+                if not pipeline.can_redo():
+                    raise dash.exceptions.PreventUpdate
+                pipeline = pipeline.redo()
+            elif triggered_input == "pipeline-steps":
+                toggled = pipeline.with_enabled(enabled_steps or [])
+                if toggled == pipeline:
+                    raise dash.exceptions.PreventUpdate
+                pipeline = toggled
+            # Caso o input seja o botão para remover dados ausentes
+            elif (
+                triggered_input == "remove-missing-data-button"
+                and missing_data_clicks > 0
+            ):
+                pipeline = pipeline.push(step_from("remove_missing"))
             # Caso o input seja a escolha da coluna rótulo (botão)
-            if triggered_input == "save-modal-button" and n_clicks > 0:
-                # print('tentando recarregar a tabela')
-                if self.dataframe.empty:
-                    return dash_table.DataTable(), go.Figure()
-                return (
-                    dash_table.DataTable(
-                        data=self.dataframe.to_dict("records"),
-                        columns=[{"name": i, "id": i} for i in self.dataframe.columns],
-                        page_size=10,
-                        style_table={"overflowX": "auto"},
-                        style_cell={"textAlign": "left", "padding": "5px"},
-                        style_header={
-                            "backgroundColor": "lightgrey",
-                            "fontWeight": "bold",
-                        },
-                    ),
-                    {
-                        "data": [],
-                        "layout": go.Layout(
-                            images=[
-                                dict(
-                                    source=generate_missing_data_matrix_from(
-                                        self.dataframe
-                                    ),
-                                    x=0,
-                                    y=1,
-                                    xref="paper",
-                                    yref="paper",
-                                    sizex=1,
-                                    sizey=1,
-                                    xanchor="left",
-                                    yanchor="top",
-                                    opacity=1,
-                                    layer="above",
-                                )
-                            ],
-                            width=700,
-                            height=500,
-                            margin=dict(l=0, r=0, t=0, b=0),
-                            hovermode="closest",
-                        ),
-                    },
+            elif triggered_input == "save-modal-button" and n_clicks > 0:
+                if not selected_label:
+                    raise dash.exceptions.PreventUpdate
+                pipeline = pipeline.push(
+                    step_from("label_column", label_column=selected_label)
                 )
             # Caso o input seja a normalização de dados (botão)
-            if triggered_input == "normalize-data-button" and normalize_clicks > 0:
-                # print("Botão normalizar dados clicado")
-                if self.dataframe.empty:
-                    return dash_table.DataTable(), go.Figure()
-
-                self.dataframe = normalize_data_from(self.dataframe)
-
-                return (
-                    dash_table.DataTable(
-                        data=self.dataframe.to_dict("records"),
-                        columns=[{"name": i, "id": i} for i in self.dataframe.columns],
-                        page_size=10,
-                        style_table={"overflowX": "auto"},
-                        style_cell={"textAlign": "left", "padding": "5px"},
-                        style_header={
-                            "backgroundColor": "lightgrey",
-                            "fontWeight": "bold",
-                        },
-                    ),
-                    {
-                        "data": [],
-                        "layout": go.Layout(
-                            images=[
-                                dict(
-                                    source=generate_missing_data_matrix_from(
-                                        self.dataframe
-                                    ),
-                                    x=0,
-                                    y=1,
-                                    xref="paper",
-                                    yref="paper",
-                                    sizex=1,
-                                    sizey=1,
-                                    xanchor="left",
-                                    yanchor="top",
-                                    opacity=1,
-                                    layer="above",
-                                )
-                            ],
-                            width=700,
-                            height=500,
-                            margin=dict(l=0, r=0, t=0, b=0),
-                            hovermode="closest",
-                        ),
-                    },
+            elif triggered_input == "normalize-data-button" and normalize_clicks > 0:
+                pipeline = pipeline.push(
+                    step_from("normalize", method=normalize_method)
                 )
             # Caso o input seja a redução de dimensões (botão)
-            if triggered_input == "dimension-button" and n_clicks > 0:
-                pass
+            elif triggered_input == "dimension-button" and dimension_clicks > 0:
+                if not dimension_amount:
+                    raise dash.exceptions.PreventUpdate
+                pipeline = pipeline.push(
+                    step_from(
+                        "reduce",
+                        method=dimension_method,
+                        n_components=int(dimension_amount),
+                    )
+                )
+            # Caso o input seja a troca entre formato largo e longo dos anos
+            elif triggered_input == "reshape-years-button" and reshape_clicks > 0:
+                pipeline = pipeline.push(step_from("reshape_years"))
             # Caso o input seja a amostragem randômica (botão)
-            if triggered_input == "random-sample" and n_clicks > 0:
-                pass
+            elif triggered_input == "random-sample" and random_sample_clicks > 0:
+                if not random_sample_amount or random_sample_amount < 1:
+                    raise dash.exceptions.PreventUpdate
+                pipeline = pipeline.push(
+                    step_from(
+                        "random_sample",
+                        size=int(random_sample_amount),
+                        seed=DEFAULT_SEED,
+                    )
+                )
             # Caso o input seja a amostragem personalizada
-            if triggered_input == "user-sample" and n_clicks > 0:
-                pass
+            elif triggered_input in ("user-sample", "user-sample-query"):
+                if not user_sample_query:
+                    raise dash.exceptions.PreventUpdate
+                last_step = pipeline.last_step()
+                if last_step is not None and last_step["operation"] == "user_sample":
+                    # Refazer o filtro substitui o anterior, para que mudar um
+                    # intervalo não filtre em cima do filtro anterior
+                    pipeline = pipeline.undo()
+                pipeline = pipeline.push(
+                    step_from("user_sample", query=user_sample_query)
+                )
+            else:
+                raise dash.exceptions.PreventUpdate
 
-            raise dash.exceptions.PreventUpdate
+            shown = self._show_pipeline(dataset_state, pipeline)
+            # Passos que não mudam os dados ausentes (normalização, por
+            # exemplo) reaproveitam a matriz já exibida, sem reenviá-la
+            previous = self.missing_data_cache.get(dataset_state["dataset_id"])
+            if (
+                previous is not None
+                and previous[1] is shown[3]
+                and not (brush_ranges and brush_ranges["ranges"])
+            ):
+                shown = (*shown[:3], dash.no_update, *shown[4:])
+            return (*shown, dash.no_update, dash.no_update)
+
+        # Seleção por faixas nos eixos do gráfico (brushing): cada evento só
+        # refaz o bitmap do eixo que mudou
+        @self.app.callback(
+            Output("brush-ranges", "data"),
+            Output("brush-status", "children"),
+            Output("missing-data-matrix", "figure", allow_duplicate=True),
+            Output("data-table", "page_current", allow_duplicate=True),
+            Input("parallel-coordinates-plot", "restyleData"),
+            Input("plot-axes", "data"),
+            State("brush-ranges", "data"),
+            prevent_initial_call=True,
+        )
+        def update_brush(restyle_data, plot_axes, brush_ranges):
+            ctx = dash.callback_context
+            triggered_input = ctx.triggered[0]["prop_id"].split(".")[0]
+            if not plot_axes:
+                return None, "", dash.no_update, dash.no_update
+
+            dataset_id = plot_axes["dataset_id"]
+            if triggered_input == "plot-axes" and plot_axes.get("reordered"):
+                # Eixos reordenados no navegador: as faixas continuam valendo,
+                # só a posição de cada eixo muda
+                if not brush_ranges or brush_ranges["dataset_id"] != dataset_id:
+                    raise dash.exceptions.PreventUpdate
+                return (
+                    {**brush_ranges, "axes": plot_axes["axes"]},
+                    dash.no_update,
+                    dash.no_update,
+                    dash.no_update,
+                )
+            try:
+                _, missing_data_figure = self._missing_data_for(dataset_id)
+                if triggered_input == "plot-axes":
+                    # Um gráfico novo começa sem faixas marcadas
+                    return None, "", missing_data_figure, 0
+                current = (
+                    brush_ranges
+                    if brush_ranges and brush_ranges["dataset_id"] == dataset_id
+                    else {"axes": plot_axes["axes"], "ranges": {}}
+                )
+                axes, ranges = brush_ranges_from(
+                    restyle_data, current["axes"], current["ranges"]
+                )
+                if not ranges:
+                    state = {"dataset_id": dataset_id, "axes": axes, "ranges": {}}
+                    return state, "", missing_data_figure, 0
+
+                brush_filter = self._brush_filter_for(dataset_id)
+                positions = brush_filter.select(ranges)
+            except DatasetNotFoundError:
+                return None, "", dash.no_update, dash.no_update
+
+            # Dados ausentes só das linhas selecionadas, da máscara em cache
+            column_index = brush_filter.column_index
+            summary = summarize_missing_mask_from(
+                column_index.missing_mask()[positions],
+                column_index.dataframe.columns.to_list(),
+            )
+            status = f"Seleção: {len(positions):,} de {column_index.row_count:,} linhas"
+            return (
+                {"dataset_id": dataset_id, "axes": axes, "ranges": ranges},
+                status,
+                render_missing_data_summary(summary),
+                0,
+            )
+
+        # Reordenação dos eixos feita no navegador: move as dimensões da
+        # figura já recebida (com as faixas marcadas) sem reenviar os valores
+        self.app.clientside_callback(
+            """
+            function (plotAxes, figure, brushRanges) {
+                const noUpdate = window.dash_clientside.no_update;
+                if (!plotAxes || !plotAxes.reordered || !figure || !figure.data
+                        || !figure.data.length) {
+                    return noUpdate;
+                }
+                const dimensions = figure.data[0].dimensions || [];
+                const byLabel = {};
+                dimensions.forEach((dimension) => {
+                    byLabel[dimension.label] = dimension;
+                });
+                const ranges = (brushRanges
+                    && brushRanges.dataset_id === plotAxes.dataset_id
+                    && brushRanges.ranges) || {};
+                const ordered = plotAxes.axes.map((axis) => {
+                    const dimension = byLabel[String(axis)];
+                    if (!dimension) {
+                        return undefined;
+                    }
+                    const moved = Object.assign({}, dimension);
+                    const interval = ranges[String(axis)];
+                    if (interval) {
+                        moved.constraintrange =
+                            interval.length === 1 ? interval[0] : interval;
+                    } else {
+                        delete moved.constraintrange;
+                    }
+                    return moved;
+                });
+                if (ordered.length !== dimensions.length
+                        || ordered.includes(undefined)) {
+                    return noUpdate;
+                }
+                const trace = Object.assign({}, figure.data[0], {dimensions: ordered});
+                return Object.assign({}, figure, {
+                    data: [trace].concat(figure.data.slice(1)),
+                });
+            }
+            """,
+            Output("parallel-coordinates-plot", "figure", allow_duplicate=True),
+            Input("plot-axes", "data"),
+            State("parallel-coordinates-plot", "figure"),
+            State("brush-ranges", "data"),
+            prevent_initial_call=True,
+        )
+
+        # Callback para enviar ao navegador apenas a página visível da tabela
+        @self.app.callback(
+            Output("data-table", "data"),
+            Output("data-table", "page_count"),
+            Input("data-table", "page_current"),
+            Input("data-table", "page_size"),
+            Input("data-table", "sort_by"),
+            Input("data-table", "filter_query"),
+            Input("dataset-state", "data"),
+            Input("brush-ranges", "data"),
+        )
+        def update_table_page(
+            page_current, page_size, sort_by, filter_query, dataset_state, brush_ranges
+        ):
+            if not dataset_state:
+                return [], 1
+
+            try:
+                table = self.dataset_store.get_table(dataset_state["dataset_id"])
+                # Só as linhas selecionadas no gráfico, quando houver seleção
+                positions = self._brushed_positions_for(dataset_state, brush_ranges)
+            except DatasetNotFoundError:
+                return [], 1
+
+            try:
+                return query_page_from(
+                    table,
+                    page_current or 0,
+                    page_size,
+                    sort_by,
+                    filter_query,
+                    positions,
+                )
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                # Filtro que o Arrow não consegue avaliar para o tipo da
+                # coluna: página vazia em vez de erro no callback
+                return [], 1
 
         # Callback para abrir, fechar o modal e salvar a seleção do usuário
         @self.app.callback(
@@ -535,9 +1532,13 @@ class Dashboard:
                 Input("close-modal-button", "n_clicks"),
                 Input("save-modal-button", "n_clicks"),
             ],
-            [State("dropdown-options", "value"), State("modal-state", "data")],
+            [
+                State("dropdown-options", "value"),
+                State("modal-state", "data"),
+                State("dataset-state", "data"),
+            ],
         )
-        def modal_interaction(_, __, ___, selected_value, modal_state):
+        def modal_interaction(_, __, ___, selected_value, modal_state, dataset_state):
             ctx = dash.callback_context  # Objeto do contexto atual do callback
             triggered_id = (
                 ctx.triggered[0]["prop_id"].split(".")[0] if ctx.triggered else None
@@ -545,13 +1546,22 @@ class Dashboard:
 
             # Abrir o modal
             if triggered_id == "label-button":
-                # Carregar as opções do dataframe
-                options = [
-                    {"label": label, "value": label}
-                    for label in self.dataframe.select_dtypes(
-                        include="object"
-                    ).columns.to_list()
-                ]
+                # Carregar as opções a partir do perfil, sem ler os dados
+                options = []
+                if dataset_state:
+                    try:
+                        profile = self._profile_for(dataset_state["dataset_id"])
+                    except DatasetNotFoundError:
+                        profile = None
+                    if profile is not None:
+                        options = [
+                            {
+                                "label": f"{label} ({profile.columns[label].cardinality}"
+                                " valores)",
+                                "value": label,
+                            }
+                            for label in profile.text_columns()
+                        ]
                 return (
                     {
                         "display": "block",  # Mostrar o modal
@@ -594,12 +1604,7 @@ class Dashboard:
             # Salvar a seleção do usuário e fechar o modal
             if triggered_id == "save-modal-button":
                 if selected_value:
-                    self.label_column = selected_value  # Salvar a escolha do usuário
-                    # print(f"Escolha do usuário: {self.label_column}")
-                    self.dataframe = remove_object_columns_from(
-                        self.dataframe, self.label_column
-                    )
-                    # print(self.dataframe.head())
+                    # A escolha do usuário é aplicada ao dataset em update_data
                     # Fechar o modal após salvar
                     return (
                         {
@@ -613,147 +1618,28 @@ class Dashboard:
                     )  # Não mudar a seleção do dropdown
                 else:
                     # Se não houver seleção, apenas retornar o modal aberto
-                    print("Selecione uma opção antes de salvar!")
                     return dash.no_update, dash.no_update, modal_state, dash.no_update
 
             # Se nenhum clique ocorreu, não mudar nada
             return dash.no_update, dash.no_update, modal_state, dash.no_update
 
-        # # Callback para a redução de dimensões
-        # @self.app.callback(
-        #     Output("output-data-upload", "children"),
-        #     Input("dimension-button", "n_clicks"),
-        #     [
-        #         State("output-data-upload", "children"),
-        #         State("parallel-coordinates-plot", "children"),
-        #     ],
-        #     prevent_initial_call=True,
-        # )
-        # def dimension_reducing(n_clicks, parallel_coordinates_plot):
-        #     pass
-
-        #     # Abrir o modal
-        #     if n_clicks_open and n_clicks_open > 0:
-        #         print('botão rótulo')
-        #         # Carregar as opções do dataframe
-        #         options = [{'label': label, 'value': label} for label in self.dataframe.select_dtypes(include="object").columns.to_list()]
-        #         return {
-        #             "display": "block",  # Mostrar o modal
-        #             "position": "fixed",
-        #             "top": "50%",
-        #             "left": "50%",
-        #             "transform": "translate(-50%, -50%)",
-        #             "backgroundColor": "white",
-        #             "padding": "20px",
-        #             "boxShadow": "0 4px 8px rgba(0, 0, 0, 0.1)",
-        #             "zIndex": 1000,
-        #         }, {
-        #             "display": "block",  # Mostrar o overlay
-        #             "position": "fixed",
-        #             "top": 0,
-        #             "left": 0,
-        #             "width": "100%",
-        #             "height": "100%",
-        #             "backgroundColor": "rgba(0, 0, 0, 0.5)",
-        #             "zIndex": 999,
-        #         }, True, options  # Passar as opções para o Dropdown
-
-        #     # Fechar o modal
-        #     if n_clicks_close and n_clicks_close > 0:
-        #         return {
-        #             "display": "none",  # Ocultar o modal
-        #         }, {
-        #             "display": "none",  # Ocultar o overlay
-        #         }, False, dash.no_update  # Não mudar as opções do dropdown
-
-        #     # Salvar a seleção do usuário e fechar o modal
-        #     if n_clicks_save and n_clicks_save > 0:
-        #         if selected_value:
-        #             self.label_column = selected_value  # Salvar a escolha do usuário
-        #             print(f"Escolha do usuário: {self.label_column}")
-
-        #             # Fechar o modal após salvar
-        #             return {
-        #                 "display": "none",  # Ocultar o modal
-        #             }, {
-        #                 "display": "none",  # Ocultar o overlay
-        #             }, False, dash.no_update  # Não mudar a seleção do dropdown
-        #         else:
-        #             # Se não houver seleção, apenas retornar o modal aberto
-        #             print("Selecione uma opção antes de salvar!")
-        #             return dash.no_update, dash.no_update, modal_state, dash.no_update
-
-        #     # Se nenhum clique ocorreu, não mudar nada
-        #     return dash.no_update, dash.no_update, modal_state, dash.no_update
-
-        # # Callback para abrir o modal e carregar as opções do dropdown
-        # @self.app.callback(
-        #     [Output("popup-modal", "style"),
-        #     Output("popup-overlay", "style"),
-        #     Output("modal-state", "data"),
-        #     Output("dropdown-options", "options")],
-        #     [Input("label-button", "n_clicks")],
-        #     [State("modal-state", "data")]
-        # )
-        # def open_modal(n_clicks, modal_state):
-        #     if n_clicks > 0:
-        #         # Carregar as opções do dataframe
-        #         options = [{'label': label, 'value': label} for label in self.dataframe.select_dtypes(include="object").columns.to_list()]
-        #         print(options)
-        #         # Exibir o modal
-        #         return {
-        #             "display": "block",  # Mostrar o modal
-        #             "position": "fixed",
-        #             "top": "50%",
-        #             "left": "50%",
-        #             "transform": "translate(-50%, -50%)",
-        #             "backgroundColor": "white",
-        #             "padding": "20px",
-        #             "boxShadow": "0 4px 8px rgba(0, 0, 0, 0.1)",
-        #             "zIndex": 1000,
-        #         }, {
-        #             "display": "block",  # Mostrar o overlay
-        #             "position": "fixed",
-        #             "top": 0,
-        #             "left": 0,
-        #             "width": "100%",
-        #             "height": "100%",
-        #             "backgroundColor": "rgba(0, 0, 0, 0.5)",
-        #             "zIndex": 999,
-        #         }, True, options  # Passar as opções para o Dropdown
-
-        #     return dash.no_update, dash.no_update, modal_state, dash.no_update
-
-        # # Callback para fechar o modal
-        # @self.app.callback(
-        #     [Output("popup-modal", "style"),
-        #     Output("popup-overlay", "style"),
-        #     Output("modal-state", "data")],
-        #     [Input("close-modal-button", "n_clicks")],
-        #     [State("modal-state", "data")]
-        # )
-        # def close_modal(n_clicks, modal_state):
-        #     if n_clicks:
-        #         # Ocultar o modal
-        #         return {
-        #             "display": "none",  # Ocultar o modal
-        #         }, {
-        #             "display": "none",  # Ocultar o overlay
-        #         }, False
-
-        #     return dash.no_update, dash.no_update, modal_state
-        # Callback para plotar o gráfico de coordenadas paralelas
-        # @self.app.callback(
-        #     Output("output-data-upload", "children"),
-        #     Input("dimension-button", "n_clicks"),
-        #     [
-        #         State("output-data-upload", "children"),
-        #         State("parallel-coordinates-plot", "children"),
-        #     ],
-        #     prevent_initial_call=True,
-        # )
-        # def dimension_reducing(n_clicks, parallel_coordinates_plot):
-        #     pass
+        if self.debug_panel:
+
+            @self.app.callback(
+                Output("debug-panel-content", "children"),
+                Input("debug-panel-refresh", "n_intervals"),
+            )
+            def update_debug_panel(_):
+                return [
+                    dash_table.DataTable(
+                        data=rows,
+                        columns=[{"name": name, "id": name} for name in rows[0]],
+                        style_cell={"textAlign": "left", "padding": "3px"},
+                        style_table={"marginBottom": "10px"},
+                    )
+                    for rows in (timing_rows_from(), payload_rows_from())
+                    if rows
+                ]
 
     def run(self) -> None:
         self.setup_callbacks()
@@ -5,5 +5,12 @@ def main():
     dashboard = Dashboard()
     dashboard.run()
 
+
+def create_server():
+    # Ponto de entrada para o gunicorn: gunicorn -w 4 "app:create_server()"
+    dashboard = Dashboard()
+    dashboard.setup_callbacks()
+    return dashboard.app.server
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
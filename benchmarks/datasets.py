@@ -0,0 +1,121 @@
+import base64
+import glob
+import os
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+DATASETS_DIRECTORY: str = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "datasets"
+)
+# Grade dos dados sintéticos: de 10 mil a 10 milhões de linhas, de 10 a 1000
+# colunas; combinações acima de --max-cells ficam de fora
+SYNTHETIC_ROWS: Tuple[int, ...] = (10_000, 100_000, 1_000_000, 10_000_000)
+SYNTHETIC_COLUMNS: Tuple[int, ...] = (10, 100, 1_000)
+DEFAULT_MAX_CELLS: int = 10_000_000
+# Uma a cada SYNTHETIC_MISSING_EVERY colunas tem valores ausentes
+SYNTHETIC_MISSING_EVERY: int = 10
+SYNTHETIC_MISSING_FRACTION: float = 0.02
+SYNTHETIC_LABEL_CATEGORIES: int = 20
+SYNTHETIC_LABEL_COLUMN: str = "label"
+SYNTHETIC_SEED: int = 0
+
+
+@dataclass(frozen=True)
+class DatasetSpec:
+    """Descrição de um dataset de benchmark, carregada no processo filho."""
+
+    name: str
+    # Arquivo CSV em datasets/ ou None para os dados sintéticos
+    path: Optional[str] = None
+    rows: int = 0
+    columns: int = 0
+
+
+def bundled_dataset_specs_for() -> List[DatasetSpec]:
+    specs = []
+    for path in sorted(glob.glob(os.path.join(DATASETS_DIRECTORY, "*.csv"))):
+        # Arquivos vazios (como teste.csv) não têm o que medir
+        if os.path.getsize(path) > 0:
+            specs.append(DatasetSpec(os.path.basename(path), path))
+    return specs
+
+
+def synthetic_dataset_specs_for(
+    rows: Sequence[int] = SYNTHETIC_ROWS,
+    columns: Sequence[int] = SYNTHETIC_COLUMNS,
+    max_cells: int = DEFAULT_MAX_CELLS,
+) -> List[DatasetSpec]:
+    return [
+        DatasetSpec(
+            f"synthetic-{row_count}x{column_count}", None, row_count, column_count
+        )
+        for row_count in rows
+        for column_count in columns
+        if row_count * column_count <= max_cells
+    ]
+
+
+def skipped_synthetic_dataset_specs_for(
+    rows: Sequence[int] = SYNTHETIC_ROWS,
+    columns: Sequence[int] = SYNTHETIC_COLUMNS,
+    max_cells: int = DEFAULT_MAX_CELLS,
+) -> List[DatasetSpec]:
+    """Combinações da grade deixadas de fora por passarem de max_cells."""
+    return [
+        DatasetSpec(
+            f"synthetic-{row_count}x{column_count}", None, row_count, column_count
+        )
+        for row_count in rows
+        for column_count in columns
+        if row_count * column_count > max_cells
+    ]
+
+
+def synthetic_dataset_from(
+    rows: int, columns: int, seed: int = SYNTHETIC_SEED
+) -> pd.DataFrame:
+    """Colunas float64 normais, algumas com ausentes, e um rótulo de texto."""
+    rng = np.random.default_rng(seed)
+    block = rng.standard_normal((rows, columns))
+    missing_count = int(rows * SYNTHETIC_MISSING_FRACTION)
+    for position in range(0, columns, SYNTHETIC_MISSING_EVERY):
+        block[rng.choice(rows, missing_count, replace=False), position] = np.nan
+    dataframe = pd.DataFrame(
+        block, columns=[f"x{position}" for position in range(columns)], copy=False
+    )
+    categories = np.array(
+        [f"grupo {position}" for position in range(SYNTHETIC_LABEL_CATEGORIES)],
+        dtype=object,
+    )
+    # Rótulo como texto comum, do jeito que chega de um CSV
+    dataframe.insert(
+        0,
+        SYNTHETIC_LABEL_COLUMN,
+        categories[rng.integers(SYNTHETIC_LABEL_CATEGORIES, size=rows)],
+    )
+    return dataframe
+
+
+def load_dataset_from(spec: DatasetSpec) -> pd.DataFrame:
+    if spec.path is not None:
+        return pd.read_csv(spec.path)
+    return synthetic_dataset_from(spec.rows, spec.columns)
+
+
+def label_column_for(dataframe: pd.DataFrame) -> Optional[str]:
+    # Primeira coluna de texto, como o usuário escolheria no modal de rótulo
+    text_columns = dataframe.select_dtypes(include=["object", "category"]).columns
+    return text_columns[0] if len(text_columns) else None
+
+
+def encoded_upload_for(spec: DatasetSpec, dataframe: pd.DataFrame) -> str:
+    """Conteúdo no formato do dcc.Upload ("data:<mime>;base64,<dados>")."""
+    if spec.path is not None:
+        with open(spec.path, "rb") as csv_file:
+            contents = csv_file.read()
+    else:
+        # Com o índice na primeira coluna, como um DataFrame exportado
+        contents = dataframe.to_csv().encode("utf-8")
+    return "data:text/csv;base64," + base64.b64encode(contents).decode("ascii")
@@ -0,0 +1,437 @@
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+# Executado como script (python benchmarks/run_benchmarks.py), o pacote
+# services fica um diretório acima
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+import plotly
+import plotly.graph_objects as go
+from benchmarks.datasets import (
+    DEFAULT_MAX_CELLS,
+    SYNTHETIC_COLUMNS,
+    SYNTHETIC_ROWS,
+    DatasetSpec,
+    bundled_dataset_specs_for,
+    encoded_upload_for,
+    label_column_for,
+    load_dataset_from,
+    skipped_synthetic_dataset_specs_for,
+    synthetic_dataset_specs_for,
+)
+from services.data_tools import (
+    generate_missing_data_matrix_from,
+    normalize_data_from,
+    normalize_with_statistics_from,
+    parallel_coordinates_figure_dict_from,
+    plot_parallel_coordinates_from,
+    remove_nan_rows_from,
+    remove_object_columns_from,
+    summarize_missing_data_from,
+)
+from services.ingest import (
+    CSV_FORMATS,
+    decode_base64_contents_from,
+    detect_format_from,
+    read_upload_buffer_from,
+)
+from services.payloads import figure_json_from
+
+DEFAULT_REPEAT: int = 3
+DEFAULT_BASELINE_PATH: str = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "baseline.json"
+)
+# Quanto cada métrica pode crescer em relação à linha de base (razão) e o
+# piso abaixo do qual diferenças são ruído e não são comparadas
+REGRESSION_TOLERANCES: Dict[str, float] = {
+    "wall_time_min_s": 1.5,
+    "peak_rss_delta_mb": 1.25,
+    "traced_peak_mb": 1.25,
+    "figure_bytes": 1.1,
+}
+REGRESSION_FLOORS: Dict[str, float] = {
+    "wall_time_min_s": 0.02,
+    "peak_rss_delta_mb": 16.0,
+    "traced_peak_mb": 16.0,
+    "figure_bytes": 1024.0,
+}
+
+
+@dataclass
+class BenchmarkInputs:
+    dataframe: pd.DataFrame
+    label_column: Optional[str]
+    # Conteúdo do dcc.Upload, montado só para o fluxo completo
+    encoded_contents: Optional[str] = None
+
+
+@dataclass
+class BenchmarkCase:
+    # run(inputs, phases) pode anotar em `phases` o tempo de cada etapa
+    run: Callable[[BenchmarkInputs, Dict[str, float]], Any]
+    needs_label: bool = False
+    needs_upload: bool = False
+
+
+def _timed(phases: Dict[str, float], phase: str, function: Callable, *args) -> Any:
+    start = time.perf_counter()
+    result = function(*args)
+    phases[phase] = phases.get(phase, 0.0) + time.perf_counter() - start
+    return result
+
+
+def _upload_normalize_plot_from(
+    inputs: BenchmarkInputs, phases: Dict[str, float]
+) -> str:
+    # Mesmo caminho do dashboard: upload, rótulo, remoção de ausentes,
+    # normalização, gráfico e serialização da figura
+    buffer = _timed(
+        phases, "decode", decode_base64_contents_from, inputs.encoded_contents
+    )
+    file_format = detect_format_from(buffer)
+    dataframe = _timed(phases, "parse", read_upload_buffer_from, buffer, file_format)
+    first_column = dataframe.columns[0]
+    if file_format in CSV_FORMATS and pd.api.types.is_numeric_dtype(
+        dataframe[first_column]
+    ):
+        dataframe = dataframe.drop(columns=[first_column])
+    summary = _timed(phases, "missing", summarize_missing_data_from, dataframe)
+    if inputs.label_column is not None:
+        dataframe = _timed(
+            phases, "label", remove_object_columns_from, dataframe, inputs.label_column
+        )
+    dataframe = _timed(
+        phases, "remove_missing", remove_nan_rows_from, dataframe, summary
+    )
+    dataframe, _, transform = _timed(
+        phases, "normalize", normalize_with_statistics_from, dataframe
+    )
+    # Mesmo caminho do app: figura montada como dicionário
+    figure = _timed(
+        phases,
+        "plot",
+        parallel_coordinates_figure_dict_from,
+        dataframe,
+        inputs.label_column,
+        transform,
+    )
+    return _timed(phases, "serialize", figure_json_from, figure)
+
+
+BENCHMARK_CASES: Dict[str, BenchmarkCase] = {
+    "missing_matrix": BenchmarkCase(
+        lambda inputs, _: generate_missing_data_matrix_from(inputs.dataframe)
+    ),
+    "normalize": BenchmarkCase(lambda inputs, _: normalize_data_from(inputs.dataframe)),
+    "remove_nan_rows": BenchmarkCase(
+        lambda inputs, _: remove_nan_rows_from(inputs.dataframe)
+    ),
+    "remove_object_columns": BenchmarkCase(
+        lambda inputs, _: remove_object_columns_from(
+            inputs.dataframe, inputs.label_column
+        ),
+        needs_label=True,
+    ),
+    "parallel_coordinates": BenchmarkCase(
+        lambda inputs, _: plot_parallel_coordinates_from(
+            inputs.dataframe, inputs.label_column
+        )
+    ),
+    # Mesma figura, montada sem o Plotly Express (caminho usado pelo app)
+    "parallel_coordinates_dict": BenchmarkCase(
+        lambda inputs, _: parallel_coordinates_figure_dict_from(
+            inputs.dataframe, inputs.label_column
+        )
+    ),
+    "upload_normalize_plot": BenchmarkCase(
+        _upload_normalize_plot_from, needs_upload=True
+    ),
+}
+
+
+def _reset_peak_rss() -> None:
+    # No Linux, gravar 5 em clear_refs zera o pico (VmHWM) do processo; assim
+    # o pico medido é o da função, não o da montagem dos dados
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+    except OSError:
+        pass
+
+
+def _rss_mb(field: str) -> float:
+    """VmRSS (atual) ou VmHWM (pico) do processo, em MB."""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith(f"{field}:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Fora do Linux só há o pico da vida toda do processo
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def _serialized_from(result: Any) -> Optional[str]:
+    if isinstance(result, go.Figure):
+        return result.to_json()
+    if isinstance(result, dict):
+        return figure_json_from(result)
+    return result if isinstance(result, str) else None
+
+
+def measure_case_from(
+    case_name: str, spec: DatasetSpec, repeat: int, trace_allocations: bool
+) -> Optional[dict]:
+    """Mede um caso num dataset; roda num processo próprio para isolar o RSS."""
+    case = BENCHMARK_CASES[case_name]
+    dataframe = load_dataset_from(spec)
+    label_column = label_column_for(dataframe)
+    if case.needs_label and label_column is None:
+        return None
+    inputs = BenchmarkInputs(
+        dataframe,
+        label_column,
+        encoded_upload_for(spec, dataframe) if case.needs_upload else None,
+    )
+
+    # Rodada de aquecimento fora da medição (imports tardios do plotly etc.)
+    case.run(inputs, {})
+    gc.collect()
+    rss_before = _rss_mb("VmRSS")
+    _reset_peak_rss()
+    times: List[float] = []
+    for _ in range(repeat):
+        phases: Dict[str, float] = {}
+        start = time.perf_counter()
+        result = case.run(inputs, phases)
+        times.append(time.perf_counter() - start)
+    peak_rss = _rss_mb("VmHWM")
+
+    start = time.perf_counter()
+    serialized = _serialized_from(result)
+    serialize_time = time.perf_counter() - start
+    measurement = {
+        "case": case_name,
+        "dataset": spec.name,
+        "rows": len(dataframe),
+        "columns": dataframe.shape[1],
+        "wall_time_min_s": min(times),
+        "wall_time_median_s": statistics.median(times),
+        "rss_before_mb": rss_before,
+        "peak_rss_delta_mb": max(peak_rss - rss_before, 0.0),
+        "phases_s": phases,
+    }
+    if serialized is not None:
+        measurement["figure_bytes"] = len(serialized.encode("utf-8"))
+        if isinstance(result, (go.Figure, dict)):
+            measurement["serialize_time_s"] = serialize_time
+    del result, serialized
+
+    if trace_allocations:
+        # Rodada separada: o tracemalloc deixa a execução bem mais lenta
+        gc.collect()
+        tracemalloc.start()
+        result = case.run(inputs, {})
+        measurement["traced_peak_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+        # Blocos vivos ao fim da chamada (o resultado incluído), não o
+        # número de alocações feitas durante ela
+        measurement["live_blocks"] = sum(
+            statistic.count
+            for statistic in tracemalloc.take_snapshot().statistics("filename")
+        )
+        tracemalloc.stop()
+        del result
+    return measurement
+
+
+def result_key_for(measurement: dict) -> str:
+    return f"{measurement['case']}:{measurement['dataset']}"
+
+
+def regressions_from(current: List[dict], baseline: List[dict]) -> List[str]:
+    """Métricas que pioraram além da tolerância em relação à linha de base."""
+    baseline_by_key = {
+        result_key_for(measurement): measurement for measurement in baseline
+    }
+    regressions = []
+    for measurement in current:
+        reference = baseline_by_key.get(result_key_for(measurement))
+        if reference is None:
+            continue
+        for metric, tolerance in REGRESSION_TOLERANCES.items():
+            if metric not in measurement or metric not in reference:
+                continue
+            limit = max(reference[metric], REGRESSION_FLOORS[metric]) * tolerance
+            if measurement[metric] > limit:
+                regressions.append(
+                    f"{result_key_for(measurement)} {metric}: "
+                    f"{reference[metric]:.4g} -> {measurement[metric]:.4g}"
+                )
+    return regressions
+
+
+def environment_for() -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "plotly": plotly.__version__,
+    }
+
+
+def _format_row(measurement: dict) -> str:
+    traced_peak = measurement.get("traced_peak_mb")
+    figure_bytes = measurement.get("figure_bytes")
+    traced_text = f"{traced_peak:.1f}MB" if traced_peak is not None else "-"
+    return (
+        f"{measurement['case']:<22} {measurement['dataset']:<45} "
+        f"{measurement['wall_time_min_s']:>9.3f}s "
+        f"{measurement['peak_rss_delta_mb']:>9.1f}MB "
+        f"{traced_text:>11} "
+        f"{figure_bytes if figure_bytes is not None else '-':>12}"
+    )
+
+
+def run_benchmarks_from(
+    cases: List[str],
+    specs: List[DatasetSpec],
+    repeat: int = DEFAULT_REPEAT,
+    trace_allocations: bool = True,
+) -> List[dict]:
+    print(
+        f"{'caso':<22} {'dataset':<45} {'tempo':>10} {'pico RSS':>11} "
+        f"{'pico alloc':>11} {'bytes fig.':>12}"
+    )
+    measurements = []
+    # Um processo novo por medição: o pico de RSS de um caso não contamina o
+    # seguinte e nenhum cache de import fica quente entre eles
+    with ProcessPoolExecutor(
+        max_workers=1,
+        mp_context=multiprocessing.get_context("spawn"),
+        max_tasks_per_child=1,
+    ) as executor:
+        for spec in specs:
+            for case_name in cases:
+                measurement = executor.submit(
+                    measure_case_from, case_name, spec, repeat, trace_allocations
+                ).result()
+                if measurement is not None:
+                    print(_format_row(measurement), flush=True)
+                    measurements.append(measurement)
+    return measurements
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmarks das funções de services/data_tools.py, sem navegador."
+    )
+    parser.add_argument(
+        "--cases",
+        nargs="+",
+        choices=list(BENCHMARK_CASES),
+        default=list(BENCHMARK_CASES),
+    )
+    parser.add_argument(
+        "--datasets",
+        nargs="+",
+        choices=["bundled", "synthetic"],
+        default=["bundled", "synthetic"],
+    )
+    parser.add_argument("--rows", nargs="+", type=int, default=list(SYNTHETIC_ROWS))
+    parser.add_argument(
+        "--columns", nargs="+", type=int, default=list(SYNTHETIC_COLUMNS)
+    )
+    parser.add_argument(
+        "--max-cells",
+        type=int,
+        default=DEFAULT_MAX_CELLS,
+        help="ignora datasets sintéticos com mais células (linhas x colunas)",
+    )
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument(
+        "--no-allocations",
+        action="store_true",
+        help="pula a rodada com tracemalloc",
+    )
+    parser.add_argument("--save", metavar="JSON", help="grava os resultados")
+    parser.add_argument(
+        "--compare",
+        metavar="JSON",
+        nargs="?",
+        const=DEFAULT_BASELINE_PATH,
+        help="compara com a linha de base e sai com erro se houver regressão",
+    )
+    arguments = parser.parse_args()
+
+    specs: List[DatasetSpec] = []
+    skipped: List[DatasetSpec] = []
+    if "bundled" in arguments.datasets:
+        specs += bundled_dataset_specs_for()
+    if "synthetic" in arguments.datasets:
+        specs += synthetic_dataset_specs_for(
+            arguments.rows, arguments.columns, arguments.max_cells
+        )
+        skipped = skipped_synthetic_dataset_specs_for(
+            arguments.rows, arguments.columns, arguments.max_cells
+        )
+    measurements = run_benchmarks_from(
+        arguments.cases, specs, arguments.repeat, not arguments.no_allocations
+    )
+    # Tamanhos pedidos que ficaram de fora aparecem no resultado, não só no
+    # README
+    for spec in skipped:
+        print(
+            f"{'-':<22} {spec.name:<45} ignorado (max cells: "
+            f"{spec.rows * spec.columns:,} > {arguments.max_cells:,})"
+        )
+
+    if arguments.save:
+        with open(arguments.save, "w", encoding="utf-8") as results_file:
+            json.dump(
+                {
+                    "environment": environment_for(),
+                    "repeat": arguments.repeat,
+                    "results": measurements,
+                    "skipped": [
+                        {
+                            "dataset": spec.name,
+                            "reason": f"max cells ({arguments.max_cells})",
+                        }
+                        for spec in skipped
+                    ],
+                },
+                results_file,
+                indent=2,
+            )
+    if arguments.compare:
+        with open(arguments.compare, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = regressions_from(measurements, baseline["results"])
+        for regression in regressions:
+            print(f"REGRESSÃO {regression}")
+        if regressions:
+            sys.exit(1)
+        print("Sem regressões em relação à linha de base.")
+
+
+if __name__ == "__main__":
+    main()
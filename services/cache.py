@@ -0,0 +1,81 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Generic, Hashable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class LRUCache(Generic[T]):
+    """Cache em memória com descarte do item usado há mais tempo.
+
+    Com max_bytes e size_of, o descarte também mantém a soma dos tamanhos
+    dentro do limite; um item maior que o limite inteiro não é guardado.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 64,
+        max_bytes: Optional[int] = None,
+        size_of: Optional[Callable[[T], int]] = None,
+    ) -> None:
+        self.max_entries: int = max_entries
+        self.max_bytes: Optional[int] = max_bytes
+        self._size_of: Callable[[T], int] = size_of or (lambda _: 0)
+        self._items: "OrderedDict[Hashable, T]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self.total_bytes: int = 0
+        self._lock = threading.Lock()
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._items
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+    def get(self, key: Hashable) -> Optional[T]:
+        with self._lock:
+            if key not in self._items:
+                return None
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def put(self, key: Hashable, value: T) -> T:
+        size = self._size_of(value)
+        with self._lock:
+            self._pop(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return value
+            self._items[key] = value
+            self._sizes[key] = size
+            self.total_bytes += size
+            while len(self._items) > self.max_entries or (
+                self.max_bytes is not None and self.total_bytes > self.max_bytes
+            ):
+                self._pop(next(iter(self._items)))
+        return value
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], T]) -> T:
+        value = self.get(key)
+        if value is None:
+            # Calcula fora do lock: duas threads podem calcular o mesmo item,
+            # mas nenhuma fica bloqueada esperando a outra
+            value = self.put(key, compute())
+        return value
+
+    def discard(self, key: Hashable) -> None:
+        with self._lock:
+            self._pop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._sizes.clear()
+            self.total_bytes = 0
+
+    def _pop(self, key: Hashable) -> None:
+        # Chamado com o lock já adquirido
+        if key in self._items:
+            del self._items[key]
+            self.total_bytes -= self._sizes.pop(key)
@@ -0,0 +1,242 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class RangePredicate:
+    column: str
+    low: Optional[float] = None
+    high: Optional[float] = None
+
+
+@dataclass
+class MembershipPredicate:
+    column: str
+    values: List[Any]
+
+
+class ColumnIndex:
+    """Índices por coluna para resolver filtros sem varrer o DataFrame.
+
+    Colunas numéricas ganham um índice ordenado (argsort + valores ordenados),
+    e um intervalo vira duas buscas binárias. Colunas categóricas ganham um
+    bitmap compactado (np.packbits) por valor. Os filtros são combinados por
+    interseção de bitmaps. Os índices são criados na primeira consulta de
+    cada coluna e reaproveitados nas seguintes.
+    """
+
+    def __init__(self, dataframe: pd.DataFrame) -> None:
+        self.row_count: int = len(dataframe)
+        self.dataframe: pd.DataFrame = dataframe
+        # coluna -> (ordem das linhas, valores ordenados sem NaN)
+        self._sorted: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        # coluna -> (códigos por linha, valores distintos)
+        self._codes: Dict[str, Tuple[np.ndarray, pd.Index]] = {}
+        # (coluna, código) -> bitmap compactado
+        self._bitmaps: Dict[Tuple[str, int], np.ndarray] = {}
+        self._missing_mask: Optional[np.ndarray] = None
+
+    def _sorted_index_for(self, column: str) -> Tuple[np.ndarray, np.ndarray]:
+        if column not in self._sorted:
+            values = self.dataframe[column].to_numpy(dtype=np.float64)
+            order = np.argsort(values, kind="stable")
+            sorted_values = values[order]
+            # O argsort manda os NaN para o fim; eles nunca casam com um intervalo
+            valid = len(sorted_values) - int(np.isnan(sorted_values).sum())
+            self._sorted[column] = (order[:valid], sorted_values[:valid])
+        return self._sorted[column]
+
+    def _codes_for(self, column: str) -> Tuple[np.ndarray, pd.Index]:
+        if column not in self._codes:
+            codes, uniques = pd.factorize(self.dataframe[column])
+            self._codes[column] = (codes, pd.Index(uniques))
+        return self._codes[column]
+
+    def _bitmap_from_positions(self, positions: np.ndarray) -> np.ndarray:
+        mask = np.zeros(self.row_count, dtype=bool)
+        mask[positions] = True
+        return np.packbits(mask)
+
+    def range_bitmap(
+        self, column: str, low: Optional[float], high: Optional[float]
+    ) -> np.ndarray:
+        order, sorted_values = self._sorted_index_for(column)
+        start = 0 if low is None else np.searchsorted(sorted_values, low, "left")
+        end = (
+            len(sorted_values)
+            if high is None
+            else np.searchsorted(sorted_values, high, "right")
+        )
+        return self._bitmap_from_positions(order[start:end])
+
+    def membership_bitmap(self, column: str, values: Sequence[Any]) -> np.ndarray:
+        codes, uniques = self._codes_for(column)
+        bitmap = np.zeros((self.row_count + 7) // 8, dtype=np.uint8)
+        for value in values:
+            code = uniques.get_indexer([value])[0]
+            if code < 0:
+                continue
+            key = (column, int(code))
+            if key not in self._bitmaps:
+                self._bitmaps[key] = np.packbits(codes == code)
+            bitmap |= self._bitmaps[key]
+        return bitmap
+
+    def missing_mask(self) -> np.ndarray:
+        """Máscara de ausentes (linhas x colunas), calculada uma vez."""
+        if self._missing_mask is None:
+            self._missing_mask = self.dataframe.isna().to_numpy()
+        return self._missing_mask
+
+    def select(self, predicates: Sequence[Any]) -> np.ndarray:
+        """Posições das linhas que satisfazem todos os predicados."""
+        bitmap = np.full((self.row_count + 7) // 8, 0xFF, dtype=np.uint8)
+        for predicate in predicates:
+            if isinstance(predicate, RangePredicate):
+                bitmap &= self.range_bitmap(
+                    predicate.column, predicate.low, predicate.high
+                )
+            else:
+                bitmap &= self.membership_bitmap(predicate.column, predicate.values)
+        return np.flatnonzero(np.unpackbits(bitmap, count=self.row_count))
+
+
+class BrushFilter:
+    """Seleção de linhas pelas faixas marcadas nos eixos (brushing).
+
+    Cada eixo guarda o bitmap compactado das suas faixas (união delas),
+    calculado pelo índice ordenado do ColumnIndex. Quando só um eixo muda,
+    só o bitmap dele é refeito; a seleção é o AND dos bitmaps dos eixos.
+    """
+
+    def __init__(self, column_index: ColumnIndex) -> None:
+        self.column_index: ColumnIndex = column_index
+        # coluna -> (faixas, bitmap compactado)
+        self._masks: Dict[str, Tuple[Tuple[Tuple[float, float], ...], np.ndarray]] = {}
+        self._last: Optional[Tuple[Any, np.ndarray]] = None
+
+    def _mask_for(self, column: str, ranges: List[List[float]]) -> np.ndarray:
+        key = tuple((float(low), float(high)) for low, high in ranges)
+        cached = self._masks.get(column)
+        if cached is None or cached[0] != key:
+            bitmap = np.zeros((self.column_index.row_count + 7) // 8, dtype=np.uint8)
+            for low, high in key:
+                bitmap |= self.column_index.range_bitmap(column, low, high)
+            self._masks[column] = (key, bitmap)
+        return self._masks[column][1]
+
+    def select(self, ranges: Dict[str, List[List[float]]]) -> np.ndarray:
+        """Posições das linhas dentro das faixas de todos os eixos marcados."""
+        key = tuple(sorted((column, str(value)) for column, value in ranges.items()))
+        if self._last is not None and self._last[0] == key:
+            return self._last[1]
+        for column in [column for column in self._masks if column not in ranges]:
+            del self._masks[column]
+        bitmap = np.full((self.column_index.row_count + 7) // 8, 0xFF, dtype=np.uint8)
+        for column, column_ranges in ranges.items():
+            bitmap &= self._mask_for(column, column_ranges)
+        positions = np.flatnonzero(
+            np.unpackbits(bitmap, count=self.column_index.row_count)
+        )
+        self._last = (key, positions)
+        return positions
+
+
+def _constraint_ranges_from(value: Any) -> List[List[float]]:
+    # O restyleData embrulha o valor numa lista por traço: [[a, b]] para uma
+    # faixa, [[[a, b], [c, d]]] para várias e None para limpar o eixo
+    numbers: List[float] = []
+    pending = [value]
+    while pending:
+        item = pending.pop()
+        if isinstance(item, (list, tuple)):
+            pending.extend(reversed(item))
+        elif item is not None:
+            numbers.append(float(item))
+    return [
+        sorted(numbers[start : start + 2]) for start in range(0, len(numbers) - 1, 2)
+    ]
+
+
+def brush_ranges_from(
+    restyle_data: Optional[list],
+    axes: List[str],
+    ranges: Dict[str, List[List[float]]],
+) -> Tuple[List[str], Dict[str, List[List[float]]]]:
+    """Aplica um evento restyleData do parcoords às faixas atuais.
+
+    Devolve a ordem dos eixos (arrastar um eixo reordena as dimensões) e as
+    faixas por coluna; só os eixos presentes no evento mudam.
+    """
+    ranges = dict(ranges)
+    if not restyle_data:
+        return axes, ranges
+    changes = restyle_data[0] or {}
+    if "dimensions" in changes:
+        dimensions = changes["dimensions"]
+        if dimensions and isinstance(dimensions[0], list):
+            dimensions = dimensions[0]
+        by_label = {str(column): column for column in axes}
+        axes = [
+            by_label[dimension["label"]]
+            for dimension in dimensions
+            if dimension.get("label") in by_label
+        ]
+        for dimension in dimensions:
+            column = by_label.get(dimension.get("label"))
+            if column is not None:
+                constraint = _constraint_ranges_from(dimension.get("constraintrange"))
+                if constraint:
+                    ranges[column] = constraint
+                else:
+                    ranges.pop(column, None)
+    for key, value in changes.items():
+        if not key.startswith("dimensions[") or not key.endswith("].constraintrange"):
+            continue
+        position = int(key[len("dimensions[") : key.index("]")])
+        if position >= len(axes):
+            continue
+        constraint = _constraint_ranges_from(value)
+        if constraint:
+            ranges[axes[position]] = constraint
+        else:
+            ranges.pop(axes[position], None)
+    return axes, ranges
+
+
+def _number_or_none(text: str) -> Optional[float]:
+    text = text.strip()
+    return float(text) if text else None
+
+
+def parse_sample_query(query: str, dataframe: pd.DataFrame) -> List[Any]:
+    """Interpreta "Coluna: 10..20; Rótulo: A, B".
+
+    Em colunas numéricas, "a..b" é um intervalo fechado (um dos lados pode
+    ficar vazio) e um número sozinho é igualdade. Nas demais, a lista
+    separada por vírgulas é o conjunto de valores aceitos.
+    """
+    predicates: List[Any] = []
+    for part in query.split(";"):
+        if not part.strip():
+            continue
+        column, separator, expression = part.partition(":")
+        column = column.strip()
+        if not separator or column not in dataframe.columns:
+            raise ValueError(f"Coluna inválida no filtro: {column or part.strip()}")
+
+        if pd.api.types.is_numeric_dtype(dataframe[column]):
+            if ".." in expression:
+                low, high = expression.split("..", 1)
+                predicates.append(
+                    RangePredicate(column, _number_or_none(low), _number_or_none(high))
+                )
+            else:
+                value = _number_or_none(expression)
+                predicates.append(RangePredicate(column, value, value))
+        else:
+            values = [value.strip() for value in expression.split(",") if value.strip()]
+            predicates.append(MembershipPredicate(column, values))
+    return predicates
@@ -0,0 +1,231 @@
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from services.data_tools import (
+    STATISTICS_CHUNK_ROWS,
+    ColumnStatistics,
+    compute_column_statistics_from,
+    numeric_block_from,
+    numeric_columns_from,
+)
+from services.instrumentation import instrumented
+from services.sketches import HistogramSketch, QuantileSketch
+
+# Quantis guardados por coluna numérica
+PROFILE_QUANTILES: Tuple[float, ...] = (0.05, 0.25, 0.5, 0.75, 0.95)
+# Quantis que limitam os eixos quando os outliers são ignorados
+AXIS_RANGE_QUANTILES: Tuple[float, float] = (0.01, 0.99)
+
+
+@dataclass
+class ColumnProfile:
+    dtype: str
+    # "numeric", "text", "boolean" ou "other"
+    kind: str
+    null_count: int
+    minimum: float = np.nan
+    maximum: float = np.nan
+    mean: float = np.nan
+    std: float = np.nan
+    # Valores distintos (colunas de texto e booleanas)
+    cardinality: Optional[int] = None
+    # Valores nos quantis PROFILE_QUANTILES (colunas numéricas)
+    quantiles: Optional[np.ndarray] = None
+    # Sketches da distribuição (colunas numéricas), de memória constante
+    sketch: Optional[QuantileSketch] = None
+    histogram: Optional[HistogramSketch] = None
+
+
+@dataclass
+class DatasetProfile:
+    """Resumo por coluna de uma versão do dataset.
+
+    Calculado numa passada no upload e derivado do perfil anterior a cada
+    passo do pipeline, para que os callbacks consultem tipos, contagens e
+    estatísticas sem ler os dados.
+    """
+
+    row_count: int
+    columns: Dict[str, ColumnProfile]
+
+    def columns_of_kind(self, kind: str) -> List[str]:
+        return [name for name, column in self.columns.items() if column.kind == kind]
+
+    def numeric_columns(self) -> List[str]:
+        return self.columns_of_kind("numeric")
+
+    def text_columns(self) -> List[str]:
+        return self.columns_of_kind("text")
+
+    def statistics_for(self) -> ColumnStatistics:
+        """Estatísticas das colunas numéricas no formato da normalização."""
+        names = self.numeric_columns()
+        profiles = [self.columns[name] for name in names]
+        return ColumnStatistics(
+            names,
+            np.array([self.row_count - p.null_count for p in profiles], dtype=float),
+            np.array([p.minimum for p in profiles], dtype=float),
+            np.array([p.maximum for p in profiles], dtype=float),
+            np.array([p.mean for p in profiles], dtype=float),
+            np.array([p.std for p in profiles], dtype=float),
+        )
+
+    def axis_ranges_for(
+        self,
+        columns: List[str],
+        quantiles: Tuple[float, float] = AXIS_RANGE_QUANTILES,
+    ) -> Dict[str, Tuple[float, float]]:
+        """Intervalo de cada eixo entre dois quantis, sem os outliers."""
+        ranges: Dict[str, Tuple[float, float]] = {}
+        for name in columns:
+            sketch = self.columns[name].sketch
+            if sketch is None or not sketch.count:
+                continue
+            low, high = sketch.quantiles(quantiles)
+            if high > low:
+                ranges[name] = (float(low), float(high))
+        return ranges
+
+    def histograms_for(
+        self, columns: List[str]
+    ) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        return {
+            name: self.columns[name].histogram.edges_and_counts()
+            for name in columns
+            if self.columns[name].histogram is not None
+        }
+
+    def restrict_to(self, columns: List[str]) -> "DatasetProfile":
+        # Passos que só removem colunas mantêm o perfil das demais
+        return DatasetProfile(
+            self.row_count, {name: self.columns[name] for name in columns}
+        )
+
+    def normalized(self, method: str) -> "DatasetProfile":
+        """Perfil depois de normalize_with_statistics_from(method).
+
+        A normalização é afim por coluna, então estatísticas e quantis são
+        transformados diretamente, sem reler os dados.
+        """
+        numeric = [self.columns[name] for name in self.numeric_columns()]
+        # O bloco normalizado só fica em float32 se todas já eram float32
+        dtype = (
+            "float32"
+            if numeric and all(column.dtype == "float32" for column in numeric)
+            else "float64"
+        )
+        columns = dict(self.columns)
+        for name in self.numeric_columns():
+            column = self.columns[name]
+            if method == "minmax":
+                offset, spread = column.minimum, column.maximum - column.minimum
+            elif method == "zscore":
+                offset, spread = column.mean, column.std
+            else:
+                raise ValueError(f"Método de normalização desconhecido: {method}")
+            offset = 0.0 if np.isnan(offset) else offset
+            # Coluna constante vira 0, como na normalização
+            factor = 1.0 / spread if spread > 0 else 0.0
+            shift = -offset * factor
+            columns[name] = replace(
+                column,
+                dtype=dtype,
+                minimum=(column.minimum - offset) * factor,
+                maximum=(column.maximum - offset) * factor,
+                mean=(column.mean - offset) * factor,
+                std=column.std * factor,
+                quantiles=(
+                    None
+                    if column.quantiles is None
+                    else (column.quantiles - offset) * factor
+                ),
+                sketch=(
+                    None
+                    if column.sketch is None
+                    else column.sketch.scaled(factor, shift)
+                ),
+                histogram=(
+                    None
+                    if column.histogram is None
+                    else column.histogram.scaled(factor, shift)
+                ),
+            )
+        return DatasetProfile(self.row_count, columns)
+
+
+def _kind_for(dtype) -> str:
+    if pd.api.types.is_bool_dtype(dtype):
+        return "boolean"
+    if pd.api.types.is_numeric_dtype(dtype):
+        return "numeric"
+    if pd.api.types.is_object_dtype(dtype) or isinstance(
+        dtype, (pd.CategoricalDtype, pd.StringDtype)
+    ):
+        return "text"
+    return "other"
+
+
+@instrumented("transform")
+def profile_dataset_from(
+    dataframe: pd.DataFrame,
+    reuse: Optional[DatasetProfile] = None,
+    chunk_rows: int = STATISTICS_CHUNK_ROWS,
+) -> DatasetProfile:
+    """Perfil de todas as colunas numa única passada pelo bloco numérico.
+
+    Estatísticas, sketch de quantis e histograma de cada coluna são
+    atualizados fatia por fatia, com memória constante por coluna.
+    Colunas presentes em `reuse` (de um perfil anterior com as mesmas linhas)
+    são copiadas em vez de recalculadas.
+    """
+    reused = reuse.columns if reuse is not None else {}
+    numeric_columns = [
+        column for column in numeric_columns_from(dataframe) if column not in reused
+    ]
+    computed: Dict[str, ColumnProfile] = {}
+    if numeric_columns:
+        sketches = [QuantileSketch() for _ in numeric_columns]
+        histograms = [HistogramSketch() for _ in numeric_columns]
+
+        def update_sketches(chunk: np.ndarray) -> None:
+            for position in range(chunk.shape[1]):
+                sketches[position].update(chunk[:, position])
+                histograms[position].update(chunk[:, position])
+
+        block = numeric_block_from(dataframe, numeric_columns)
+        statistics = compute_column_statistics_from(
+            block, numeric_columns, chunk_rows, update_sketches
+        )
+        for position, column in enumerate(numeric_columns):
+            computed[column] = ColumnProfile(
+                dtype=str(dataframe[column].dtype),
+                kind="numeric",
+                null_count=len(dataframe) - int(statistics.count[position]),
+                minimum=float(statistics.minimum[position]),
+                maximum=float(statistics.maximum[position]),
+                mean=float(statistics.mean[position]),
+                std=float(statistics.std[position]),
+                quantiles=sketches[position].quantiles(PROFILE_QUANTILES),
+                sketch=sketches[position],
+                histogram=histograms[position],
+            )
+
+    columns: Dict[str, ColumnProfile] = {}
+    for column, dtype in dataframe.dtypes.items():
+        if column in reused:
+            columns[column] = reused[column]
+        elif column in computed:
+            columns[column] = computed[column]
+        else:
+            series = dataframe[column]
+            kind = _kind_for(dtype)
+            columns[column] = ColumnProfile(
+                dtype=str(dtype),
+                kind=kind,
+                null_count=int(series.isna().sum()),
+                cardinality=(
+                    int(series.nunique()) if kind in ("text", "boolean") else None
+                ),
+            )
+    return DatasetProfile(len(dataframe), columns)
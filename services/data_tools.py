@@ -1,72 +1,1266 @@
 import base64
-import io
+import copy
+import functools
+import re
+import struct
+import zlib
 import pandas as pd
-from typing import List, TextIO
-import matplotlib.pyplot as plt
-import missingno as msno
+import numpy as np
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional, TextIO, Tuple
 import plotly.graph_objects as go
 import plotly.express as px
+import plotly.io as pio
+from plotly.subplots import make_subplots
+from services.instrumentation import instrumented
+from services.sampling import DEFAULT_SEED, stratified_row_positions_from
 
-# gambiarra?
-import matplotlib
+# Resolução vertical da matriz de dados ausentes (faixas de linhas)
+MISSING_MATRIX_MAX_ROWS: int = 500
 
-matplotlib.use("Agg")
+# Estratégias do gráfico de coordenadas paralelas por quantidade de linhas:
+# até MAX_FULL_ROWS desenha tudo; até MAX_SAMPLED_ROWS usa amostra
+# estratificada; acima disso, imagem de densidade com uma amostra por cima
+PARALLEL_COORDINATES_MAX_FULL_ROWS: int = 20_000
+PARALLEL_COORDINATES_MAX_SAMPLED_ROWS: int = 500_000
+PARALLEL_COORDINATES_SAMPLE_ROWS: int = 10_000
+PARALLEL_COORDINATES_OVERLAY_ROWS: int = 2_000
+PARALLEL_COORDINATES_EXTREMES_PER_AXIS: int = 5
+# Tudo o que, além dos dados, define a amostra desenhada
+PARALLEL_COORDINATES_SAMPLE_SPEC: Tuple[int, ...] = (
+    PARALLEL_COORDINATES_MAX_FULL_ROWS,
+    PARALLEL_COORDINATES_MAX_SAMPLED_ROWS,
+    PARALLEL_COORDINATES_SAMPLE_ROWS,
+    PARALLEL_COORDINATES_OVERLAY_ROWS,
+    PARALLEL_COORDINATES_EXTREMES_PER_AXIS,
+    DEFAULT_SEED,
+)
+# Marcas por eixo rotuladas com os valores originais (antes da normalização)
+PARALLEL_COORDINATES_TICKS: int = 5
+# Acima disso a legenda de cores do rótulo não lista as categorias
+LABEL_COLORBAR_MAX_TICKS: int = 30
+MISSING_LABEL: str = "(ausente)"
+DENSITY_BINS: int = 64
+DENSITY_PAIR_WIDTH: int = 100
+DENSITY_HEIGHT: int = 300
 
+# Redução de dimensões
+PCA_OVERSAMPLING: int = 10
+PCA_CHUNK_ROWS: int = 200_000
+CORRELATION_SELECTION_THRESHOLD: float = 0.9
 
-def generate_missing_data_matrix_from(dataframe: pd.DataFrame) -> str:
-    fig = plt.figure()
-    # Generating the matrix
-    msno.matrix(dataframe, ax=fig.add_subplot(111), sparkline=False)
-    img_buffer = io.BytesIO()
-    plt.savefig(img_buffer, format="png")
-    img_buffer.seek(0)
-    plt.close(fig)
-    # encoding the image on base64
-    encoded_image: str = base64.b64encode(img_buffer.read()).decode("utf-8")
-    return f"data:image/png;base64,{encoded_image}"
+# Ordem dos eixos por correlação: linhas amostradas para a matriz e rodadas
+# de melhoria 2-opt do caminho
+CORRELATION_SAMPLE_ROWS: int = 50_000
+AXIS_ORDER_TWO_OPT_ROUNDS: int = 100
 
+# Linhas por fatia na passada única de estatísticas e normalização
+STATISTICS_CHUNK_ROWS: int = 8_192
 
-def remove_nan_rows_from(dataframe: pd.DataFrame) -> pd.DataFrame:
+# Colunas de ano no formato largo (F1961, "gdp 2000") e nomes da coluna de
+# ano no formato longo
+YEAR_COLUMN_PATTERN = re.compile(r"^(?P<prefix>.*?)(?P<year>1[5-9]\d{2}|2[01]\d{2})$")
+YEAR_COLUMN_NAMES = ("year", "ano")
+MIN_YEAR_COLUMNS: int = 3
+
+
+@dataclass
+class MissingDataSummary:
+    columns: List[str]
+    row_count: int
+    # Valores ausentes por coluna
+    null_counts: np.ndarray
+    # Linhas com ao menos um valor ausente (as que o dropna removeria);
+    # None quando não dá para saber sem reler os dados
+    rows_with_missing: Optional[int]
+    # Primeira linha de cada faixa e fração de ausentes por faixa e coluna
+    bucket_starts: np.ndarray
+    missing_fractions: np.ndarray
+
+
+def _bucket_starts_for(row_count: int, max_rows: int) -> np.ndarray:
+    bucket_count = max(min(row_count, max_rows), 1)
+    return (np.arange(bucket_count) * row_count) // bucket_count
+
+
+@instrumented("transform")
+def summarize_missing_data_from(
+    dataframe: pd.DataFrame, max_rows: int = MISSING_MATRIX_MAX_ROWS
+) -> MissingDataSummary:
+    return summarize_missing_mask_from(
+        dataframe.isna().to_numpy(), list(dataframe.columns), max_rows
+    )
+
+
+@instrumented("transform")
+def summarize_missing_mask_from(
+    mask: np.ndarray, columns: List, max_rows: int = MISSING_MATRIX_MAX_ROWS
+) -> MissingDataSummary:
+    # A partir da máscara de ausentes (linhas x colunas), que pode ser só uma
+    # seleção de linhas já calculada
+    row_count, column_count = mask.shape
+
+    # Agrega as linhas em faixas: fração de valores ausentes por faixa e coluna
+    bucket_starts = _bucket_starts_for(row_count, max_rows)
+    if row_count > 0:
+        missing_counts = np.add.reduceat(mask, bucket_starts, axis=0, dtype=np.int64)
+        bucket_sizes = np.diff(np.append(bucket_starts, row_count))
+        missing_fractions = missing_counts / bucket_sizes[:, np.newaxis]
+    else:
+        missing_fractions = np.zeros((1, column_count))
+
+    return MissingDataSummary(
+        columns=[str(column) for column in columns],
+        row_count=row_count,
+        null_counts=mask.sum(axis=0),
+        rows_with_missing=int(mask.any(axis=1).sum()),
+        bucket_starts=bucket_starts,
+        missing_fractions=missing_fractions,
+    )
+
+
+@instrumented("transform")
+def restrict_missing_data_summary_to(
+    summary: MissingDataSummary, columns: List[str]
+) -> MissingDataSummary:
+    """Recorta o resumo para as colunas que sobraram, sem reler os dados."""
+    positions = [summary.columns.index(str(column)) for column in columns]
+    null_counts = summary.null_counts[positions]
+    rows_with_missing = summary.rows_with_missing
+    if not null_counts.any():
+        rows_with_missing = 0
+    elif sorted(positions) != list(range(len(summary.columns))):
+        # Sem reler os dados não dá para saber quais linhas perderam o único
+        # valor ausente
+        rows_with_missing = None
+    return MissingDataSummary(
+        columns=[summary.columns[position] for position in positions],
+        row_count=summary.row_count,
+        null_counts=null_counts,
+        rows_with_missing=rows_with_missing,
+        bucket_starts=summary.bucket_starts,
+        missing_fractions=summary.missing_fractions[:, positions],
+    )
+
+
+@instrumented("transform")
+def remove_nan_rows_from_summary(
+    summary: MissingDataSummary,
+    row_count: Optional[int] = None,
+    max_rows: int = MISSING_MATRIX_MAX_ROWS,
+) -> MissingDataSummary:
+    """Resumo após o dropna: nenhuma célula ausente, sem varrer os dados."""
+    if row_count is None:
+        if summary.rows_with_missing is None:
+            raise ValueError(
+                "Informe row_count: o resumo não sabe quantas linhas sobram."
+            )
+        row_count = summary.row_count - summary.rows_with_missing
+    bucket_starts = _bucket_starts_for(row_count, max_rows)
+    return MissingDataSummary(
+        columns=list(summary.columns),
+        row_count=row_count,
+        null_counts=np.zeros_like(summary.null_counts),
+        rows_with_missing=0,
+        bucket_starts=bucket_starts,
+        missing_fractions=np.zeros((len(bucket_starts), len(summary.columns))),
+    )
+
+
+@instrumented("render")
+def render_missing_data_summary(summary: MissingDataSummary) -> go.Figure:
+    fig = go.Figure(
+        go.Heatmap(
+            # Três casas bastam para a cor e reduzem o JSON enviado
+            z=summary.missing_fractions.round(3),
+            x=summary.columns,
+            y=summary.bucket_starts,
+            zmin=0,
+            zmax=1,
+            # Presente em cinza escuro e ausente em branco, como no missingno
+            colorscale=[[0, "rgb(64, 64, 64)"], [1, "rgb(255, 255, 255)"]],
+            colorbar=dict(title="Ausentes", tickformat=".0%"),
+            hovertemplate="%{x}<br>a partir da linha %{y}"
+            "<br>ausentes: %{z:.1%}<extra></extra>",
+        )
+    )
+    fig.update_layout(
+        width=700,
+        height=500,
+        margin=dict(l=0, r=0, t=0, b=0),
+        xaxis=dict(side="top", tickangle=-45),
+        yaxis=dict(autorange="reversed", title="Linha"),
+        plot_bgcolor="white",
+    )
+    return fig
+
+
+@instrumented("render")
+def generate_missing_data_matrix_from(
+    dataframe: pd.DataFrame, max_rows: int = MISSING_MATRIX_MAX_ROWS
+) -> go.Figure:
+    return render_missing_data_summary(summarize_missing_data_from(dataframe, max_rows))
+
+
+@instrumented("transform")
+def remove_nan_rows_from(
+    dataframe: pd.DataFrame, summary: Optional[MissingDataSummary] = None
+) -> pd.DataFrame:
+    # Com o resumo em mãos, evita a varredura quando não há o que remover
+    if summary is not None and not summary.null_counts.any():
+        return dataframe
     return dataframe.dropna()
 
 
+@instrumented("transform")
 def remove_object_columns_from(
-    dataframe: pd.DataFrame, label_column: str
+    dataframe: pd.DataFrame, label_column: str, text_columns: Optional[List] = None
 ) -> pd.DataFrame:
-    object_columns: List = dataframe.select_dtypes(include="object").columns.to_list()
+    # As colunas de texto podem vir do perfil da versão, sem varrer os tipos
+    object_columns: List = (
+        list(text_columns)
+        if text_columns is not None
+        else dataframe.select_dtypes(include=["object", "category"]).columns.to_list()
+    )
     object_columns.remove(label_column)
     return dataframe.drop(columns=object_columns)
 
 
-def normalize_data_from(dataframe: pd.DataFrame) -> pd.DataFrame:
-    normalized_dataframe = dataframe.copy()  # Faz uma cópia do DataFrame original
-    numeric_columns = normalized_dataframe.select_dtypes(
-        include=["float64", "int64"]
-    ).columns
-    
-    normalized_dataframe[numeric_columns] = (
-        normalized_dataframe[numeric_columns]
-        - normalized_dataframe[numeric_columns].min()
-    ) / (
-        normalized_dataframe[numeric_columns].max()
-        - normalized_dataframe[numeric_columns].min()
-    )
-    
+@dataclass
+class ColumnStatistics:
+    columns: List[str]
+    count: np.ndarray
+    minimum: np.ndarray
+    maximum: np.ndarray
+    mean: np.ndarray
+    std: np.ndarray
+
+
+@dataclass
+class NormalizationTransform:
+    """Transformação afim por coluna: original = normalizado * scale + offset."""
+
+    columns: List[str]
+    scale: np.ndarray
+    offset: np.ndarray
+
+    def to_dict(self) -> dict:
+        return {
+            "columns": list(self.columns),
+            "scale": self.scale.tolist(),
+            "offset": self.offset.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "NormalizationTransform":
+        return cls(
+            columns=list(data["columns"]),
+            scale=np.asarray(data["scale"], dtype=np.float64),
+            offset=np.asarray(data["offset"], dtype=np.float64),
+        )
+
+    def then(
+        self, previous: Optional["NormalizationTransform"]
+    ) -> "NormalizationTransform":
+        # Compõe com uma normalização anterior, para que o inverso volte
+        # sempre aos valores originais
+        if previous is None:
+            return self
+        scale, offset = self.scale.copy(), self.offset.copy()
+        for position, column in enumerate(self.columns):
+            if column in previous.columns:
+                earlier = previous.columns.index(column)
+                offset[position] = (
+                    offset[position] * previous.scale[earlier]
+                    + previous.offset[earlier]
+                )
+                scale[position] *= previous.scale[earlier]
+        return NormalizationTransform(self.columns, scale, offset)
+
+    def inverse(self, column: str, values: np.ndarray) -> np.ndarray:
+        position = self.columns.index(column)
+        return values * self.scale[position] + self.offset[position]
+
+
+def numeric_columns_from(dataframe: pd.DataFrame) -> List[str]:
+    # dtypes.items() em vez de select_dtypes, que copiaria o DataFrame
+    return [
+        column
+        for column, dtype in dataframe.dtypes.items()
+        if pd.api.types.is_numeric_dtype(dtype)
+        and not pd.api.types.is_bool_dtype(dtype)
+    ]
+
+
+def numeric_block_from(
+    dataframe: pd.DataFrame, numeric_columns: List[str]
+) -> np.ndarray:
+    # Bloco em float32 quando todas as colunas já são float32, senão em
+    # float64. O to_numpy devolve uma cópia que pode ser alterada, na ordem
+    # por colunas do pandas, então cada coluna fica contígua
+    dtype = np.result_type(*dataframe[numeric_columns].dtypes, np.float32)
+    if dtype != np.float32:
+        dtype = np.float64
+    return dataframe[numeric_columns].to_numpy(dtype=dtype, copy=True)
+
+
+@instrumented("transform")
+def compute_column_statistics_from(
+    block: np.ndarray,
+    columns: List[str],
+    chunk_rows: int = STATISTICS_CHUNK_ROWS,
+    chunk_callback: Optional[Callable[[np.ndarray], None]] = None,
+) -> ColumnStatistics:
+    """Mínimo, máximo, média e desvio padrão numa única passada pelo bloco.
+
+    Cada fatia de linhas é lida uma vez (enquanto está no cache) para todas
+    as estatísticas; médias e variâncias das fatias são combinadas pela
+    fórmula de Chan, que é estável numericamente. `chunk_callback` recebe
+    cada fatia na mesma passada (para os sketches do perfil, por exemplo).
+    """
+    column_count = block.shape[1]
+    count = np.zeros(column_count)
+    minimum = np.full(column_count, np.nan)
+    maximum = np.full(column_count, np.nan)
+    mean = np.zeros(column_count)
+    squared_deviations = np.zeros(column_count)
+
+    for start in range(0, len(block), chunk_rows):
+        chunk = block[start : start + chunk_rows]
+        if chunk_callback is not None:
+            chunk_callback(chunk)
+        # fmin/fmax ignoram NaN sem avisos de fatias vazias
+        minimum = np.fmin(minimum, np.fmin.reduce(chunk, axis=0))
+        maximum = np.fmax(maximum, np.fmax.reduce(chunk, axis=0))
+
+        chunk_sum = chunk.sum(axis=0, dtype=np.float64)
+        if np.isnan(chunk_sum).any():
+            valid = ~np.isnan(chunk)
+            chunk_count = valid.sum(axis=0)
+            chunk_mean = np.where(valid, chunk, 0).sum(
+                axis=0, dtype=np.float64
+            ) / np.maximum(chunk_count, 1)
+            deviations = np.where(valid, chunk - chunk_mean, 0)
+        else:
+            # Caso comum: fatia sem NaN, sem máscaras nem cópias extras
+            chunk_count = np.full(column_count, len(chunk))
+            chunk_mean = chunk_sum / len(chunk)
+            deviations = chunk - chunk_mean
+        chunk_squared_deviations = np.einsum(
+            "ij,ij->j", deviations, deviations, dtype=np.float64
+        )
+
+        total = count + chunk_count
+        delta = chunk_mean - mean
+        weight = np.divide(
+            chunk_count, total, out=np.zeros(column_count), where=total > 0
+        )
+        mean += delta * weight
+        squared_deviations += chunk_squared_deviations + delta**2 * count * weight
+        count = total
+
+    std = np.sqrt(
+        np.divide(
+            squared_deviations, count, out=np.zeros(column_count), where=count > 0
+        )
+    )
+    mean[count == 0] = np.nan
+    return ColumnStatistics(list(columns), count, minimum, maximum, mean, std)
+
+
+@instrumented("transform")
+def normalize_with_statistics_from(
+    dataframe: pd.DataFrame,
+    method: str = "minmax",
+    statistics: Optional[ColumnStatistics] = None,
+    chunk_rows: int = STATISTICS_CHUNK_ROWS,
+) -> Tuple[pd.DataFrame, ColumnStatistics, NormalizationTransform]:
+    """Normaliza as colunas numéricas ("minmax" ou "zscore").
+
+    Colunas constantes viram 0 em vez de NaN/inf. As estatísticas podem vir
+    de uma chamada anterior, e então os dados são percorridos uma só vez.
+    """
+    numeric_columns = numeric_columns_from(dataframe)
+    block = numeric_block_from(dataframe, numeric_columns)
+    if statistics is None or statistics.columns != numeric_columns:
+        statistics = compute_column_statistics_from(block, numeric_columns, chunk_rows)
+
+    if method == "minmax":
+        offset, spread = statistics.minimum, statistics.maximum - statistics.minimum
+    elif method == "zscore":
+        offset, spread = statistics.mean, statistics.std
+    else:
+        raise ValueError(f"Método de normalização desconhecido: {method}")
+    offset = np.nan_to_num(offset)
+    # Coluna constante: multiplica por zero em vez de dividir por zero
+    factor = np.divide(
+        1.0, spread, out=np.zeros_like(spread), where=np.nan_to_num(spread) > 0
+    ).astype(block.dtype)
+    offset_in_block = offset.astype(block.dtype)
+
+    # Normaliza no próprio bloco, fatia por fatia
+    for start in range(0, len(block), chunk_rows):
+        chunk = block[start : start + chunk_rows]
+        chunk -= offset_in_block
+        chunk *= factor
+
+    # Um único bloco 2D, sem cópia; as demais colunas voltam às suas posições
+    normalized_dataframe = pd.DataFrame(
+        block, columns=numeric_columns, index=dataframe.index, copy=False
+    )
+    for position, column in enumerate(dataframe.columns):
+        if column not in normalized_dataframe:
+            normalized_dataframe.insert(position, column, dataframe[column])
+    transform = NormalizationTransform(
+        numeric_columns, np.where(factor > 0, spread, 0.0), offset
+    )
+    return normalized_dataframe, statistics, transform
+
+
+@instrumented("transform")
+def normalize_data_from(
+    dataframe: pd.DataFrame, method: str = "minmax"
+) -> pd.DataFrame:
+    normalized_dataframe, _, _ = normalize_with_statistics_from(dataframe, method)
     return normalized_dataframe
 
-def plot_parallel_coordinates_from(dataframe: pd.DataFrame) -> go.Figure:
-    # Identifica as colunas numéricas do DataFrame
-    numeric_columns = dataframe.select_dtypes(include=['float64', 'int64']).columns.tolist()
 
-    # Define os rótulos com base nos valores da primeira coluna
-    labels = {col: dataframe[col].iloc[1] for col in numeric_columns}
+def _mean_filled_block_from(
+    dataframe: pd.DataFrame, columns: List[str]
+) -> Tuple[np.ndarray, np.ndarray]:
+    # PCA e correlação precisam de linhas completas; a média não altera a
+    # covariância dos dados centrados
+    block = dataframe[columns].to_numpy(dtype=np.float64)
+    means = np.nanmean(block, axis=0) if len(block) else np.zeros(len(columns))
+    means = np.nan_to_num(means)
+    missing = np.isnan(block)
+    if missing.any():
+        block[missing] = np.take(means, np.nonzero(missing)[1])
+    return block, means
+
+
+def _randomized_pca_components_from(
+    centered: np.ndarray, n_components: int, seed: int, power_iterations: int = 3
+) -> np.ndarray:
+    # SVD truncada aleatória (Halko et al.): projeta em um subespaço pequeno
+    # e faz a SVD exata só dele
+    rng = np.random.default_rng(seed)
+    sketch_size = min(n_components + PCA_OVERSAMPLING, min(centered.shape))
+    basis, _ = np.linalg.qr(
+        centered @ rng.normal(size=(centered.shape[1], sketch_size))
+    )
+    for _ in range(power_iterations):
+        basis, _ = np.linalg.qr(centered @ (centered.T @ basis))
+    _, _, components = np.linalg.svd(basis.T @ centered, full_matrices=False)
+    return components[:n_components]
+
+
+def _centered_chunks_from(
+    dataframe: pd.DataFrame, columns: List[str], means: np.ndarray, chunk_rows: int
+) -> Iterator[np.ndarray]:
+    # Blocos de linhas em float64, centrados e com a média no lugar dos
+    # ausentes; só um bloco existe por vez, nunca o conjunto inteiro
+    for start in range(0, len(dataframe), chunk_rows):
+        stop = min(start + chunk_rows, len(dataframe))
+        # Coluna a coluna, direto no bloco: sem cópias intermediárias
+        chunk = np.empty((stop - start, len(columns)))
+        for position, column in enumerate(columns):
+            chunk[:, position] = (
+                dataframe[column]
+                .iloc[start:stop]
+                .to_numpy(dtype=np.float64, na_value=np.nan)
+            )
+        chunk -= means
+        chunk[np.isnan(chunk)] = 0.0
+        yield chunk
+
+
+def _incremental_pca_components_from(
+    chunks: Iterator[np.ndarray], column_count: int, n_components: int
+) -> np.ndarray:
+    # Acumula a matriz de covariância bloco a bloco; a memória extra fica em
+    # O(colunas²) mais um bloco, independentemente da quantidade de linhas
+    covariance = np.zeros((column_count, column_count))
+    for chunk in chunks:
+        covariance += chunk.T @ chunk
+    eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+    order = np.argsort(eigenvalues)[::-1][:n_components]
+    return eigenvectors[:, order].T
+
+
+def _select_columns_by_variance_from(
+    block: np.ndarray, columns: List[str], n_components: int
+) -> List[str]:
+    # Variância após min-max, para não favorecer colunas de escala maior
+    span = block.max(axis=0) - block.min(axis=0)
+    span[span == 0] = 1
+    variances = (block / span).var(axis=0)
+    kept = np.sort(np.argsort(variances)[::-1][:n_components])
+    return [columns[position] for position in kept]
+
+
+def _select_columns_by_correlation_from(
+    block: np.ndarray,
+    columns: List[str],
+    n_components: int,
+    threshold: float = CORRELATION_SELECTION_THRESHOLD,
+) -> List[str]:
+    span = block.max(axis=0) - block.min(axis=0)
+    span[span == 0] = 1
+    by_variance = np.argsort((block / span).var(axis=0))[::-1]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        correlation = np.nan_to_num(np.abs(np.corrcoef(block, rowvar=False)))
+
+    # Percorre as colunas da mais variável para a menos variável e descarta
+    # as redundantes com alguma já escolhida
+    kept: List[int] = []
+    for position in by_variance:
+        if len(kept) == n_components:
+            break
+        if not kept or correlation[position, kept].max() < threshold:
+            kept.append(position)
+    # Completa com as mais variáveis se o limiar descartou demais
+    for position in by_variance:
+        if len(kept) == n_components:
+            break
+        if position not in kept:
+            kept.append(position)
+    return [columns[position] for position in sorted(kept)]
+
+
+@instrumented("transform")
+def reduce_dimensions_from(
+    dataframe: pd.DataFrame,
+    n_components: int,
+    method: str = "correlation",
+    seed: int = 0,
+    chunk_rows: int = PCA_CHUNK_ROWS,
+) -> pd.DataFrame:
+    """Reduz as colunas numéricas para n_components eixos.
+
+    "pca" projeta nos componentes principais (SVD aleatória ou, acima de
+    chunk_rows registros, covariância acumulada lendo blocos de linhas do
+    DataFrame, sem uma cópia float64 inteira); "variance" e "correlation"
+    mantêm colunas originais. Colunas não numéricas (como o rótulo) são
+    preservadas.
+    """
+    numeric_columns = numeric_columns_from(dataframe)
+    n_components = max(min(n_components, len(numeric_columns)), 1)
+    if n_components >= len(numeric_columns):
+        return dataframe
+    if method not in ("variance", "correlation", "pca"):
+        raise ValueError(f"Método de redução desconhecido: {method}")
+
+    if method == "pca" and len(dataframe) > chunk_rows:
+        means = np.nan_to_num(
+            np.array(
+                [dataframe[column].mean() for column in numeric_columns],
+                dtype=np.float64,
+            )
+        )
+        components = _incremental_pca_components_from(
+            _centered_chunks_from(dataframe, numeric_columns, means, chunk_rows),
+            len(numeric_columns),
+            n_components,
+        )
+        # Segunda passada para projetar, também bloco a bloco
+        projected = np.empty((len(dataframe), n_components))
+        for position, chunk in enumerate(
+            _centered_chunks_from(dataframe, numeric_columns, means, chunk_rows)
+        ):
+            start = position * chunk_rows
+            projected[start : start + len(chunk)] = chunk @ components.T
+        return _with_principal_components_from(dataframe, numeric_columns, projected)
+
+    block, means = _mean_filled_block_from(dataframe, numeric_columns)
+    if method in ("variance", "correlation"):
+        select = (
+            _select_columns_by_variance_from
+            if method == "variance"
+            else _select_columns_by_correlation_from
+        )
+        kept_columns = select(block, numeric_columns, n_components)
+        dropped_columns = [c for c in numeric_columns if c not in kept_columns]
+        return dataframe.drop(columns=dropped_columns)
+
+    components = _randomized_pca_components_from(block - means, n_components, seed)
+    return _with_principal_components_from(
+        dataframe, numeric_columns, (block - means) @ components.T
+    )
+
+
+def _with_principal_components_from(
+    dataframe: pd.DataFrame, numeric_columns: List[str], projected: np.ndarray
+) -> pd.DataFrame:
+    # As colunas numéricas dão lugar a PC1..PCn; o rótulo e o texto ficam
+    reduced = dataframe.drop(columns=numeric_columns)
+    for position in range(projected.shape[1]):
+        reduced[f"PC{position + 1}"] = projected[:, position]
+    return reduced
+
+
+@dataclass
+class YearColumns:
+    # Parte comum do nome (ex.: "F" em F1961) e colunas ordenadas por ano
+    prefix: str
+    columns: List[str]
+    years: np.ndarray
+
+
+def detect_year_columns_from(columns: List[str]) -> Optional[YearColumns]:
+    """Maior grupo de colunas com o mesmo prefixo terminadas em um ano."""
+    groups: Dict[str, List[Tuple[int, str]]] = {}
+    for column in columns:
+        match = YEAR_COLUMN_PATTERN.match(str(column))
+        if match:
+            groups.setdefault(match["prefix"], []).append((int(match["year"]), column))
+    if not groups:
+        return None
+    prefix, found = max(groups.items(), key=lambda item: len(item[1]))
+    if len(found) < MIN_YEAR_COLUMNS:
+        return None
+    found.sort()
+    return YearColumns(
+        prefix,
+        [column for _, column in found],
+        np.array([year for year, _ in found], dtype=np.int64),
+    )
+
+
+def detect_year_column_from(dataframe: pd.DataFrame) -> Optional[str]:
+    """Coluna inteira chamada "Year" ou "Ano" (formato longo)."""
+    for column in dataframe.columns:
+        if str(column).strip().lower() in YEAR_COLUMN_NAMES and (
+            pd.api.types.is_integer_dtype(dataframe[column])
+        ):
+            return column
+    return None
+
+
+@instrumented("transform")
+def wide_to_long_from(
+    dataframe: pd.DataFrame,
+    year_columns: Optional[YearColumns] = None,
+    year_column: str = "Year",
+) -> pd.DataFrame:
+    """Uma coluna por ano vira uma linha por (registro, ano), como o pd.melt.
+
+    As colunas restantes são repetidas com um único take; os valores saem do
+    bloco de anos por ravel na ordem das colunas, que não copia quando o bloco
+    já está em ordem de coluna (o layout do pandas).
+    """
+    year_columns = year_columns or detect_year_columns_from(list(dataframe.columns))
+    if year_columns is None:
+        raise ValueError("Nenhuma coluna de ano encontrada")
+    # Prefixos de uma letra (F1961) não dizem nada sobre o valor
+    value_column = year_columns.prefix.strip(" _-")
+    if len(value_column) <= 1:
+        value_column = "Value"
+    year_set = set(year_columns.columns)
+    id_columns = [column for column in dataframe.columns if column not in year_set]
+    if year_column in id_columns or value_column in id_columns:
+        raise ValueError(f"Coluna já existe: {year_column} ou {value_column}")
+
+    row_count = len(dataframe)
+    values = dataframe[year_columns.columns].to_numpy().ravel(order="F")
+    positions = np.tile(np.arange(row_count), len(year_columns.columns))
+    long = dataframe[id_columns].take(positions).reset_index(drop=True)
+    long[year_column] = np.repeat(year_columns.years, row_count)
+    long[value_column] = values
+    return long
+
+
+@instrumented("transform")
+def long_to_wide_from(
+    dataframe: pd.DataFrame,
+    year_column: Optional[str] = None,
+    index_columns: Optional[List[str]] = None,
+    value_columns: Optional[List[str]] = None,
+) -> pd.DataFrame:
+    """Uma linha por (registro, ano) vira uma coluna "<valor> <ano>" por ano.
+
+    As linhas são identificadas pelas colunas de texto; registros e anos são
+    fatorados uma vez e cada valor é espalhado numa matriz pré-alocada
+    (registros x anos). Pares repetidos ficam com o último valor.
+    """
+    year_column = year_column or detect_year_column_from(dataframe)
+    if year_column is None:
+        raise ValueError("Nenhuma coluna de ano encontrada")
+    if index_columns is None:
+        index_columns = dataframe.select_dtypes(
+            include=["object", "category"]
+        ).columns.tolist()
+    if not index_columns:
+        raise ValueError("Nenhuma coluna de texto para identificar os registros")
+    if value_columns is None:
+        value_columns = [
+            column
+            for column in dataframe.select_dtypes(include="number").columns
+            if column != year_column and column not in index_columns
+        ]
+
+    group_codes, groups = pd.factorize(
+        pd.MultiIndex.from_frame(dataframe[index_columns]), sort=True
+    )
+    year_codes, years = pd.factorize(dataframe[year_column], sort=True)
+    valid = (group_codes >= 0) & (year_codes >= 0)
+    group_codes, year_codes = group_codes[valid], year_codes[valid]
+
+    wide = {
+        column: groups.get_level_values(position)
+        for position, column in enumerate(index_columns)
+    }
+    shape = (len(groups), len(years))
+    for value_column in value_columns:
+        values = dataframe[value_column].to_numpy()[valid]
+        dtype = values.dtype if values.dtype.kind == "f" else np.float64
+        # Ordem de coluna: cada ano sai como um vetor contíguo
+        grid = np.full(shape, np.nan, dtype=dtype, order="F")
+        grid[group_codes, year_codes] = values
+        for position, year in enumerate(years):
+            wide[f"{value_column} {year}"] = grid[:, position]
+    return pd.DataFrame(wide)
+
+
+@instrumented("transform")
+def reshape_years_from(dataframe: pd.DataFrame) -> pd.DataFrame:
+    """Alterna entre uma coluna por ano e uma linha por ano."""
+    year_columns = detect_year_columns_from(list(dataframe.columns))
+    if year_columns is not None:
+        return wide_to_long_from(dataframe, year_columns)
+    return long_to_wide_from(dataframe)
+
+
+def _average_ranks_from(block: np.ndarray) -> np.ndarray:
+    # Postos por coluna (empates recebem o posto médio) com um argsort 2D.
+    # Só as colunas com empates precisam dos limites de cada grupo, que saem
+    # de acumulados ao longo das linhas; a ordem entre empatados não importa
+    block = np.asfortranarray(block)
+    row_count = len(block)
+    order = np.argsort(block, axis=0)
+    ordered = np.sort(block, axis=0)
+    sorted_ranks = np.empty(block.shape, order="F")
+    sorted_ranks[:] = np.arange(1, row_count + 1)[:, None]
+    tied = np.flatnonzero((ordered[1:] == ordered[:-1]).any(axis=0))
+    if len(tied):
+        values = ordered[:, tied]
+        positions = np.arange(row_count)[:, None]
+        starts_group = np.ones(values.shape, dtype=bool)
+        starts_group[1:] = values[1:] != values[:-1]
+        ends_group = np.ones(values.shape, dtype=bool)
+        ends_group[:-1] = starts_group[1:]
+        start = np.maximum.accumulate(np.where(starts_group, positions, 0), axis=0)
+        end = np.minimum.accumulate(
+            np.where(ends_group, positions, row_count)[::-1], axis=0
+        )[::-1]
+        sorted_ranks[:, tied] = (start + end) / 2 + 1
+    ranks = np.empty(block.shape, order="F")
+    np.put_along_axis(ranks, order, sorted_ranks, axis=0)
+    ranks[np.isnan(block)] = np.nan
+    return ranks
+
+
+@instrumented("transform")
+def correlation_matrix_from(
+    dataframe: pd.DataFrame,
+    columns: List[str],
+    method: str = "pearson",
+    sample_rows: Optional[int] = CORRELATION_SAMPLE_ROWS,
+    seed: int = DEFAULT_SEED,
+    chunk_rows: int = PCA_CHUNK_ROWS,
+) -> np.ndarray:
+    """Matriz de correlação ("pearson" ou "spearman") entre as colunas.
+
+    Acima de sample_rows linhas usa uma amostra. Spearman é Pearson sobre os
+    postos (empates com posto médio). A matriz sai de X'X acumulado em blocos
+    de linhas, uma multiplicação por bloco, sem laços por par de colunas.
+    """
+    if sample_rows is not None and len(dataframe) > sample_rows:
+        positions = np.random.default_rng(seed).choice(
+            len(dataframe), sample_rows, replace=False
+        )
+        dataframe = dataframe.iloc[np.sort(positions)]
+    if method not in ("pearson", "spearman"):
+        raise ValueError(f"Método de correlação desconhecido: {method}")
+    if method == "spearman":
+        dataframe = pd.DataFrame(
+            _average_ranks_from(dataframe[columns].to_numpy(dtype=np.float64)),
+            columns=columns,
+        )
+
+    block, means = _mean_filled_block_from(dataframe, columns)
+    gram = np.zeros((len(columns), len(columns)))
+    for start in range(0, len(block), chunk_rows):
+        centered = block[start : start + chunk_rows] - means
+        gram += centered.T @ centered
+    scale = np.sqrt(np.diag(gram))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        correlation = gram / np.outer(scale, scale)
+    # Colunas constantes não se correlacionam com nada
+    correlation = np.clip(np.nan_to_num(correlation), -1.0, 1.0)
+    np.fill_diagonal(correlation, 1.0)
+    return correlation
+
+
+def _two_opt_path_from(
+    path: np.ndarray, similarity: np.ndarray, rounds: int
+) -> np.ndarray:
+    # Inverte o trecho path[i+1..j] que mais aumenta a soma das similaridades
+    # entre vizinhos; todos os ganhos de uma rodada saem de uma vez da matriz
+    # reordenada. O caminho é aberto: depois do último eixo não há vizinho.
+    count = len(path)
+    for _ in range(rounds):
+        ordered = similarity[np.ix_(path, path)]
+        adjacent = np.append(np.diagonal(ordered, 1), 0.0)
+        following = np.zeros((count, count))
+        following[:-1, :-1] = ordered[1:, 1:]
+        gain = np.triu(ordered + following - adjacent[:, None] - adjacent[None, :], 2)
+        i, j = np.unravel_index(np.argmax(gain), gain.shape)
+        if gain[i, j] <= 1e-12:
+            break
+        path[i + 1 : j + 1] = path[i + 1 : j + 1][::-1].copy()
+    return path
+
+
+@instrumented("transform")
+def order_axes_by_correlation_from(
+    correlation: np.ndarray, rounds: int = AXIS_ORDER_TWO_OPT_ROUNDS
+) -> List[int]:
+    """Ordem dos eixos que deixa lado a lado as colunas mais correlacionadas.
+
+    Caminho guloso (começa pelo par com maior |correlação| e cresce pela
+    ponta com o vizinho mais forte), melhorado com 2-opt, como num caixeiro
+    viajante sobre |correlação|.
+    """
+    count = len(correlation)
+    if count < 3:
+        return list(range(count))
+    similarity = np.abs(correlation)
+    available = similarity.copy()
+    np.fill_diagonal(available, -np.inf)
+    first, second = np.unravel_index(np.argmax(available), available.shape)
+    available[:, [first, second]] = -np.inf
+    path = [int(first), int(second)]
+    for _ in range(count - 2):
+        left = int(np.argmax(available[path[0]]))
+        right = int(np.argmax(available[path[-1]]))
+        if available[path[0], left] > available[path[-1], right]:
+            path.insert(0, left)
+            available[:, left] = -np.inf
+        else:
+            path.append(right)
+            available[:, right] = -np.inf
+    return _two_opt_path_from(np.array(path), similarity, rounds).tolist()
+
+
+def _extreme_row_positions_from(block: np.ndarray, per_column: int) -> np.ndarray:
+    # Posições das linhas com os menores e maiores valores de cada eixo, para
+    # que os outliers continuem visíveis depois da amostragem
+    filled_low = np.where(np.isnan(block), np.inf, block)
+    filled_high = np.where(np.isnan(block), -np.inf, block)
+    k = min(per_column, len(block))
+    lowest = np.argpartition(filled_low, k - 1, axis=0)[:k]
+    highest = np.argpartition(-filled_high, k - 1, axis=0)[:k]
+    return np.unique(np.concatenate([lowest.ravel(), highest.ravel()]))
+
+
+def _sample_for_parallel_coordinates_from(
+    dataframe: pd.DataFrame,
+    numeric_columns: List[str],
+    label_column: Optional[str],
+    size: int,
+    seed: int = DEFAULT_SEED,
+) -> pd.DataFrame:
+    labels = dataframe[label_column] if label_column in dataframe else None
+    sampled = stratified_row_positions_from(labels, len(dataframe), size, seed)
+    extremes = _extreme_row_positions_from(
+        dataframe[numeric_columns].to_numpy(dtype=np.float64),
+        PARALLEL_COORDINATES_EXTREMES_PER_AXIS,
+    )
+    return dataframe.iloc[np.union1d(sampled, extremes)]
+
+
+def _encode_png_from(rgba: np.ndarray) -> str:
+    # Codificador PNG mínimo (RGBA 8 bits), sem depender do matplotlib
+    height, width, _ = rgba.shape
+    raw = np.zeros((height, width * 4 + 1), dtype=np.uint8)
+    raw[:, 1:] = rgba.reshape(height, width * 4)
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        checksum = zlib.crc32(tag + data) & 0xFFFFFFFF
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", checksum)
+
+    png = (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(raw.tobytes(), 6))
+        + chunk(b"IEND", b"")
+    )
+    return f"data:image/png;base64,{base64.b64encode(png).decode('utf-8')}"
+
+
+@instrumented("render")
+def line_density_image_from(
+    dataframe: pd.DataFrame,
+    numeric_columns: List[str],
+    bins: int = DENSITY_BINS,
+    pair_width: int = DENSITY_PAIR_WIDTH,
+    height: int = DENSITY_HEIGHT,
+) -> str:
+    """Imagem da densidade de linhas entre cada par de eixos vizinhos."""
+    block = dataframe[numeric_columns].to_numpy(dtype=np.float64)
+    minimum = np.nanmin(block, axis=0)
+    span = np.nanmax(block, axis=0) - minimum
+    span[span == 0] = 1
+    binned = np.floor((block - minimum) / span * (bins - 1) + 0.5)
+
+    pair_count = len(numeric_columns) - 1
+    image = np.zeros((height, pair_count * pair_width))
+    steps = np.linspace(0, 1, pair_width)
+    columns = np.arange(pair_width)
+    for pair in range(pair_count):
+        left, right = binned[:, pair], binned[:, pair + 1]
+        valid = ~(np.isnan(left) | np.isnan(right))
+        # Histograma 2D: quantas linhas ligam a faixa a do eixo esquerdo à
+        # faixa b do eixo direito
+        counts = np.bincount(
+            left[valid].astype(np.int64) * bins + right[valid].astype(np.int64),
+            minlength=bins * bins,
+        )
+        pairs = np.flatnonzero(counts)
+        start, end = np.divmod(pairs, bins)
+        # Rasteriza cada segmento ponderado pela quantidade de linhas
+        y = start[:, np.newaxis] + (end - start)[:, np.newaxis] * steps
+        rows = (height - 1) - np.rint(y / (bins - 1) * (height - 1)).astype(np.int64)
+        pixels = rows * (pair_count * pair_width) + pair * pair_width + columns
+        image += np.bincount(
+            pixels.ravel(),
+            weights=np.repeat(counts[pairs], pair_width),
+            minlength=image.size,
+        ).reshape(image.shape)
+
+    # Escala logarítmica para que regiões esparsas (outliers) não sumam
+    intensity = np.log1p(image) / max(np.log1p(image.max()), 1e-12)
+    rgba = np.empty(image.shape + (4,), dtype=np.uint8)
+    rgba[..., :3] = (31, 119, 180)
+    rgba[..., 3] = np.rint(intensity * 255).astype(np.uint8)
+    return _encode_png_from(rgba)
+
+
+def _original_value_ticks_for(
+    low: float, high: float, column: str, normalization: NormalizationTransform
+) -> dict:
+    # Marcas no espaço normalizado, rotuladas com os valores originais
+    tick_values = np.linspace(low, high, PARALLEL_COORDINATES_TICKS)
+    tick_text = [f"{value:.4g}" for value in normalization.inverse(column, tick_values)]
+    return {"tickvals": tick_values.tolist(), "ticktext": tick_text}
+
+
+def dimension_axis_for(
+    column: str,
+    extent: Tuple[float, float],
+    axis_range: Optional[Tuple[float, float]] = None,
+    normalization: Optional[NormalizationTransform] = None,
+) -> dict:
+    """Intervalo e marcas de um eixo do gráfico de coordenadas paralelas.
+
+    Serve tanto para montar a figura quanto para os Patch que só mudam os
+    eixos de uma figura já enviada. `extent` é o (mín, máx) da coluna.
+    """
+    axis: dict = {"range": list(axis_range) if axis_range is not None else None}
+    # Eixos normalizados mostram os valores originais (transformação inversa)
+    if (
+        normalization is not None
+        and column in normalization.columns
+        and not np.isnan(extent).any()
+    ):
+        low, high = axis_range or extent
+        axis.update(_original_value_ticks_for(low, high, column, normalization))
+    return axis
+
+
+def label_codes_from(labels: pd.Series) -> Tuple[np.ndarray, List[str]]:
+    """Códigos inteiros compactos e categorias da coluna rótulo.
+
+    Numa coluna category (como o passo do rótulo grava) os códigos já
+    existem e não há nada a calcular; texto comum é fatorado uma vez.
+    Valores ausentes viram uma categoria própria, no fim.
+    """
+    if isinstance(labels.dtype, pd.CategoricalDtype):
+        codes = labels.cat.codes.to_numpy()
+        categories = [str(category) for category in labels.cat.categories]
+    else:
+        codes, uniques = pd.factorize(labels, sort=True)
+        categories = [str(category) for category in uniques]
+    if (codes < 0).any():
+        codes = np.where(codes < 0, len(categories), codes)
+        categories.append(MISSING_LABEL)
+    # int8/int16 conforme a quantidade de categorias
+    return codes.astype(np.min_scalar_type(max(len(categories) - 1, 0))), categories
+
+
+def discrete_colorscale_for(count: int) -> List[List]:
+    # Escala em degraus: cada código inteiro ocupa uma faixa de cor própria
+    count = max(count, 1)
+    palette = (
+        px.colors.qualitative.Plotly if count <= 10 else px.colors.qualitative.Alphabet
+    )
+    scale: List[List] = []
+    for position in range(count):
+        color = palette[position % len(palette)]
+        scale += [[position / count, color], [(position + 1) / count, color]]
+    return scale
+
+
+def _parallel_coordinates_rows_from(
+    dataframe: pd.DataFrame,
+    label_column: Optional[str] = None,
+    axis_order: Optional[List[str]] = None,
+) -> Tuple[pd.DataFrame, List[str], Optional[str]]:
+    """Linhas desenhadas, eixos na ordem pedida e a imagem de densidade."""
+    # Identifica as colunas numéricas do DataFrame (sem as booleanas)
+    numeric_columns = numeric_columns_from(dataframe)
+    if axis_order:
+        # Eixos na ordem pedida (ex.: por correlação); os demais vão ao fim
+        ordered = [column for column in axis_order if column in numeric_columns]
+        numeric_columns = ordered + [
+            column for column in numeric_columns if column not in ordered
+        ]
+    if not numeric_columns:
+        return dataframe, numeric_columns, None
+
+    # Escolhe a estratégia de desenho pela quantidade de linhas
+    row_count = len(dataframe)
+    density_image = None
+    if row_count > PARALLEL_COORDINATES_MAX_SAMPLED_ROWS:
+        # Densidade calculada no servidor e uma amostra pequena por cima, para
+        # manter o brushing interativo
+        density_image = line_density_image_from(dataframe, numeric_columns)
+        dataframe = _sample_for_parallel_coordinates_from(
+            dataframe, numeric_columns, label_column, PARALLEL_COORDINATES_OVERLAY_ROWS
+        )
+    elif row_count > PARALLEL_COORDINATES_MAX_FULL_ROWS:
+        dataframe = _sample_for_parallel_coordinates_from(
+            dataframe, numeric_columns, label_column, PARALLEL_COORDINATES_SAMPLE_ROWS
+        )
+    return dataframe, numeric_columns, density_image
+
+
+def _density_layout_image_for(density_image: str) -> dict:
+    # Imagem de densidade atrás das linhas, ocupando a área do gráfico
+    return {
+        "source": density_image,
+        "x": 0,
+        "y": 1,
+        "xref": "paper",
+        "yref": "paper",
+        "sizex": 1,
+        "sizey": 1,
+        "sizing": "stretch",
+        "xanchor": "left",
+        "yanchor": "top",
+        "layer": "below",
+    }
+
+
+@instrumented("render")
+def plot_parallel_coordinates_from(
+    dataframe: pd.DataFrame,
+    label_column: Optional[str] = None,
+    normalization: Optional[NormalizationTransform] = None,
+    axis_ranges: Optional[Dict[str, Tuple[float, float]]] = None,
+    axis_order: Optional[List[str]] = None,
+) -> go.Figure:
+    # axis_ranges limita eixos (ex.: aos quantis 1%-99%, sem os outliers)
+    axis_ranges = axis_ranges or {}
+    dataframe, numeric_columns, density_image = _parallel_coordinates_rows_from(
+        dataframe, label_column, axis_order
+    )
+    # Sem colunas numéricas não há eixos a desenhar
+    if not numeric_columns:
+        return go.Figure()
+
+    # Os eixos levam o nome da coluna; nomes que não são texto (anos vindos
+    # do formato largo, por exemplo) viram texto para o Plotly
+    labels = {col: str(col) for col in numeric_columns}
     # print(f"tamanho lista de rótulos: {len(labels)}")
-    # Gera o gráfico de coordenadas paralelas
-    fig = px.parallel_coordinates(
-        dataframe,
-        dimensions=numeric_columns,  # Colunas numéricas
-        color=dataframe[numeric_columns[1]],  # Cor com base na primeira coluna numérica
-        labels=labels  # Rótulos definidos pelos valores da primeira coluna
+    if label_column in dataframe:
+        # Cor pela coluna rótulo: vão para a figura só os códigos inteiros,
+        # com uma escala discreta e a legenda código -> categoria
+        codes, categories = label_codes_from(dataframe[label_column])
+        fig = px.parallel_coordinates(
+            dataframe,
+            dimensions=numeric_columns,  # Colunas numéricas
+            color=codes,
+            labels=labels,  # Rótulos dos eixos: nomes das colunas
+            color_continuous_scale=discrete_colorscale_for(len(categories)),
+            range_color=[-0.5, len(categories) - 0.5],
+        )
+        show_ticks = len(categories) <= LABEL_COLORBAR_MAX_TICKS
+        fig.update_layout(
+            coloraxis_colorbar={
+                "title": str(label_column),
+                "tickvals": list(range(len(categories))) if show_ticks else [],
+                "ticktext": categories if show_ticks else [],
+            }
+        )
+    else:
+        # Gera o gráfico de coordenadas paralelas
+        fig = px.parallel_coordinates(
+            dataframe,
+            dimensions=numeric_columns,  # Colunas numéricas
+            color=dataframe[numeric_columns[0]],  # Cor pela primeira coluna numérica
+            labels=labels,  # Rótulos dos eixos: nomes das colunas
+        )
+
+    for column, dimension in zip(numeric_columns, fig.data[0].dimensions):
+        dimension.update(
+            dimension_axis_for(
+                column,
+                (dataframe[column].min(), dataframe[column].max()),
+                axis_ranges.get(column),
+                normalization,
+            )
+        )
+
+    if density_image is not None:
+        fig.add_layout_image(_density_layout_image_for(density_image))
+
+    return fig
+
+
+@functools.lru_cache(maxsize=None)
+def _template_for(name: str) -> dict:
+    # Montar o template validado custa mais que o gráfico todo; uma vez por nome
+    return pio.templates[name].to_plotly_json()
+
+
+@instrumented("render")
+def parallel_coordinates_figure_dict_from(
+    dataframe: pd.DataFrame,
+    label_column: Optional[str] = None,
+    normalization: Optional[NormalizationTransform] = None,
+    axis_ranges: Optional[Dict[str, Tuple[float, float]]] = None,
+    axis_order: Optional[List[str]] = None,
+) -> dict:
+    """A mesma figura de plot_parallel_coordinates_from, montada como dicionário.
+
+    O traço parcoords sai direto dos arrays NumPy de cada coluna, sem a cópia
+    do DataFrame e a validação de cada propriedade feitas pelo Plotly
+    Express e pelo go.Figure.
+    """
+    axis_ranges = axis_ranges or {}
+    dataframe, numeric_columns, density_image = _parallel_coordinates_rows_from(
+        dataframe, label_column, axis_order
     )
+    if not numeric_columns:
+        return go.Figure().to_dict()
+
+    dimensions = []
+    for column in numeric_columns:
+        series = dataframe[column]
+        # Inteiros continuam inteiros (JSON menor); tipos anuláveis do pandas
+        # viram float com NaN no lugar dos ausentes
+        values = np.ascontiguousarray(
+            series.to_numpy()
+            if isinstance(series.dtype, np.dtype)
+            else series.to_numpy(dtype=np.float64, na_value=np.nan)
+        )
+        # fmin/fmax ignoram NaN sem o custo das reduções do pandas por coluna
+        extent = (
+            (np.fmin.reduce(values), np.fmax.reduce(values))
+            if values.size
+            else (np.nan, np.nan)
+        )
+        axis = dimension_axis_for(
+            column, extent, axis_ranges.get(column), normalization
+        )
+        dimensions.append(
+            {
+                "label": str(column),
+                "values": values,
+                **{key: value for key, value in axis.items() if value is not None},
+            }
+        )
+
+    if label_column in dataframe:
+        # Cor pela coluna rótulo, como em plot_parallel_coordinates_from
+        color, categories = label_codes_from(dataframe[label_column])
+        show_ticks = len(categories) <= LABEL_COLORBAR_MAX_TICKS
+        coloraxis = {
+            "colorbar": {
+                "title": {"text": str(label_column)},
+                "tickvals": list(range(len(categories))) if show_ticks else [],
+                "ticktext": categories if show_ticks else [],
+            },
+            "colorscale": discrete_colorscale_for(len(categories)),
+            "cmin": -0.5,
+            "cmax": len(categories) - 0.5,
+        }
+    else:
+        color = dimensions[0]["values"]
+        template = _template_for(pio.templates.default)
+        coloraxis = {
+            "colorbar": {"title": {"text": str(numeric_columns[0])}},
+            "colorscale": copy.deepcopy(
+                template["layout"].get("colorscale", {}).get("sequential")
+            ),
+        }
 
+    layout = {
+        "template": copy.deepcopy(_template_for(pio.templates.default)),
+        "coloraxis": coloraxis,
+        "legend": {"tracegroupgap": 0},
+        "margin": {"t": 60},
+    }
+    if density_image is not None:
+        layout["images"] = [_density_layout_image_for(density_image)]
+
+    return {
+        "data": [
+            {
+                "type": "parcoords",
+                "name": "",
+                "dimensions": dimensions,
+                "domain": {"x": [0.0, 1.0], "y": [0.0, 1.0]},
+                "line": {"color": color, "coloraxis": "coloraxis"},
+            }
+        ],
+        "layout": layout,
+    }
+
+
+@instrumented("render")
+def plot_axis_histograms_from(
+    histograms: Dict[str, Tuple[np.ndarray, np.ndarray]],
+    axis_ranges: Optional[Dict[str, Tuple[float, float]]] = None,
+) -> go.Figure:
+    """Um histograma por eixo, na mesma ordem do gráfico de coordenadas.
+
+    Recebe limites e contagens já calculados (dos sketches do perfil), então
+    não lê os dados. As barras são horizontais para acompanhar os eixos.
+    """
+    axis_ranges = axis_ranges or {}
+    fig = make_subplots(rows=1, cols=max(len(histograms), 1), shared_yaxes=False)
+    for position, (column, (edges, counts)) in enumerate(histograms.items()):
+        fig.add_trace(
+            go.Bar(
+                x=counts,
+                y=(edges[:-1] + edges[1:]) / 2,
+                width=np.diff(edges),
+                orientation="h",
+                name=str(column),
+                marker_color="#636efa",
+            ),
+            row=1,
+            col=position + 1,
+        )
+        fig.update_xaxes(
+            showticklabels=False, title_text=str(column), row=1, col=position + 1
+        )
+        if column in axis_ranges:
+            fig.update_yaxes(range=list(axis_ranges[column]), row=1, col=position + 1)
+    fig.update_layout(
+        showlegend=False, bargap=0, margin={"l": 40, "r": 20, "t": 10, "b": 40}
+    )
     return fig
\ No newline at end of file
@@ -0,0 +1,195 @@
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Iterator, List, Optional, Tuple
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+DEFAULT_MEMORY_BUDGET_BYTES: int = 512 * 1024 * 1024
+DEFAULT_TTL_SECONDS: float = 60 * 60
+DEFAULT_BATCH_ROWS: int = 100_000
+
+
+class DatasetNotFoundError(KeyError):
+    pass
+
+
+class DatasetStore:
+    """Armazena os datasets de cada sessão como tabelas Arrow/Parquet.
+
+    Toda versão é gravada em Parquet num diretório compartilhado, para que
+    qualquer worker do gunicorn consiga lê-la. A memória funciona como cache
+    LRU com TTL e limite de bytes; ao estourar o limite, as tabelas menos
+    usadas são descartadas da memória e voltam a ser lidas do disco.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        memory_budget_bytes: int = DEFAULT_MEMORY_BUDGET_BYTES,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+    ) -> None:
+        self.directory: str = directory or os.environ.get(
+            "DASHBOARD_STORE_DIR",
+            os.path.join(tempfile.gettempdir(), "visualizador-datasets"),
+        )
+        self.memory_budget_bytes: int = memory_budget_bytes
+        self.ttl_seconds: float = ttl_seconds
+        # dataset_id -> (tabela, último acesso)
+        self._tables: "OrderedDict[str, Tuple[pa.Table, float]]" = OrderedDict()
+        self._memory_bytes: int = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def new_session_id() -> str:
+        return uuid.uuid4().hex
+
+    def _path_for(self, dataset_id: str) -> str:
+        return os.path.join(self.directory, f"{dataset_id}.parquet")
+
+    def put(self, session_id: str, dataframe: pd.DataFrame) -> str:
+        """Grava uma nova versão do dataset da sessão e retorna o seu id."""
+        dataset_id = f"{session_id}_{uuid.uuid4().hex}"
+        table = pa.Table.from_pandas(dataframe, preserve_index=False)
+
+        # Grava num arquivo temporário e renomeia, para que outro worker
+        # nunca leia um Parquet incompleto
+        path = self._path_for(dataset_id)
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        pq.write_table(table, temporary_path)
+        os.replace(temporary_path, path)
+
+        with self._lock:
+            self._remember(dataset_id, table)
+        self.expire()
+        return dataset_id
+
+    def get_table(
+        self, dataset_id: str, columns: Optional[List[str]] = None
+    ) -> pa.Table:
+        with self._lock:
+            cached = self._tables.get(dataset_id)
+            if cached is not None:
+                self._tables.move_to_end(dataset_id)
+                self._tables[dataset_id] = (cached[0], time.monotonic())
+                table = cached[0]
+        if cached is not None:
+            self._touch(dataset_id)
+            return table.select(columns) if columns is not None else table
+
+        path = self._path_for(dataset_id)
+        if not os.path.exists(path):
+            raise DatasetNotFoundError(dataset_id)
+        self._touch(dataset_id)
+        table = pq.read_table(path, columns=columns, memory_map=True)
+        if columns is None:
+            with self._lock:
+                self._remember(dataset_id, table)
+        return table
+
+    def get(self, dataset_id: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        return self.get_table(dataset_id, columns).to_pandas()
+
+    def iter_batches(
+        self,
+        dataset_id: str,
+        batch_rows: int = DEFAULT_BATCH_ROWS,
+        columns: Optional[List[str]] = None,
+    ) -> Iterator[pd.DataFrame]:
+        """Percorre a versão em blocos, sem montar a tabela inteira.
+
+        O índice de cada bloco é a posição global das linhas na versão.
+        """
+        with self._lock:
+            cached = self._tables.get(dataset_id)
+        if cached is not None:
+            table = cached[0].select(columns) if columns is not None else cached[0]
+            batches = table.to_batches(max_chunksize=batch_rows)
+        else:
+            path = self._path_for(dataset_id)
+            if not os.path.exists(path):
+                raise DatasetNotFoundError(dataset_id)
+            batches = pq.ParquetFile(path, memory_map=True).iter_batches(
+                batch_size=batch_rows, columns=columns
+            )
+        self._touch(dataset_id)
+
+        start = 0
+        for batch in batches:
+            chunk = batch.to_pandas()
+            chunk.index = pd.RangeIndex(start, start + len(chunk))
+            start += len(chunk)
+            yield chunk
+
+    def schema(self, dataset_id: str) -> pa.Schema:
+        with self._lock:
+            cached = self._tables.get(dataset_id)
+            if cached is not None:
+                return cached[0].schema
+        path = self._path_for(dataset_id)
+        if not os.path.exists(path):
+            raise DatasetNotFoundError(dataset_id)
+        return pq.read_schema(path)
+
+    def drop_session(self, session_id: str) -> None:
+        prefix = f"{session_id}_"
+        with self._lock:
+            for dataset_id in [key for key in self._tables if key.startswith(prefix)]:
+                self._forget(dataset_id)
+        for filename in os.listdir(self.directory):
+            if filename.startswith(prefix):
+                self._remove_file(os.path.join(self.directory, filename))
+
+    def expire(self) -> None:
+        """Remove da memória e do disco as versões sem acesso há mais que o TTL."""
+        now = time.monotonic()
+        with self._lock:
+            expired = [
+                dataset_id
+                for dataset_id, (_, last_access) in self._tables.items()
+                if now - last_access > self.ttl_seconds
+            ]
+            for dataset_id in expired:
+                self._forget(dataset_id)
+
+        deadline = time.time() - self.ttl_seconds
+        for filename in os.listdir(self.directory):
+            path = os.path.join(self.directory, filename)
+            try:
+                if os.path.getmtime(path) < deadline:
+                    self._remove_file(path)
+            except OSError:
+                # Outro worker pode ter removido o arquivo antes
+                continue
+
+    def _remember(self, dataset_id: str, table: pa.Table) -> None:
+        if dataset_id in self._tables:
+            self._forget(dataset_id)
+        self._tables[dataset_id] = (table, time.monotonic())
+        self._memory_bytes += table.nbytes
+        # Descarta as tabelas menos usadas; elas continuam no disco
+        while self._memory_bytes > self.memory_budget_bytes and len(self._tables) > 1:
+            self._forget(next(iter(self._tables)))
+
+    def _forget(self, dataset_id: str) -> None:
+        table, _ = self._tables.pop(dataset_id)
+        self._memory_bytes -= table.nbytes
+
+    def _touch(self, dataset_id: str) -> None:
+        # Mantém a versão viva no disco enquanto estiver em uso
+        try:
+            os.utime(self._path_for(dataset_id))
+        except OSError:
+            pass
+
+    @staticmethod
+    def _remove_file(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
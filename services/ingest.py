@@ -0,0 +1,338 @@
+import base64
+import binascii
+import io
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+from services.instrumentation import instrumented
+
+# Tamanho (em caracteres base64) de cada bloco decodificado; múltiplo de 4
+DECODE_CHUNK_CHARS: int = 4 * 1024 * 1024
+# Quantidade de linhas lidas por vez pelo parser de CSV
+PARSE_CHUNK_ROWS: int = 100_000
+# Linhas usadas para inferir os tipos das colunas antes da leitura em blocos
+SNIFF_ROWS: int = 1_000
+# Colunas de texto com até esta fração de valores distintos viram category
+CATEGORY_MAX_UNIQUE_FRACTION: float = 0.5
+
+ProgressCallback = Callable[[str, float], None]
+
+# Formatos reconhecidos pelos primeiros bytes do arquivo
+CSV_FORMATS = ("csv", "gzip", "zstd")
+_MAGIC_BYTES = (
+    (b"PAR1", "parquet"),
+    (b"ARROW1", "feather"),
+    (b"FEA1", "feather"),
+    (b"\xff\xff\xff\xff", "arrow_stream"),
+    (b"\x1f\x8b", "gzip"),
+    (b"\x28\xb5\x2f\xfd", "zstd"),
+)
+
+
+def _report(
+    progress_callback: Optional[ProgressCallback], stage: str, fraction: float
+) -> None:
+    if progress_callback is not None:
+        progress_callback(stage, min(max(fraction, 0.0), 1.0))
+
+
+@instrumented("decode")
+def decode_base64_contents_from(
+    encoded_contents: str,
+    chunk_chars: int = DECODE_CHUNK_CHARS,
+    progress_callback: Optional[ProgressCallback] = None,
+) -> io.BytesIO:
+    """Decodifica o conteúdo do dcc.Upload em blocos para um buffer de bytes."""
+    # O conteúdo vem como "data:<mime>;base64,<dados>"; evita o split() que
+    # copiaria a string inteira
+    start = encoded_contents.find(",") + 1
+    total = len(encoded_contents) - start
+    chunk_chars -= chunk_chars % 4
+
+    buffer = io.BytesIO()
+    for offset in range(start, len(encoded_contents), chunk_chars):
+        try:
+            buffer.write(
+                base64.b64decode(encoded_contents[offset : offset + chunk_chars])
+            )
+        except binascii.Error as error:
+            raise ValueError("Conteúdo base64 inválido.") from error
+        _report(progress_callback, "decode", (offset - start + chunk_chars) / total)
+
+    buffer.seek(0)
+    return buffer
+
+
+def _sniff_dtypes_from(buffer: io.BytesIO, sniff_rows: int) -> Dict[str, Any]:
+    # Fixa apenas float e object: inteiros podem virar float se um bloco
+    # posterior tiver NaN, então ficam por conta do concat
+    sample = pd.read_csv(buffer, nrows=sniff_rows, encoding="utf-8")
+    buffer.seek(0)
+    return {
+        column: dtype
+        for column, dtype in sample.dtypes.items()
+        if pd.api.types.is_float_dtype(dtype) or pd.api.types.is_object_dtype(dtype)
+    }
+
+
+def iter_csv_chunks_from(
+    buffer: io.BytesIO,
+    dtype: Optional[Dict[str, Any]] = None,
+    chunk_rows: int = PARSE_CHUNK_ROWS,
+    progress_callback: Optional[ProgressCallback] = None,
+) -> Iterator[pd.DataFrame]:
+    """Percorre o CSV em blocos de linhas, sem juntar tudo num DataFrame."""
+    total = len(buffer.getbuffer())
+    with pd.read_csv(
+        buffer, chunksize=chunk_rows, dtype=dtype, encoding="utf-8"
+    ) as reader:
+        for chunk in reader:
+            yield chunk
+            _report(progress_callback, "parse", buffer.tell() / total)
+
+
+def _line_count_from(buffer: io.BytesIO, chunk_bytes: int = DECODE_CHUNK_CHARS) -> int:
+    # Em geral, limite superior para as linhas de dados: quebras entre aspas e
+    # linhas em branco também contam (arquivos só com "\r" não)
+    data = np.frombuffer(buffer.getbuffer(), dtype=np.uint8)
+    line_breaks = sum(
+        int(np.count_nonzero(data[start : start + chunk_bytes] == ord("\n")))
+        for start in range(0, len(data), chunk_bytes)
+    )
+    ends_without_break = len(data) > 0 and data[-1] != ord("\n")
+    return line_breaks + int(ends_without_break)
+
+
+def _merged_dtype_for(current: np.dtype, incoming: np.dtype) -> np.dtype:
+    # Mesma promoção do pd.concat: inteiro com float vira float; qualquer outra
+    # mistura (inclusive bool com número) vira object
+    if current == incoming:
+        return current
+    if current.kind in "iuf" and incoming.kind in "iuf":
+        return np.result_type(current, incoming)
+    return np.dtype(object)
+
+
+def _read_csv_chunks_from(
+    buffer: io.BytesIO,
+    dtype: Optional[Dict[str, Any]],
+    chunk_rows: int,
+    progress_callback: Optional[ProgressCallback],
+) -> pd.DataFrame:
+    """Preenche colunas pré-alocadas bloco a bloco, sem o pico do pd.concat.
+
+    A capacidade vem da contagem de quebras de linha do buffer; uma coluna só
+    é realocada se um bloco posterior pedir um dtype mais largo ou se a
+    contagem ficar curta.
+    """
+    capacity = _line_count_from(buffer)
+    arrays: Dict[str, np.ndarray] = {}
+    columns: Optional[pd.Index] = None
+    rows = 0
+    for chunk in iter_csv_chunks_from(buffer, dtype, chunk_rows, progress_callback):
+        stop = rows + len(chunk)
+        resized = stop > capacity
+        capacity = max(capacity, 2 * stop if resized else 0)
+        for column in chunk.columns if columns is None else columns:
+            values = chunk[column].to_numpy()
+            current = arrays.get(column)
+            if current is None:
+                arrays[column] = np.empty(capacity, dtype=values.dtype)
+            else:
+                merged_dtype = _merged_dtype_for(current.dtype, values.dtype)
+                if resized or merged_dtype != current.dtype:
+                    arrays[column] = np.empty(capacity, dtype=merged_dtype)
+                    arrays[column][:rows] = current[:rows]
+            arrays[column][rows:stop] = values
+        columns = chunk.columns
+        rows = stop
+
+    if columns is None:
+        return pd.DataFrame()
+    # copy=False mantém um bloco por coluna, sem juntar cópias por dtype
+    return pd.DataFrame(
+        {column: arrays[column][:rows] for column in columns},
+        columns=columns,
+        copy=False,
+    )
+
+
+def read_csv_buffer_from(
+    buffer: io.BytesIO,
+    dtype: Optional[Dict[str, Any]] = None,
+    engine: Optional[str] = None,
+    chunk_rows: int = PARSE_CHUNK_ROWS,
+    progress_callback: Optional[ProgressCallback] = None,
+) -> pd.DataFrame:
+    """Lê um CSV já decodificado, em blocos de linhas com tipos explícitos."""
+    if engine == "pyarrow":
+        # O leitor do pyarrow é paralelo e não suporta chunksize
+        dataframe = pd.read_csv(buffer, dtype=dtype, engine="pyarrow")
+        _report(progress_callback, "parse", 1.0)
+        return dataframe
+
+    explicit_dtype = dtype
+    if explicit_dtype is None:
+        explicit_dtype = _sniff_dtypes_from(buffer, SNIFF_ROWS)
+
+    try:
+        return _read_csv_chunks_from(
+            buffer, explicit_dtype, chunk_rows, progress_callback
+        )
+    except ValueError:
+        if dtype is not None:
+            raise
+        # Os tipos inferidos na amostra não valem para o arquivo todo
+        buffer.seek(0)
+        return _read_csv_chunks_from(buffer, None, chunk_rows, progress_callback)
+
+
+def detect_format_from(buffer: io.BytesIO) -> str:
+    """Identifica o formato pelos primeiros bytes; o padrão é CSV."""
+    header = bytes(buffer.getbuffer()[:8])
+    for magic, file_format in _MAGIC_BYTES:
+        if header.startswith(magic):
+            return file_format
+    return "csv"
+
+
+def read_columnar_from(
+    source: Union[str, io.BytesIO],
+    file_format: str,
+    columns: Optional[List[str]] = None,
+) -> pd.DataFrame:
+    """Lê Parquet ou Feather/Arrow IPC lendo só as colunas pedidas.
+
+    Um caminho é aberto com memory map; um buffer em memória é lido sem
+    cópia pelo pa.BufferReader.
+    """
+    memory_map = isinstance(source, str)
+    if not memory_map:
+        source = pa.BufferReader(source.getbuffer())
+    if file_format == "parquet":
+        table = pq.read_table(source, columns=columns, memory_map=memory_map)
+    elif file_format == "feather":
+        table = feather.read_table(source, columns=columns, memory_map=memory_map)
+    elif file_format == "arrow_stream":
+        if memory_map:
+            source = pa.memory_map(source)
+        table = pa.ipc.open_stream(source).read_all()
+        if columns is not None:
+            table = table.select(columns)
+    else:
+        raise ValueError(f"Formato colunar desconhecido: {file_format}")
+    return table.to_pandas()
+
+
+def decompress_buffer_from(buffer: io.BytesIO, compression: str) -> io.BytesIO:
+    """Descomprime um CSV em gzip ou zstd para um novo buffer."""
+    with pa.input_stream(
+        pa.BufferReader(buffer.getbuffer()), compression=compression
+    ) as stream:
+        return io.BytesIO(stream.read())
+
+
+@instrumented("parse")
+def read_upload_buffer_from(
+    buffer: io.BytesIO,
+    file_format: str,
+    columns: Optional[List[str]] = None,
+    progress_callback: Optional[ProgressCallback] = None,
+) -> pd.DataFrame:
+    """Lê o arquivo enviado no formato detectado por detect_format_from."""
+    if file_format not in CSV_FORMATS:
+        dataframe = read_columnar_from(buffer, file_format, columns)
+        _report(progress_callback, "parse", 1.0)
+        return dataframe
+
+    if file_format != "csv":
+        buffer = decompress_buffer_from(buffer, file_format)
+    try:
+        dataframe = read_csv_buffer_from(buffer, progress_callback=progress_callback)
+    finally:
+        buffer.close()
+    return dataframe if columns is None else dataframe[columns]
+
+
+def load_upload_from(
+    encoded_contents: str,
+    columns: Optional[List[str]] = None,
+    progress_callback: Optional[ProgressCallback] = None,
+) -> pd.DataFrame:
+    """Carrega CSV (puro, gzip ou zstd), Parquet ou Feather do dcc.Upload."""
+    buffer = decode_base64_contents_from(
+        encoded_contents, progress_callback=progress_callback
+    )
+    try:
+        return read_upload_buffer_from(
+            buffer, detect_format_from(buffer), columns, progress_callback
+        )
+    finally:
+        buffer.close()
+
+
+@dataclass
+class MemoryReport:
+    bytes_before: int
+    bytes_after: int
+    # coluna -> novo dtype
+    converted: Dict[str, str] = field(default_factory=dict)
+
+    def describe(self) -> str:
+        return (
+            f"Memória: {self.bytes_before / 2**20:.1f} MB → "
+            f"{self.bytes_after / 2**20:.1f} MB "
+            f"({len(self.converted)} colunas compactadas)"
+        )
+
+
+@instrumented("transform")
+def optimize_dtypes_from(
+    dataframe: pd.DataFrame,
+    downcast_floats: bool = True,
+    category_max_unique_fraction: float = CATEGORY_MAX_UNIQUE_FRACTION,
+) -> Tuple[pd.DataFrame, MemoryReport]:
+    """Reduz a memória do DataFrame recém-carregado.
+
+    Inteiros vão para o menor inteiro com sinal que comporta os valores,
+    floats para float32 só quando todos os valores voltam idênticos (os dados
+    do usuário não mudam), e colunas de texto com poucos valores distintos
+    viram category.
+    """
+    bytes_before = int(dataframe.memory_usage(deep=True).sum())
+    columns: Dict[str, pd.Series] = {}
+    converted: Dict[str, str] = {}
+    for column in dataframe.columns:
+        series = dataframe[column]
+        optimized = series
+        if pd.api.types.is_bool_dtype(series):
+            pass
+        elif pd.api.types.is_integer_dtype(series):
+            optimized = pd.to_numeric(series, downcast="integer")
+        elif (
+            downcast_floats
+            and series.dtype == np.float64
+            and series.astype(np.float32).astype(np.float64).equals(series)
+        ):
+            optimized = series.astype(np.float32)
+        elif pd.api.types.is_object_dtype(series) and len(series):
+            distinct = series.nunique(dropna=True)
+            if distinct <= category_max_unique_fraction * len(series):
+                optimized = series.astype("category")
+        if optimized.dtype != series.dtype:
+            converted[column] = str(optimized.dtype)
+        columns[column] = optimized
+
+    if not converted:
+        return dataframe, MemoryReport(bytes_before, bytes_before)
+    # Sem copy=False: o construtor junta as colunas em blocos por dtype
+    optimized_dataframe = pd.DataFrame(columns, index=dataframe.index)
+    return optimized_dataframe, MemoryReport(
+        bytes_before,
+        int(optimized_dataframe.memory_usage(deep=True).sum()),
+        converted,
+    )
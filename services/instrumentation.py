@@ -0,0 +1,453 @@
+import cProfile
+import functools
+import io
+import os
+import pstats
+import threading
+import time
+import warnings
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    from pyinstrument import Profiler as PyinstrumentProfiler
+except ImportError:
+    PyinstrumentProfiler = None
+
+# Limites (segundos) das faixas do histograma de tempos, como no Prometheus
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.001,
+    0.005,
+    0.01,
+    0.05,
+    0.1,
+    0.5,
+    1.0,
+    5.0,
+    10.0,
+    30.0,
+)
+METRICS_PATH: str = "/metrics"
+PROFILE_PATH: str = "/debug/profile"
+DASH_UPDATE_PATH: str = "/_dash-update-component"
+PROFILE_REPORT_LINES: int = 40
+DEBUG_PANEL_REFRESH_MS: int = 2_000
+DEBUG_PANEL_ROWS: int = 15
+
+
+@dataclass
+class TimingSeries:
+    count: int = 0
+    total: float = 0.0
+    maximum: float = 0.0
+    # Contagem por faixa de LATENCY_BUCKETS (a última é +Inf)
+    buckets: List[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.maximum = max(self.maximum, seconds)
+        for position, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.buckets[position] += 1
+                return
+        self.buckets[-1] += 1
+
+    def merge(self, other: "TimingSeries") -> None:
+        self.count += other.count
+        self.total += other.total
+        self.maximum = max(self.maximum, other.maximum)
+        self.buckets = [
+            mine + theirs for mine, theirs in zip(self.buckets, other.buckets)
+        ]
+
+
+@dataclass
+class PayloadSeries:
+    count: int = 0
+    total: int = 0
+    maximum: int = 0
+    last: int = 0
+
+    def observe(self, size: int) -> None:
+        self.count += 1
+        self.total += size
+        self.maximum = max(self.maximum, size)
+        self.last = size
+
+    def merge(self, other: "PayloadSeries") -> None:
+        self.count += other.count
+        self.total += other.total
+        self.maximum = max(self.maximum, other.maximum)
+        self.last = other.last or self.last
+
+
+class MetricsRegistry:
+    """Tempos por (operação, etapa) e bytes por (callback, direção).
+
+    As tarefas do pool rodam em outros processos; cada uma devolve o que
+    registrou (drain) e o processo do servidor soma ao seu (merge).
+    """
+
+    def __init__(self) -> None:
+        self.timings: Dict[Tuple[str, str], TimingSeries] = {}
+        self.payloads: Dict[Tuple[str, str], PayloadSeries] = {}
+        self._lock = threading.Lock()
+
+    def observe_time(self, operation: str, phase: str, seconds: float) -> None:
+        with self._lock:
+            self.timings.setdefault((operation, phase), TimingSeries()).observe(seconds)
+
+    def observe_bytes(self, callback: str, direction: str, size: int) -> None:
+        with self._lock:
+            self.payloads.setdefault((callback, direction), PayloadSeries()).observe(
+                size
+            )
+
+    def drain(self) -> "MetricsRegistry":
+        """Devolve o que foi registrado até agora e recomeça do zero."""
+        drained = MetricsRegistry()
+        with self._lock:
+            drained.timings, self.timings = self.timings, {}
+            drained.payloads, self.payloads = self.payloads, {}
+        return drained
+
+    def merge(self, other: "MetricsRegistry") -> None:
+        with self._lock:
+            for key, series in other.timings.items():
+                self.timings.setdefault(key, TimingSeries()).merge(series)
+            for key, series in other.payloads.items():
+                self.payloads.setdefault(key, PayloadSeries()).merge(series)
+
+    def __getstate__(self) -> dict:
+        # O lock não atravessa processos; só as séries
+        return {"timings": self.timings, "payloads": self.payloads}
+
+    def __setstate__(self, state: dict) -> None:
+        self.timings = state["timings"]
+        self.payloads = state["payloads"]
+        self._lock = threading.Lock()
+
+    def snapshot(
+        self,
+    ) -> Tuple[
+        Dict[Tuple[str, str], TimingSeries], Dict[Tuple[str, str], PayloadSeries]
+    ]:
+        with self._lock:
+            return dict(self.timings), dict(self.payloads)
+
+
+# Registro do processo; cada worker do gunicorn tem o seu
+METRICS = MetricsRegistry()
+
+
+@contextmanager
+def timed(
+    operation: str, phase: str, registry: MetricsRegistry = METRICS
+) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        registry.observe_time(operation, phase, time.perf_counter() - start)
+
+
+def instrumented(phase: str) -> Callable[[Callable], Callable]:
+    """Registra o tempo de cada chamada da função na etapa indicada.
+
+    Etapas usadas: "decode", "parse", "transform", "render" e "serialize".
+    """
+
+    def decorate(function: Callable) -> Callable:
+        @functools.wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                METRICS.observe_time(
+                    function.__name__, phase, time.perf_counter() - start
+                )
+
+        return wrapper
+
+    return decorate
+
+
+def _label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text_from(registry: MetricsRegistry = METRICS) -> str:
+    """Métricas no formato de texto do Prometheus (versão 0.0.4)."""
+    timings, payloads = registry.snapshot()
+    lines = [
+        "# HELP dashboard_operation_seconds Tempo por operação e etapa.",
+        "# TYPE dashboard_operation_seconds histogram",
+    ]
+    for (operation, phase), series in sorted(timings.items()):
+        labels = f'operation="{_label_value(operation)}",phase="{_label_value(phase)}"'
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, series.buckets):
+            cumulative += count
+            lines.append(
+                f'dashboard_operation_seconds_bucket{{{labels},le="{bound}"}} '
+                f"{cumulative}"
+            )
+        lines.append(
+            f'dashboard_operation_seconds_bucket{{{labels},le="+Inf"}} {series.count}'
+        )
+        lines.append(f"dashboard_operation_seconds_sum{{{labels}}} {series.total}")
+        lines.append(f"dashboard_operation_seconds_count{{{labels}}} {series.count}")
+    lines += [
+        "# HELP dashboard_operation_max_seconds Maior tempo por operação e etapa.",
+        "# TYPE dashboard_operation_max_seconds gauge",
+    ]
+    for (operation, phase), series in sorted(timings.items()):
+        lines.append(
+            f'dashboard_operation_max_seconds{{operation="{_label_value(operation)}",'
+            f'phase="{_label_value(phase)}"}} {series.maximum}'
+        )
+    lines += [
+        "# HELP dashboard_payload_bytes Bytes de requisição e resposta por callback.",
+        "# TYPE dashboard_payload_bytes summary",
+    ]
+    for (callback, direction), series in sorted(payloads.items()):
+        labels = (
+            f'callback="{_label_value(callback)}",'
+            f'direction="{_label_value(direction)}"'
+        )
+        lines.append(f"dashboard_payload_bytes_sum{{{labels}}} {series.total}")
+        lines.append(f"dashboard_payload_bytes_count{{{labels}}} {series.count}")
+    return "\n".join(lines) + "\n"
+
+
+def timing_rows_from(
+    registry: MetricsRegistry = METRICS, limit: int = DEBUG_PANEL_ROWS
+) -> List[Dict[str, Any]]:
+    """Operações com mais tempo acumulado, para o painel de depuração."""
+    timings, _ = registry.snapshot()
+    ordered = sorted(timings.items(), key=lambda item: item[1].total, reverse=True)
+    return [
+        {
+            "operação": operation,
+            "etapa": phase,
+            "chamadas": series.count,
+            "total (s)": round(series.total, 3),
+            "média (ms)": round(1000 * series.total / series.count, 1),
+            "máx. (ms)": round(1000 * series.maximum, 1),
+        }
+        for (operation, phase), series in ordered[:limit]
+    ]
+
+
+def payload_rows_from(registry: MetricsRegistry = METRICS) -> List[Dict[str, Any]]:
+    _, payloads = registry.snapshot()
+    return [
+        {
+            "callback": callback,
+            "direção": direction,
+            "chamadas": series.count,
+            "último (KB)": round(series.last / 1024, 1),
+            "média (KB)": round(series.total / series.count / 1024, 1),
+            "máx. (KB)": round(series.maximum / 1024, 1),
+        }
+        for (callback, direction), series in sorted(payloads.items())
+    ]
+
+
+class RequestProfiler:
+    """Perfil (cProfile ou pyinstrument) de uma única requisição.
+
+    arm(callback) prepara a captura da próxima requisição do callback pedido
+    (ou de qualquer uma, sem nome); o relatório fica guardado em `report`.
+    Só uma requisição é perfilada por vez: o cProfile admite um perfil ativo
+    por processo e sessões sobrepostas do pyinstrument se corrompem, então as
+    requisições concorrentes seguem sem perfil.
+    """
+
+    def __init__(self) -> None:
+        self.armed: Optional[str] = None
+        self.report: str = ""
+        self._active: bool = False
+        self._lock = threading.Lock()
+
+    def arm(self, callback: str = "") -> None:
+        with self._lock:
+            self.armed = callback
+
+    def start(self, callback: Optional[str]) -> Optional[Any]:
+        # A primeira requisição que casa com o pedido toma a vaga
+        with self._lock:
+            if (
+                self._active
+                or self.armed is None
+                or (self.armed and self.armed != callback)
+            ):
+                return None
+            self.armed = None
+            self._active = True
+        if PyinstrumentProfiler is not None:
+            profiler = PyinstrumentProfiler()
+            profiler.start()
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        return profiler
+
+    def finish(self, profiler: Any, callback: Optional[str]) -> None:
+        try:
+            if PyinstrumentProfiler is not None:
+                profiler.stop()
+                report = profiler.output_text()
+            else:
+                profiler.disable()
+                output = io.StringIO()
+                pstats.Stats(profiler, stream=output).sort_stats(
+                    "cumulative"
+                ).print_stats(PROFILE_REPORT_LINES)
+                report = f"callback: {callback}\n{output.getvalue()}"
+        finally:
+            with self._lock:
+                self._active = False
+        with self._lock:
+            self.report = report
+
+
+def _callback_name_for(app: Any, payload: Optional[dict]) -> Optional[str]:
+    # Nome da função registrada para a saída pedida na requisição do Dash
+    entry = app.callback_map.get((payload or {}).get("output"))
+    return getattr(entry.get("callback"), "__name__", None) if entry else None
+
+
+def _unmeasured_callbacks_from(app: Any) -> List[str]:
+    # O Dash guarda o próprio wrapper; functools.wraps liga-o ao nosso
+    return [
+        getattr(entry["callback"], "__name__", output)
+        for output, entry in app.callback_map.items()
+        if "callback" in entry
+        and not getattr(
+            getattr(entry["callback"], "__wrapped__", None), "instrumented", False
+        )
+    ]
+
+
+def instrument_dash_app(
+    app: Any,
+    registry: MetricsRegistry = METRICS,
+    profiling: Optional[bool] = None,
+) -> Optional[RequestProfiler]:
+    """Mede todo callback do app e publica as métricas em /metrics.
+
+    Cada callback é registrado com o tempo do corpo (etapa "callback"); o
+    restante da requisição, em que o Dash serializa a resposta, entra como
+    "serialize", junto com os bytes de entrada e saída. Com profiling (ou
+    DASHBOARD_PROFILING=1), GET /debug/profile?callback=<nome> perfila a
+    próxima requisição desse callback e GET /debug/profile/last mostra o
+    relatório.
+
+    A medição entra trocando `app.callback`, então só vale para os callbacks
+    registrados depois desta chamada; os registrados antes (inclusive por
+    `dash.callback`) não são medidos e são listados num aviso na primeira
+    requisição.
+    """
+    import flask
+
+    if profiling is None:
+        profiling = os.environ.get("DASHBOARD_PROFILING") == "1"
+    profiler = RequestProfiler() if profiling else None
+    register_callback = app.callback
+
+    def callback(*args: Any, **kwargs: Any) -> Callable:
+        decorator = register_callback(*args, **kwargs)
+
+        def wrap(function: Callable) -> Any:
+            @functools.wraps(function)
+            def timed_callback(*callback_args: Any, **callback_kwargs: Any) -> Any:
+                flask.g.callback_name = function.__name__
+                start = time.perf_counter()
+                try:
+                    return function(*callback_args, **callback_kwargs)
+                finally:
+                    flask.g.callback_seconds = time.perf_counter() - start
+                    registry.observe_time(
+                        function.__name__, "callback", flask.g.callback_seconds
+                    )
+
+            timed_callback.instrumented = True
+            return decorator(timed_callback)
+
+        return wrap
+
+    app.callback = callback
+    server = app.server
+    checked_registration = threading.Event()
+
+    @server.before_request
+    def start_request_timer() -> None:
+        if not flask.request.path.endswith(DASH_UPDATE_PATH):
+            return
+        if not checked_registration.is_set():
+            checked_registration.set()
+            unmeasured = _unmeasured_callbacks_from(app)
+            if unmeasured:
+                warnings.warn(
+                    "Callbacks registrados antes de instrument_dash_app não são "
+                    f"medidos: {', '.join(sorted(unmeasured))}",
+                    stacklevel=2,
+                )
+        flask.g.request_start = time.perf_counter()
+        if profiler is not None and profiler.armed is not None:
+            flask.g.profiler = profiler.start(
+                _callback_name_for(app, flask.request.get_json(silent=True))
+            )
+
+    @server.after_request
+    def record_request(response: flask.Response) -> flask.Response:
+        callback_name = flask.g.get("callback_name")
+        if "request_start" not in flask.g:
+            return response
+        if flask.g.get("profiler") is not None:
+            profiler.finish(flask.g.profiler, callback_name)
+        if callback_name is None:
+            return response
+        elapsed = time.perf_counter() - flask.g.request_start
+        registry.observe_time(callback_name, "request", elapsed)
+        registry.observe_time(
+            callback_name, "serialize", max(elapsed - flask.g.callback_seconds, 0.0)
+        )
+        registry.observe_bytes(
+            callback_name, "request", flask.request.content_length or 0
+        )
+        if not response.direct_passthrough:
+            registry.observe_bytes(callback_name, "response", len(response.get_data()))
+        return response
+
+    @server.route(METRICS_PATH)
+    def metrics() -> flask.Response:
+        return flask.Response(
+            prometheus_text_from(registry),
+            mimetype="text/plain; version=0.0.4",
+        )
+
+    if profiler is not None:
+
+        @server.route(PROFILE_PATH)
+        def arm_profiler() -> flask.Response:
+            callback_name = flask.request.args.get("callback", "")
+            profiler.arm(callback_name)
+            return flask.Response(
+                f"Próxima requisição de {callback_name or 'qualquer callback'} "
+                "será perfilada.\n",
+                mimetype="text/plain",
+            )
+
+        @server.route(f"{PROFILE_PATH}/last")
+        def last_profile() -> flask.Response:
+            return flask.Response(
+                profiler.report or "Nenhum perfil capturado.\n",
+                mimetype="text/plain",
+            )
+
+    return profiler
@@ -0,0 +1,353 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import pickle
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import pandas as pd
+import plotly.graph_objects as go
+from services.column_profile import DatasetProfile, profile_dataset_from
+from services.data_tools import (
+    MissingDataSummary,
+    NormalizationTransform,
+    PARALLEL_COORDINATES_SAMPLE_SPEC,
+    parallel_coordinates_figure_dict_from,
+    summarize_missing_data_from,
+)
+from services.dataset_store import DatasetStore
+from services.ingest import (
+    CSV_FORMATS,
+    MemoryReport,
+    decode_base64_contents_from,
+    detect_format_from,
+    optimize_dtypes_from,
+    read_upload_buffer_from,
+)
+from services.instrumentation import METRICS, MetricsRegistry, timed
+from services.payloads import typed_figure_from
+
+# Intervalo do dcc.Interval que consulta o andamento das tarefas
+JOB_POLL_INTERVAL_MS: int = 500
+DEFAULT_JOB_WORKERS: int = 2
+# Arquivos de tarefas que ninguém consultou (aba fechada, worker reiniciado)
+# são apagados depois desse tempo
+JOB_FILES_TTL_SECONDS: float = 60 * 60
+
+
+class JobCancelledError(Exception):
+    pass
+
+
+@dataclass
+class JobStatus:
+    # "running", "done", "failed", "cancelled" ou "missing"
+    state: str
+    stage: str = ""
+    progress: float = 0.0
+    result: Any = None
+    error: Optional[str] = None
+
+
+class JobReporter:
+    """Callback de progresso usado dentro do processo da tarefa.
+
+    Grava o andamento num arquivo JSON pequeno e, a cada chamada, verifica se
+    a tarefa foi cancelada (existência do arquivo .cancel).
+    """
+
+    def __init__(self, directory: str, job_id: str) -> None:
+        self.progress_path: str = os.path.join(directory, f"{job_id}.json")
+        self.cancel_path: str = os.path.join(directory, f"{job_id}.cancel")
+        self._last: Tuple[str, int] = ("", -1)
+
+    def __call__(self, stage: str, fraction: float) -> None:
+        if os.path.exists(self.cancel_path):
+            raise JobCancelledError(stage)
+        # Só grava quando muda a etapa ou o percentual inteiro
+        current = (stage, int(fraction * 100))
+        if current == self._last:
+            return
+        self._last = current
+        temporary_path = f"{self.progress_path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as progress_file:
+            json.dump({"stage": stage, "progress": fraction}, progress_file)
+        os.replace(temporary_path, self.progress_path)
+
+
+def _write_outcome(directory: str, job_id: str, status: JobStatus) -> None:
+    # Estado final gravado no diretório compartilhado: qualquer worker do
+    # gunicorn responde à consulta, não só o que criou a tarefa
+    outcome_path = os.path.join(directory, f"{job_id}.outcome")
+    with open(f"{outcome_path}.tmp", "wb") as outcome_file:
+        pickle.dump(status, outcome_file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(f"{outcome_path}.tmp", outcome_path)
+
+
+def _run_job(
+    function: Callable[..., Any], directory: str, job_id: str, args: Tuple[Any, ...]
+) -> Tuple[Any, MetricsRegistry]:
+    reporter = JobReporter(directory, job_id)
+    try:
+        # Tarefa cancelada enquanto ainda estava na fila do pool
+        reporter("start", 0.0)
+        with timed(function.__name__, "job"):
+            result = function(reporter, *args)
+    except JobCancelledError:
+        _write_outcome(directory, job_id, JobStatus("cancelled"))
+        raise
+    except Exception as error:
+        _write_outcome(directory, job_id, JobStatus("failed", error=str(error)))
+        raise
+    _write_outcome(directory, job_id, JobStatus("done", progress=1.0, result=result))
+    # As métricas registradas neste processo voltam junto com o resultado
+    return result, METRICS.drain()
+
+
+class JobManager:
+    """Executa operações pesadas num pool de processos, fora das requisições.
+
+    Cada tarefa recebe um id; o andamento é lido dos arquivos gravados pelo
+    JobReporter e o estado final (com o resultado) fica num arquivo .outcome
+    até ser consumido. Com os arquivos no diretório compartilhado, um worker
+    que não criou a tarefa também responde à consulta. Não depende de
+    Redis/Celery: a fila é a do próprio ProcessPoolExecutor.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_workers: Optional[int] = None,
+        ttl_seconds: float = JOB_FILES_TTL_SECONDS,
+    ) -> None:
+        self.directory: str = os.path.join(directory, "jobs")
+        self.ttl_seconds: float = ttl_seconds
+        self.max_workers: int = max_workers or int(
+            os.environ.get("DASHBOARD_JOB_WORKERS", DEFAULT_JOB_WORKERS)
+        )
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._futures: Dict[str, Future] = {}
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _executor_for(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # "spawn" evita herdar por fork as threads do servidor
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def submit(self, function: Callable[..., Any], *args: Any) -> str:
+        """Agenda function(reporter, *args) e devolve o id da tarefa."""
+        self.expire()
+        job_id = uuid.uuid4().hex
+        future = self._executor_for().submit(
+            _run_job, function, self.directory, job_id, args
+        )
+        # Marca a tarefa como existente antes de ela sair da fila
+        JobReporter(self.directory, job_id)("queued", 0.0)
+        future.add_done_callback(lambda done: self._remove_files(job_id, done))
+        future.add_done_callback(self._collect_metrics)
+        self._futures[job_id] = future
+        return job_id
+
+    def status(self, job_id: str) -> JobStatus:
+        future = self._futures.get(job_id)
+        if future is None:
+            # Tarefa criada por outro worker: só os arquivos dizem onde ela está
+            return self._stored_status_for(job_id)
+        if future.cancelled():
+            return JobStatus("cancelled")
+        if future.done():
+            error = future.exception()
+            if isinstance(error, JobCancelledError):
+                return JobStatus("cancelled")
+            if error is not None:
+                return JobStatus("failed", error=str(error))
+            result, _ = future.result()
+            return JobStatus("done", progress=1.0, result=result)
+        return self._progress_status_for(job_id) or JobStatus("running")
+
+    def cancel(self, job_id: str) -> None:
+        """Cancela a tarefa: se ainda estiver na fila, nem começa."""
+        future = self._futures.pop(job_id, None)
+        if future is not None and (future.cancel() or future.done()):
+            # Já terminada: o resultado gravado não será mais lido
+            self.forget(job_id)
+            return
+        if future is None and self._progress_status_for(job_id) is None:
+            self.forget(job_id)
+            return
+        # Já em execução (ou criada por outro worker): a tarefa para na
+        # próxima chamada de progresso
+        open(os.path.join(self.directory, f"{job_id}.cancel"), "w").close()
+
+    def forget(self, job_id: str) -> None:
+        """Descarta a tarefa já consumida, inclusive o resultado gravado."""
+        self._futures.pop(job_id, None)
+        for suffix in (".outcome", ".outcome.tmp"):
+            try:
+                os.remove(os.path.join(self.directory, f"{job_id}{suffix}"))
+            except OSError:
+                pass
+
+    def _progress_status_for(self, job_id: str) -> Optional[JobStatus]:
+        try:
+            with open(
+                os.path.join(self.directory, f"{job_id}.json"), encoding="utf-8"
+            ) as progress_file:
+                progress = json.load(progress_file)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            return JobStatus("running")
+        return JobStatus("running", progress["stage"], progress["progress"])
+
+    def _outcome_status_for(self, job_id: str) -> Optional[JobStatus]:
+        try:
+            with open(
+                os.path.join(self.directory, f"{job_id}.outcome"), "rb"
+            ) as outcome_file:
+                return pickle.load(outcome_file)
+        except FileNotFoundError:
+            return None
+
+    def _stored_status_for(self, job_id: str) -> JobStatus:
+        # O estado final é gravado antes de o arquivo de andamento ser
+        # removido; a segunda leitura cobre a tarefa que termina entre as duas
+        return (
+            self._outcome_status_for(job_id)
+            or self._progress_status_for(job_id)
+            or self._outcome_status_for(job_id)
+            or JobStatus("missing", error="tarefa não encontrada")
+        )
+
+    @staticmethod
+    def _collect_metrics(future: Future) -> None:
+        if not future.cancelled() and future.exception() is None:
+            METRICS.merge(future.result()[1])
+
+    def _remove_files(self, job_id: str, future: Future) -> None:
+        suffixes = [".json", ".json.tmp", ".cancel"]
+        # Tarefa cancelada não é mais consultada: o estado final também sai
+        if future.cancelled() or isinstance(future.exception(), JobCancelledError):
+            suffixes += [".outcome", ".outcome.tmp"]
+        for suffix in suffixes:
+            try:
+                os.remove(os.path.join(self.directory, f"{job_id}{suffix}"))
+            except OSError:
+                pass
+
+    def expire(self) -> None:
+        """Apaga os arquivos de tarefas sem mudança há mais que o TTL."""
+        deadline = time.time() - self.ttl_seconds
+        for filename in os.listdir(self.directory):
+            path = os.path.join(self.directory, filename)
+            try:
+                if os.path.getmtime(path) < deadline:
+                    os.remove(path)
+            except OSError:
+                # Outro worker pode ter removido o arquivo antes
+                continue
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Tarefas executadas no pool; rodam em outro processo, então recebem o
+# diretório do DatasetStore em vez da instância
+
+
+def load_upload_job(
+    report: JobReporter,
+    store_directory: str,
+    session_id: str,
+    encoded_contents: str,
+    optimize_memory: bool = False,
+) -> Tuple[str, MissingDataSummary, DatasetProfile, Optional[MemoryReport]]:
+    """Lê o arquivo enviado, grava a versão base e resume as colunas."""
+    buffer = decode_base64_contents_from(encoded_contents, progress_callback=report)
+    file_format = detect_format_from(buffer)
+    dataframe = read_upload_buffer_from(buffer, file_format, progress_callback=report)
+
+    first_column = dataframe.columns[0]
+
+    # Só o CSV traz o índice como primeira coluna; Parquet e Feather guardam
+    # o índice nos metadados
+    if file_format in CSV_FORMATS and pd.api.types.is_numeric_dtype(
+        dataframe[first_column]
+    ):
+
+        dataframe = dataframe.drop(columns=[first_column])
+    memory_report = None
+    if optimize_memory:
+        report("optimize", 0.0)
+        dataframe, memory_report = optimize_dtypes_from(dataframe)
+    report("store", 0.0)
+    dataset_id = DatasetStore(store_directory).put(session_id, dataframe)
+    report("missing", 0.0)
+    summary = summarize_missing_data_from(dataframe)
+    report("profile", 0.0)
+    return dataset_id, summary, profile_dataset_from(dataframe), memory_report
+
+
+def parallel_coordinates_key_for(
+    dataset_id: str,
+    columns: List[str],
+    label_column: Optional[str],
+    normalization: Optional[dict],
+    axis_ranges: Optional[Dict[str, Tuple[float, float]]] = None,
+    axis_order: Optional[List[str]] = None,
+) -> str:
+    """Chave da figura montada por parallel_coordinates_job com esses argumentos.
+
+    Cada versão do dataset é imutável; com ela, as colunas, o rótulo, os
+    eixos e a regra de amostragem definem a figura inteira.
+    """
+    payload = [
+        dataset_id,
+        columns,
+        label_column,
+        normalization,
+        sorted((axis_ranges or {}).items()),
+        axis_order,
+        PARALLEL_COORDINATES_SAMPLE_SPEC,
+    ]
+    return hashlib.sha1(
+        json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+def parallel_coordinates_job(
+    report: JobReporter,
+    store_directory: str,
+    dataset_id: str,
+    columns: List[str],
+    label_column: Optional[str],
+    normalization: Optional[dict],
+    axis_ranges: Optional[Dict[str, Tuple[float, float]]] = None,
+    axis_order: Optional[List[str]] = None,
+) -> dict:
+    """Monta o gráfico de coordenadas paralelas e devolve o dicionário."""
+    report("load", 0.0)
+    dataframe = DatasetStore(store_directory).get(dataset_id, columns)
+    if dataframe.empty:
+        return go.Figure().to_dict()
+    report("plot", 0.0)
+    # Dicionário montado direto dos arrays, sem a validação do Plotly Express
+    figure = parallel_coordinates_figure_dict_from(
+        dataframe,
+        label_column,
+        NormalizationTransform.from_dict(normalization) if normalization else None,
+        axis_ranges,
+        axis_order,
+    )
+    report("plot", 1.0)
+    # Valores dos eixos e cores vão ao navegador como typed arrays
+    return typed_figure_from(figure)
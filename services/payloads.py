@@ -0,0 +1,142 @@
+import base64
+import gzip
+from typing import Any, Union
+import numpy as np
+import plotly.graph_objects as go
+from plotly.io.json import to_json_plotly
+from services.instrumentation import instrumented
+
+# Vetores menores que isso continuam como listas JSON
+TYPED_ARRAY_MIN_LENGTH: int = 64
+# Códigos de tipo dos typed arrays do plotly.js ({"dtype", "bdata", "shape"})
+TYPED_ARRAY_DTYPES = {
+    np.dtype(np.int8): "i1",
+    np.dtype(np.uint8): "u1",
+    np.dtype(np.int16): "i2",
+    np.dtype(np.uint16): "u2",
+    np.dtype(np.int32): "i4",
+    np.dtype(np.uint32): "u4",
+    np.dtype(np.float32): "f4",
+    np.dtype(np.float64): "f8",
+}
+# Soma das figuras serializadas guardadas em cache
+FIGURE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+# Erro máximo do float32, em fração da amplitude dos valores, para o vetor
+# ir em f4; acima disso (ou com valores além de 2^24) vai em f8
+TYPED_ARRAY_F4_TOLERANCE: float = 1e-6
+FLOAT32_EXACT_INTEGER_LIMIT: float = 2.0**24
+COMPRESSION_MIN_BYTES: int = 1_024
+COMPRESSION_LEVEL: int = 6
+COMPRESSED_MIMETYPES = ("application/json", "text/html", "text/plain")
+
+
+def _fits_float32(values: np.ndarray) -> bool:
+    single = values.astype(np.float32)
+    if np.array_equal(single, values, equal_nan=True):
+        return True
+    finite = values[np.isfinite(values)]
+    if not finite.size or np.abs(finite).max() > FLOAT32_EXACT_INTEGER_LIMIT:
+        return False
+    span = finite.max() - finite.min()
+    error = np.abs(single[np.isfinite(values)].astype(np.float64) - finite).max()
+    return span > 0 and error <= TYPED_ARRAY_F4_TOLERANCE * span
+
+
+def typed_array_from(values: np.ndarray) -> dict:
+    """Vetor (ou matriz) numérico como typed array em base64 do plotly.js.
+
+    Floats vão em float32 (metade dos bytes) quando voltam idênticos ou com
+    erro desprezível perto da amplitude dos valores; valores grandes ou muito
+    próximos entre si (datas, ids) seguem em float64. Inteiros de 64 bits,
+    que o plotly.js não lê, viram int32 quando cabem e float64 caso contrário.
+    """
+    if values.dtype.kind == "f":
+        values = values.astype(
+            np.float32 if _fits_float32(values) else np.float64, copy=False
+        )
+    elif values.dtype.kind == "b":
+        values = values.astype(np.uint8)
+    elif values.dtype not in TYPED_ARRAY_DTYPES:
+        if values.size and (
+            values.min() < np.iinfo(np.int32).min
+            or values.max() > np.iinfo(np.int32).max
+        ):
+            values = values.astype(np.float64)
+        else:
+            values = values.astype(np.int32)
+    typed = {
+        "dtype": TYPED_ARRAY_DTYPES[values.dtype],
+        "bdata": base64.b64encode(np.ascontiguousarray(values).tobytes()).decode(
+            "ascii"
+        ),
+    }
+    if values.ndim > 1:
+        typed["shape"] = ",".join(str(size) for size in values.shape)
+    return typed
+
+
+def _typed_arrays_in(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        if value.dtype.kind in "biuf" and value.size >= TYPED_ARRAY_MIN_LENGTH:
+            return typed_array_from(value)
+        return value
+    if isinstance(value, dict):
+        return {key: _typed_arrays_in(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_typed_arrays_in(item) for item in value]
+    return value
+
+
+@instrumented("serialize")
+def typed_figure_from(figure: Union[go.Figure, dict]) -> dict:
+    """Dicionário da figura com os vetores numéricos dos traços em binário.
+
+    Listas de números em JSON gastam ~18 bytes por float64; o typed array
+    gasta 4 bytes por float32 mais 1/3 do base64. Só os traços (`data`) são
+    convertidos; o layout fica como está.
+    """
+    figure_dict = figure.to_dict() if isinstance(figure, go.Figure) else figure
+    return {
+        **figure_dict,
+        "data": [_typed_arrays_in(trace) for trace in figure_dict.get("data", [])],
+    }
+
+
+def figure_json_from(figure: Union[go.Figure, dict]) -> str:
+    """Figura serializada do mesmo jeito que o Dash a envia ao navegador."""
+    return to_json_plotly(figure)
+
+
+def enable_response_compression(server: Any) -> None:
+    """Comprime as respostas do servidor Flask.
+
+    Usa o flask_compress quando instalado; sem ele, aplica gzip às respostas
+    JSON/HTML/texto acima de COMPRESSION_MIN_BYTES.
+    """
+    try:
+        from flask_compress import Compress
+    except ImportError:
+        Compress = None
+    if Compress is not None:
+        Compress(server)
+        return
+
+    import flask
+
+    @server.after_request
+    def compress_response(response: flask.Response) -> flask.Response:
+        if (
+            response.direct_passthrough
+            or response.status_code != 200
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSED_MIMETYPES
+            or "gzip" not in flask.request.headers.get("Accept-Encoding", "")
+        ):
+            return response
+        data = response.get_data()
+        if len(data) < COMPRESSION_MIN_BYTES:
+            return response
+        response.set_data(gzip.compress(data, compresslevel=COMPRESSION_LEVEL))
+        response.headers["Content-Encoding"] = "gzip"
+        response.vary.add("Accept-Encoding")
+        return response
@@ -0,0 +1,165 @@
+import hashlib
+import json
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+import pandas as pd
+from services.cache import LRUCache
+from services.dataset_store import DatasetNotFoundError, DatasetStore
+
+# Uma operação recebe o DataFrame e os parâmetros do passo, além do registro
+# da versão de entrada, e devolve o resultado e os campos do registro que mudam.
+# As operações em `streaming_operations` leem a entrada direto do DatasetStore
+# e recebem None quando ela ainda não foi carregada
+Operation = Callable[[Optional[pd.DataFrame], dict, dict], Tuple[pd.DataFrame, dict]]
+# Chamado após gravar cada passo: (passo, registro de entrada, registro novo,
+# resultado)
+CheckpointCallback = Callable[[dict, dict, dict, pd.DataFrame], None]
+
+
+def step_from(operation: str, **params: Any) -> dict:
+    return {"operation": operation, "params": params, "enabled": True}
+
+
+@dataclass
+class TransformPipeline:
+    """Lista ordenada de passos sobre uma versão base que nunca é alterada.
+
+    Os passos até `position` estão aplicados; os seguintes podem ser refeitos.
+    Cada mudança devolve um novo pipeline, que cabe inteiro no dcc.Store.
+    """
+
+    base_id: str
+    steps: List[dict] = field(default_factory=list)
+    position: int = 0
+
+    def to_dict(self) -> dict:
+        return {"base_id": self.base_id, "steps": self.steps, "position": self.position}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TransformPipeline":
+        return cls(data["base_id"], list(data["steps"]), data["position"])
+
+    def applied_steps(self) -> List[dict]:
+        return self.steps[: self.position]
+
+    def active_steps(self) -> List[dict]:
+        return [step for step in self.applied_steps() if step["enabled"]]
+
+    def last_step(self) -> Optional[dict]:
+        return self.steps[self.position - 1] if self.position else None
+
+    def push(self, step: dict) -> "TransformPipeline":
+        # Um passo novo descarta o que havia para refazer
+        return TransformPipeline(
+            self.base_id, self.applied_steps() + [step], self.position + 1
+        )
+
+    def can_undo(self) -> bool:
+        return self.position > 0
+
+    def can_redo(self) -> bool:
+        return self.position < len(self.steps)
+
+    def undo(self) -> "TransformPipeline":
+        return TransformPipeline(self.base_id, self.steps, max(self.position - 1, 0))
+
+    def redo(self) -> "TransformPipeline":
+        return TransformPipeline(
+            self.base_id, self.steps, min(self.position + 1, len(self.steps))
+        )
+
+    def with_enabled(self, enabled_positions: List[int]) -> "TransformPipeline":
+        """Liga apenas os passos aplicados cujas posições foram informadas."""
+        enabled = set(enabled_positions)
+        steps = [
+            (
+                {**step, "enabled": position in enabled}
+                if position < self.position
+                else step
+            )
+            for position, step in enumerate(self.steps)
+        ]
+        return TransformPipeline(self.base_id, steps, self.position)
+
+
+def checkpoint_key_for(base_id: str, steps: List[dict]) -> str:
+    # Só operação e parâmetros definem o resultado; "enabled" já foi filtrado
+    payload = [base_id] + [[step["operation"], step["params"]] for step in steps]
+    return hashlib.sha1(
+        json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+class PipelineRunner:
+    """Avalia um pipeline reaproveitando os prefixos já calculados.
+
+    Cada prefixo de passos ativos vira um checkpoint: uma versão gravada no
+    DatasetStore e o registro que a descreve. Desfazer, refazer ou religar um
+    passo só recalcula os passos depois do maior prefixo que ainda existe,
+    e nenhuma versão é lida se o pipeline inteiro já tiver checkpoint.
+    """
+
+    def __init__(
+        self,
+        dataset_store: DatasetStore,
+        operations: Dict[str, Operation],
+        on_checkpoint: Optional[CheckpointCallback] = None,
+        max_checkpoints: int = 128,
+        streaming_operations: Iterable[str] = (),
+    ) -> None:
+        self.dataset_store: DatasetStore = dataset_store
+        self.operations: Dict[str, Operation] = operations
+        self.streaming_operations: FrozenSet[str] = frozenset(streaming_operations)
+        self.on_checkpoint: Optional[CheckpointCallback] = on_checkpoint
+        # chave do prefixo -> registro da versão ({"dataset_id", ...})
+        self.checkpoints: LRUCache = LRUCache(max_entries=max_checkpoints)
+
+    @staticmethod
+    def base_record_for(base_id: str) -> dict:
+        return {"dataset_id": base_id, "label_column": "", "normalization": None}
+
+    def _checkpoint_for(self, base_id: str, steps: List[dict]) -> Optional[dict]:
+        if not steps:
+            return self.base_record_for(base_id)
+        key = checkpoint_key_for(base_id, steps)
+        record = self.checkpoints.get(key)
+        if record is None:
+            return None
+        try:
+            # A versão pode ter expirado no DatasetStore
+            self.dataset_store.schema(record["dataset_id"])
+        except DatasetNotFoundError:
+            self.checkpoints.discard(key)
+            return None
+        return record
+
+    def materialize(self, session_id: str, pipeline: TransformPipeline) -> dict:
+        """Registro da versão final, calculando só os passos sem checkpoint."""
+        steps = pipeline.active_steps()
+        done = len(steps)
+        record = self._checkpoint_for(pipeline.base_id, steps)
+        while record is None:
+            done -= 1
+            record = self._checkpoint_for(pipeline.base_id, steps[:done])
+        if done == len(steps):
+            return record
+
+        dataframe: Optional[pd.DataFrame] = None
+        for position in range(done, len(steps)):
+            step = steps[position]
+            if dataframe is None and step["operation"] not in self.streaming_operations:
+                dataframe = self.dataset_store.get(record["dataset_id"])
+            dataframe, changes = self.operations[step["operation"]](
+                dataframe, step["params"], record
+            )
+            previous, record = record, {
+                **record,
+                **changes,
+                "dataset_id": self.dataset_store.put(session_id, dataframe),
+            }
+            self.checkpoints.put(
+                checkpoint_key_for(pipeline.base_id, steps[: position + 1]), record
+            )
+            if self.on_checkpoint is not None:
+                self.on_checkpoint(step, previous, record, dataframe)
+        return record
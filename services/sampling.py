@@ -0,0 +1,126 @@
+from typing import Iterable, Optional
+import numpy as np
+import pandas as pd
+from services.dataset_store import DatasetStore
+
+DEFAULT_SEED: int = 0
+
+
+def reservoir_sample_from(
+    chunks: Iterable[pd.DataFrame], size: int, seed: int = DEFAULT_SEED
+) -> pd.DataFrame:
+    """Amostra uniforme de `size` linhas de uma sequência de blocos.
+
+    Algoritmo R vetorizado por bloco: a linha de índice global i entra no
+    reservatório com probabilidade size / (i + 1), numa posição aleatória.
+    Só o reservatório fica em memória, então funciona sobre leitores em blocos.
+    """
+    rng = np.random.default_rng(seed)
+    reservoir: Optional[pd.DataFrame] = None
+    seen = 0
+    for chunk in chunks:
+        if seen < size:
+            # Enche o reservatório com as primeiras linhas
+            taken = chunk.iloc[: size - seen]
+            reservoir = taken if reservoir is None else pd.concat([reservoir, taken])
+            seen += len(taken)
+            chunk = chunk.iloc[len(taken) :]
+        if chunk.empty:
+            continue
+
+        global_positions = seen + np.arange(len(chunk))
+        slots = rng.integers(0, global_positions + 1)
+        accepted = np.flatnonzero(slots < size)
+        seen += len(chunk)
+        if accepted.size == 0:
+            continue
+
+        # Se duas linhas caem na mesma posição, vale a última (como no laço
+        # sequencial do algoritmo)
+        reversed_slots = slots[accepted][::-1]
+        replaced_slots, last = np.unique(reversed_slots, return_index=True)
+        replacements = accepted[::-1][last]
+
+        order = np.arange(len(reservoir))
+        order[replaced_slots] = len(reservoir) + np.arange(len(replacements))
+        reservoir = pd.concat([reservoir, chunk.iloc[replacements]]).iloc[order]
+
+    if reservoir is None:
+        return pd.DataFrame()
+    return reservoir.sort_index()
+
+
+def stratified_row_positions_from(
+    labels: Optional[pd.Series], row_count: int, size: int, seed: int = DEFAULT_SEED
+) -> np.ndarray:
+    """Posições (ordenadas) de uma amostra estratificada pelas classes."""
+    rng = np.random.default_rng(seed)
+    size = min(size, row_count)
+    if labels is None:
+        return np.sort(rng.choice(row_count, size=size, replace=False))
+
+    codes, _ = pd.factorize(labels, use_na_sentinel=False)
+    class_sizes = np.bincount(codes)
+
+    # Divisão proporcional com ao menos uma linha por classe; com mais classes
+    # que `size`, as menores ficam sem a linha garantida
+    exact_quotas = class_sizes * size / row_count
+    minimum_quotas = np.zeros(len(class_sizes), dtype=np.int64)
+    minimum_quotas[np.argsort(-class_sizes, kind="stable")[:size]] = 1
+    quotas = np.maximum(np.floor(exact_quotas).astype(np.int64), minimum_quotas)
+    # Ajusta para somar exatamente `size`: tira das classes que receberam
+    # mais que a proporção (sem descer do mínimo) e dá às maiores frações
+    # restantes, em quantas rodadas forem precisas
+    while quotas.sum() > size:
+        candidates = np.flatnonzero(quotas > minimum_quotas)
+        overshoot = quotas[candidates] - exact_quotas[candidates]
+        candidates = candidates[np.argsort(-overshoot, kind="stable")]
+        quotas[candidates[: quotas.sum() - size]] -= 1
+    while quotas.sum() < size:
+        candidates = np.flatnonzero(quotas < class_sizes)
+        shortfall = exact_quotas[candidates] - quotas[candidates]
+        candidates = candidates[np.argsort(-shortfall, kind="stable")]
+        quotas[candidates[: size - quotas.sum()]] += 1
+
+    order = np.argsort(codes, kind="stable")
+    class_starts = np.concatenate([[0], np.cumsum(class_sizes)[:-1]])
+    positions = [
+        order[start + rng.choice(class_size, size=quota, replace=False)]
+        for start, class_size, quota in zip(class_starts, class_sizes, quotas)
+    ]
+    return np.sort(np.concatenate(positions))
+
+
+def rows_at_from(chunks: Iterable[pd.DataFrame], positions: np.ndarray) -> pd.DataFrame:
+    """Linhas nas posições globais (ordenadas) dadas, lendo um bloco por vez."""
+    selected = []
+    start = 0
+    for chunk in chunks:
+        stop = start + len(chunk)
+        first, last = np.searchsorted(positions, [start, stop])
+        if last > first:
+            selected.append(chunk.iloc[positions[first:last] - start])
+        start = stop
+    if not selected:
+        return pd.DataFrame()
+    return pd.concat(selected)
+
+
+def stored_sample_from(
+    dataset_store: DatasetStore,
+    dataset_id: str,
+    size: int,
+    seed: int = DEFAULT_SEED,
+    label_column: Optional[str] = None,
+) -> pd.DataFrame:
+    """Amostra uma versão do DatasetStore sem carregá-la inteira.
+
+    Com rótulo, só a coluna do rótulo é lida para sortear as posições, e as
+    linhas sorteadas são recolhidas bloco a bloco; sem rótulo, o reservatório
+    percorre os blocos do Parquet da versão.
+    """
+    if label_column and label_column in dataset_store.schema(dataset_id).names:
+        labels = dataset_store.get(dataset_id, [label_column])[label_column]
+        positions = stratified_row_positions_from(labels, len(labels), size, seed)
+        return rows_at_from(dataset_store.iter_batches(dataset_id), positions)
+    return reservoir_sample_from(dataset_store.iter_batches(dataset_id), size, seed)
@@ -0,0 +1,222 @@
+import math
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+
+# Valores guardados por nível do sketch de quantis: o erro de posto fica em
+# torno de log2(n / capacidade) / capacidade
+QUANTILE_SKETCH_CAPACITY: int = 256
+HISTOGRAM_BINS: int = 64
+
+
+@dataclass
+class QuantileSketch:
+    """Sketch de quantis no estilo KLL, atualizado por fatias e combinável.
+
+    Cada nível guarda até `capacity` valores, e cada valor do nível h
+    representa 2**h valores originais. Quando um nível enche, ele é ordenado
+    e metade dos valores (pares ou ímpares, ao acaso) sobe de nível. A
+    memória cresce só com log(n), e dois sketches se combinam juntando os
+    níveis e compactando de novo.
+    """
+
+    capacity: int = QUANTILE_SKETCH_CAPACITY
+    count: int = 0
+    levels: List[np.ndarray] = field(default_factory=list)
+    seed: int = 0
+
+    def __post_init__(self) -> None:
+        self._rng = np.random.default_rng(self.seed)
+
+    def update(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        self.count += len(values)
+        if not self.levels:
+            self.levels.append(values)
+        else:
+            self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other: "QuantileSketch") -> None:
+        for height, values in enumerate(other.levels):
+            if height < len(self.levels):
+                self.levels[height] = np.concatenate([self.levels[height], values])
+            else:
+                self.levels.append(values.copy())
+        self.count += other.count
+        self._compress()
+
+    def _compress(self) -> None:
+        height = 0
+        while height < len(self.levels):
+            level = self.levels[height]
+            if len(level) > self.capacity:
+                level = np.sort(level)
+                # Número par de valores compactados; o que sobra fica no nível
+                paired = len(level) - len(level) % 2
+                promoted = level[self._rng.integers(2) : paired : 2]
+                self.levels[height] = level[paired:]
+                if height + 1 == len(self.levels):
+                    self.levels.append(promoted)
+                else:
+                    self.levels[height + 1] = np.concatenate(
+                        [self.levels[height + 1], promoted]
+                    )
+            height += 1
+
+    def quantiles(self, probabilities: Sequence[float]) -> np.ndarray:
+        if not self.count:
+            return np.full(len(probabilities), np.nan)
+        values = np.concatenate(self.levels)
+        weights = np.concatenate(
+            [
+                np.full(len(level), 2.0**height)
+                for height, level in enumerate(self.levels)
+            ]
+        )
+        order = np.argsort(values, kind="stable")
+        cumulative = np.cumsum(weights[order])
+        targets = np.asarray(probabilities, dtype=np.float64) * cumulative[-1]
+        positions = np.searchsorted(cumulative, targets, side="left")
+        return values[order][np.minimum(positions, len(values) - 1)]
+
+    def scaled(self, scale: float, shift: float) -> "QuantileSketch":
+        """Sketch de x * scale + shift (scale >= 0 preserva a ordem)."""
+        return QuantileSketch(
+            self.capacity,
+            self.count,
+            [level * scale + shift for level in self.levels],
+            self.seed,
+        )
+
+
+@dataclass
+class HistogramSketch:
+    """Histograma de faixas fixas atualizado por fatias, sem saber o intervalo.
+
+    As faixas têm largura potência de dois e ficam alinhadas a uma grade
+    absoluta (índice = floor((x - origin) / width)). Quando um valor novo
+    não cabe nas `bins` faixas, a largura dobra e as faixas vizinhas se
+    somam. Como as grades são alinhadas, dois histogramas se combinam.
+    """
+
+    bins: int = HISTOGRAM_BINS
+    origin: float = 0.0
+    width: Optional[float] = None
+    # Índice absoluto da primeira faixa de `counts`
+    first: int = 0
+    counts: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int64))
+
+    def _occupied(self) -> Optional[Tuple[int, int]]:
+        nonzero = np.flatnonzero(self.counts)
+        if not len(nonzero):
+            return None
+        return self.first + int(nonzero[0]), self.first + int(nonzero[-1])
+
+    def _coarsen(self) -> None:
+        # Dobra a largura: as faixas absolutas 2i e 2i+1 viram a faixa i
+        absolute = self.first + np.arange(len(self.counts))
+        new_first = self.first // 2
+        self.counts = np.bincount(
+            absolute // 2 - new_first, weights=self.counts, minlength=self.bins
+        ).astype(np.int64)[: self.bins]
+        self.first = new_first
+        self.width *= 2
+
+    def _cover(self, low: int, high: int) -> None:
+        # Alarga as faixas (na largura atual) até [low, high] e as já
+        # ocupadas caberem juntas
+        occupied = self._occupied()
+        if occupied is not None:
+            low, high = min(low, occupied[0]), max(high, occupied[1])
+        while high - low >= self.bins:
+            self._coarsen()
+            low, high = low // 2, high // 2
+        if low == self.first and len(self.counts) == self.bins:
+            return
+        counts = np.zeros(self.bins, dtype=np.int64)
+        occupied = self._occupied()
+        if occupied is not None:
+            start, end = occupied
+            counts[start - low : end - low + 1] = self.counts[
+                start - self.first : end - self.first + 1
+            ]
+        self.counts, self.first = counts, low
+
+    def _indices_for(self, values: np.ndarray) -> np.ndarray:
+        return np.floor((values - self.origin) / self.width).astype(np.int64)
+
+    def update(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64)
+        values = values[np.isfinite(values)]
+        if not len(values):
+            return
+        if self.width is None:
+            # Largura inicial: potência de dois que cobre a primeira fatia
+            span = float(values.max() - values.min())
+            self.width = 2.0 ** math.ceil(math.log2(span / self.bins)) if span else 1.0
+        indices = self._indices_for(values)
+        self._cover(int(indices.min()), int(indices.max()))
+        # _cover pode ter dobrado a largura; os índices são recalculados
+        positions = np.clip(self._indices_for(values) - self.first, 0, self.bins - 1)
+        self.counts += np.bincount(positions, minlength=self.bins)
+
+    def merge(self, other: "HistogramSketch") -> None:
+        if other.width is None:
+            return
+        if self.width is None:
+            self.origin, self.width = other.origin, other.width
+            self.first, self.counts = other.first, other.counts.copy()
+            return
+        if other.origin != self.origin:
+            raise ValueError("Histogramas com grades diferentes")
+        other = HistogramSketch(
+            other.bins, other.origin, other.width, other.first, other.counts.copy()
+        )
+        while True:
+            # Mesma largura nos dois; cobrir as faixas do outro pode dobrar a
+            # largura de novo
+            while other.width < self.width:
+                other._coarsen()
+            while self.width < other.width:
+                self._coarsen()
+            occupied = other._occupied()
+            if occupied is None:
+                return
+            width = self.width
+            self._cover(*occupied)
+            if self.width == width:
+                break
+        start, end = occupied
+        self.counts[start - self.first : end - self.first + 1] += other.counts[
+            start - other.first : end - other.first + 1
+        ]
+
+    def edges_and_counts(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Limites e contagens só das faixas entre a primeira e a última ocupada."""
+        occupied = self._occupied()
+        if occupied is None:
+            return np.zeros(0), np.zeros(0, dtype=np.int64)
+        start, end = occupied
+        edges = self.origin + np.arange(start, end + 2) * self.width
+        return edges, self.counts[start - self.first : end - self.first + 1]
+
+    def scaled(self, scale: float, shift: float) -> "HistogramSketch":
+        """Histograma de x * scale + shift, sem reler os dados."""
+        if self.width is None:
+            return HistogramSketch(self.bins)
+        if scale <= 0:
+            # Coluna constante: tudo numa faixa centrada em `shift`
+            counts = np.zeros(self.bins, dtype=np.int64)
+            counts[0] = self.counts.sum()
+            return HistogramSketch(self.bins, shift - 0.5, 1.0, 0, counts)
+        return HistogramSketch(
+            self.bins,
+            self.origin * scale + shift,
+            self.width * scale,
+            self.first,
+            self.counts.copy(),
+        )
@@ -0,0 +1,180 @@
+import math
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from services.instrumentation import instrumented
+
+# Operadores gerados pelo filter_query do DataTable (ambas as grafias)
+FILTER_OPERATORS: List[List[str]] = [
+    ["ge ", ">="],
+    ["le ", "<="],
+    ["lt ", "<"],
+    ["gt ", ">"],
+    ["ne ", "!="],
+    ["eq ", "="],
+    ["contains "],
+    ["datestartswith "],
+]
+
+
+def split_filter_part(filter_part: str) -> Tuple[Optional[str], Optional[str], Any]:
+    """Separa "{coluna} operador valor" em (coluna, operador, valor)."""
+    for operator_type in FILTER_OPERATORS:
+        for operator in operator_type:
+            if operator not in filter_part:
+                continue
+            name_part, value_part = filter_part.split(operator, 1)
+            name = name_part[name_part.find("{") + 1 : name_part.rfind("}")]
+
+            value_part = value_part.strip()
+            first_character = value_part[0] if value_part else ""
+            if (
+                first_character
+                and value_part[-1] == first_character
+                and first_character in "'\"`"
+            ):
+                value: Any = value_part[1:-1].replace(
+                    "\\" + first_character, first_character
+                )
+            else:
+                try:
+                    value = float(value_part)
+                except ValueError:
+                    value = value_part
+
+            # Retorna sempre a primeira grafia do operador
+            return name, operator_type[0].strip(), value
+
+    return None, None, None
+
+
+def _boolean_from(value: Any) -> Optional[bool]:
+    # "true"/"false" digitados no filtro, ou 1/0
+    if isinstance(value, str):
+        return {"true": True, "false": False}.get(value.strip().lower())
+    return {1: True, 0: False}.get(value)
+
+
+def _expression_for(
+    schema: pa.Schema, name: str, operator: str, value: Any
+) -> Optional[pc.Expression]:
+    if name not in schema.names:
+        return None
+    field_type = schema.field(name).type
+    field = pc.field(name)
+    is_numeric = pa.types.is_integer(field_type) or pa.types.is_floating(field_type)
+
+    if operator in ("contains", "datestartswith"):
+        text = field.cast(pa.string())
+        # Números digitados no filtro chegam como float ("2020" -> 2020.0)
+        pattern = value if isinstance(value, str) else f"{value:g}"
+        if operator == "contains":
+            return pc.match_substring(text, pattern)
+        return pc.starts_with(text, pattern)
+
+    if pa.types.is_boolean(field_type):
+        value = _boolean_from(value)
+        if value is None:
+            # Valor que não é verdadeiro/falso numa coluna booleana nunca casa
+            return pc.scalar(False)
+    elif is_numeric and isinstance(value, str):
+        # Valor não numérico numa coluna numérica nunca casa
+        return pc.scalar(False)
+    elif not is_numeric:
+        # Texto, categorias, datas e demais tipos são comparados como texto
+        if not isinstance(value, str):
+            value = f"{value:g}"
+        field = field.cast(pa.string())
+
+    comparisons = {
+        "ge": field >= value,
+        "le": field <= value,
+        "lt": field < value,
+        "gt": field > value,
+        "ne": field != value,
+        "eq": field == value,
+    }
+    return comparisons[operator]
+
+
+def filter_table_from(table: pa.Table, filter_query: Optional[str]) -> pa.Table:
+    if not filter_query:
+        return table
+
+    expression: Optional[pc.Expression] = None
+    for filter_part in filter_query.split(" && "):
+        name, operator, value = split_filter_part(filter_part)
+        if name is None:
+            continue
+        part = _expression_for(table.schema, name, operator, value)
+        if part is None:
+            continue
+        expression = part if expression is None else expression & part
+
+    return table if expression is None else table.filter(expression)
+
+
+@instrumented("serialize")
+def query_page_from(
+    table: pa.Table,
+    page_current: int,
+    page_size: int,
+    sort_by: Optional[List[Dict[str, str]]] = None,
+    filter_query: Optional[str] = None,
+    row_positions: Optional[np.ndarray] = None,
+) -> Tuple[List[Dict[str, Any]], int]:
+    """Retorna somente as linhas da página visível e o total de páginas.
+
+    row_positions restringe a tabela a uma seleção (ex.: brushing no gráfico).
+    """
+    if row_positions is not None:
+        if not filter_query and not sort_by:
+            # Sem filtro nem ordenação, só as linhas da página saem da seleção
+            offset = page_current * page_size
+            page = table.take(row_positions[offset : offset + page_size])
+            return page.to_pylist(), max(math.ceil(len(row_positions) / page_size), 1)
+        table = table.take(row_positions)
+    table = filter_table_from(table, filter_query)
+    page_count = max(math.ceil(table.num_rows / page_size), 1)
+    offset = page_current * page_size
+
+    sort_keys = [
+        (sort["column_id"], "ascending" if sort["direction"] == "asc" else "descending")
+        for sort in (sort_by or [])
+        if sort["column_id"] in table.schema.names
+    ]
+    if sort_keys:
+        # Ordena apenas os índices e materializa só as linhas da página;
+        # colunas category (dictionary) são ordenadas pelos valores
+        keys = pa.table(
+            {
+                name: (
+                    table[name].cast(table[name].type.value_type)
+                    if pa.types.is_dictionary(table[name].type)
+                    else table[name]
+                )
+                for name, _ in sort_keys
+            }
+        )
+        indices = pc.sort_indices(keys, sort_keys=sort_keys)
+        page = table.take(indices.slice(offset, page_size))
+    else:
+        page = table.slice(offset, page_size)
+
+    return page.to_pylist(), page_count
+
+
+def table_columns_from(schema: pa.Schema) -> List[Dict[str, str]]:
+    return [
+        {
+            "name": field.name,
+            "id": field.name,
+            "type": (
+                "numeric"
+                if pa.types.is_integer(field.type) or pa.types.is_floating(field.type)
+                else "text"
+            ),
+        }
+        for field in schema
+    ]
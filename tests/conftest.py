@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Os testes importam services/ e GUI/ a partir da raiz do projeto
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
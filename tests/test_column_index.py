@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+import pytest
+from services.column_index import (
+    ColumnIndex,
+    MembershipPredicate,
+    RangePredicate,
+    parse_sample_query,
+)
+
+# Quantidade de linhas que não é múltipla de 8, para testar o fim dos bitmaps
+ROW_COUNT: int = 1003
+
+
+@pytest.fixture(scope="module")
+def dataframe():
+    rng = np.random.default_rng(0)
+    valor = rng.normal(size=ROW_COUNT)
+    valor[rng.choice(ROW_COUNT, 50, replace=False)] = np.nan
+    return pd.DataFrame(
+        {
+            "valor": valor,
+            "ano": rng.integers(2000, 2021, ROW_COUNT),
+            "pais": rng.choice(["Brasil", "Chile", "Peru", None], ROW_COUNT),
+            "regiao": pd.Categorical(rng.choice(["norte", "sul"], ROW_COUNT)),
+        }
+    )
+
+
+def _positions_from(mask):
+    return np.flatnonzero(np.asarray(mask))
+
+
+@pytest.mark.parametrize(
+    "low, high", [(-0.5, 0.5), (None, 0.0), (1.0, None), (None, None), (5.0, 6.0)]
+)
+def test_range_selection_matches_a_pandas_mask(dataframe, low, high):
+    column_index = ColumnIndex(dataframe)
+    values = dataframe["valor"]
+    mask = values.notna()
+    if low is not None:
+        mask &= values >= low
+    if high is not None:
+        mask &= values <= high
+
+    positions = column_index.select([RangePredicate("valor", low, high)])
+
+    np.testing.assert_array_equal(positions, _positions_from(mask))
+
+
+def test_range_bounds_are_inclusive(dataframe):
+    column_index = ColumnIndex(dataframe)
+
+    positions = column_index.select([RangePredicate("ano", 2005, 2005)])
+
+    np.testing.assert_array_equal(positions, _positions_from(dataframe["ano"] == 2005))
+
+
+@pytest.mark.parametrize(
+    "column, values",
+    [
+        ("pais", ["Brasil", "Peru"]),
+        ("pais", ["Chile", "Inexistente"]),
+        ("pais", []),
+        ("regiao", ["sul"]),
+    ],
+)
+def test_membership_bitmap_matches_isin(dataframe, column, values):
+    column_index = ColumnIndex(dataframe)
+
+    bitmap = column_index.membership_bitmap(column, values)
+
+    assert len(bitmap) == (ROW_COUNT + 7) // 8
+    np.testing.assert_array_equal(
+        np.unpackbits(bitmap, count=ROW_COUNT).astype(bool),
+        dataframe[column].isin(values).to_numpy(),
+    )
+    # Os bits depois da última linha ficam zerados
+    assert not np.unpackbits(bitmap)[ROW_COUNT:].any()
+
+
+def test_combined_predicates_match_and_of_pandas_masks(dataframe):
+    column_index = ColumnIndex(dataframe)
+    predicates = [
+        RangePredicate("valor", -1.0, 1.0),
+        RangePredicate("ano", 2010, None),
+        MembershipPredicate("pais", ["Brasil", "Chile"]),
+    ]
+    mask = (
+        dataframe["valor"].between(-1.0, 1.0)
+        & (dataframe["ano"] >= 2010)
+        & dataframe["pais"].isin(["Brasil", "Chile"])
+    )
+
+    # A segunda consulta reaproveita os índices já criados
+    for _ in range(2):
+        positions = column_index.select(predicates)
+        np.testing.assert_array_equal(positions, _positions_from(mask))
+
+
+def test_select_without_predicates_returns_every_row(dataframe):
+    np.testing.assert_array_equal(
+        ColumnIndex(dataframe).select([]), np.arange(ROW_COUNT)
+    )
+
+
+def test_missing_mask_matches_isna(dataframe):
+    column_index = ColumnIndex(dataframe)
+
+    missing = column_index.missing_mask()
+
+    np.testing.assert_array_equal(missing, dataframe.isna().to_numpy())
+    assert column_index.missing_mask() is missing
+
+
+def test_parse_sample_query_builds_the_predicates(dataframe):
+    predicates = parse_sample_query(
+        "valor: -1..; ano: 2010; pais: Brasil, Chile ;; regiao: ..", dataframe
+    )
+
+    assert predicates == [
+        RangePredicate("valor", -1.0, None),
+        RangePredicate("ano", 2010.0, 2010.0),
+        MembershipPredicate("pais", ["Brasil", "Chile"]),
+        MembershipPredicate("regiao", [".."]),
+    ]
+
+
+def test_parsed_query_selects_like_pandas(dataframe):
+    predicates = parse_sample_query("valor: 0..1; pais: Peru", dataframe)
+    mask = dataframe["valor"].between(0, 1) & (dataframe["pais"] == "Peru")
+
+    positions = ColumnIndex(dataframe).select(predicates)
+
+    np.testing.assert_array_equal(positions, _positions_from(mask))
+
+
+@pytest.mark.parametrize("query", ["inexistente: 1", "valor 1..2", ": 3"])
+def test_parse_sample_query_rejects_unknown_columns(dataframe, query):
+    with pytest.raises(ValueError, match="Coluna inválida"):
+        parse_sample_query(query, dataframe)
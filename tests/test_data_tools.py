@@ -0,0 +1,189 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from plotly.io.json import to_json_plotly
+from services.data_tools import (
+    detect_year_columns_from,
+    long_to_wide_from,
+    normalize_with_statistics_from,
+    parallel_coordinates_figure_dict_from,
+    plot_parallel_coordinates_from,
+    reduce_dimensions_from,
+    wide_to_long_from,
+)
+
+
+@pytest.fixture
+def dataframe():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(
+        {
+            "grupo": rng.choice(["a", "b", None], size=200),
+            "inteiro": rng.integers(0, 100, size=200),
+            "real": rng.standard_normal(200),
+            "anulavel": pd.array(
+                [
+                    None if position % 7 == 0 else position % 5
+                    for position in range(200)
+                ],
+                dtype="Int64",
+            ),
+            2020: rng.standard_normal(200),
+        }
+    )
+
+
+def _structure_of(figure) -> dict:
+    # A ordem das chaves muda entre os dois caminhos; o conteúdo não
+    return json.loads(to_json_plotly(figure))
+
+
+@pytest.mark.parametrize("label_column", ["grupo", None])
+def test_dict_builder_matches_plotly_express(dataframe, label_column):
+    if label_column is None:
+        dataframe = dataframe.drop(columns=["grupo"])
+
+    expected = plot_parallel_coordinates_from(dataframe, label_column).to_dict()
+    built = parallel_coordinates_figure_dict_from(dataframe, label_column)
+
+    assert _structure_of(built) == _structure_of(expected)
+
+
+def test_dict_builder_matches_with_normalization_ranges_and_order(dataframe):
+    numeric = dataframe.drop(columns=["grupo", "anulavel"])
+    normalized, _, transform = normalize_with_statistics_from(numeric)
+    axis_order = ["real", "inteiro"]
+    axis_ranges = {"real": (0.2, 0.8)}
+
+    expected = plot_parallel_coordinates_from(
+        normalized, None, transform, axis_ranges, axis_order
+    ).to_dict()
+    built = parallel_coordinates_figure_dict_from(
+        normalized, None, transform, axis_ranges, axis_order
+    )
+
+    assert _structure_of(built) == _structure_of(expected)
+
+
+@pytest.mark.parametrize("label_column", ["grupo", None])
+def test_frames_without_numeric_columns_give_an_empty_figure(label_column):
+    dataframe = pd.DataFrame({"grupo": ["a", "b"], "nome": ["x", "y"]})
+
+    built = parallel_coordinates_figure_dict_from(dataframe, label_column)
+    expected = plot_parallel_coordinates_from(dataframe, label_column)
+
+    assert built["data"] == []
+    assert expected.data == ()
+
+
+@pytest.fixture
+def correlated_frame():
+    rng = np.random.default_rng(3)
+    base = rng.standard_normal((1_000, 2)) * [5.0, 1.0]
+    block = np.column_stack(
+        [base[:, 0], base[:, 1], base[:, 0] + 0.1 * rng.standard_normal(1_000)]
+    )
+    block[rng.choice(1_000, 50, replace=False), 1] = np.nan
+    dataframe = pd.DataFrame(block, columns=["x", "y", "z"])
+    dataframe.insert(0, "grupo", rng.choice(["a", "b"], size=1_000))
+    dataframe["flag"] = rng.random(1_000) > 0.5
+    return dataframe
+
+
+def _exact_projection_from(dataframe, n_components):
+    block = dataframe[["x", "y", "z"]].to_numpy()
+    block = np.where(np.isnan(block), np.nanmean(block, axis=0), block)
+    centered = block - block.mean(axis=0)
+    _, _, components = np.linalg.svd(centered, full_matrices=False)
+    return centered @ components[:n_components].T
+
+
+@pytest.mark.parametrize("chunk_rows", [100, 333, 10_000])
+def test_pca_matches_the_exact_projection(correlated_frame, chunk_rows):
+    reduced = reduce_dimensions_from(
+        correlated_frame, 2, method="pca", chunk_rows=chunk_rows
+    )
+
+    assert list(reduced.columns) == ["grupo", "flag", "PC1", "PC2"]
+    # O sinal de cada componente é arbitrário
+    np.testing.assert_allclose(
+        np.abs(reduced[["PC1", "PC2"]].to_numpy()),
+        np.abs(_exact_projection_from(correlated_frame, 2)),
+        atol=1e-6,
+    )
+
+
+def test_bool_columns_are_not_axes(correlated_frame):
+    figure = parallel_coordinates_figure_dict_from(correlated_frame, "grupo")
+
+    labels = [dimension["label"] for dimension in figure["data"][0]["dimensions"]]
+    assert labels == ["x", "y", "z"]
+
+
+@pytest.fixture
+def wide():
+    rng = np.random.default_rng(3)
+    emissions = rng.standard_normal((5, 4))
+    emissions[rng.random((5, 4)) < 0.3] = np.nan
+    # Uma linha sem nenhum valor também precisa voltar
+    emissions[2] = np.nan
+    wide = pd.DataFrame(
+        {
+            "País": ["Argentina", "Brasil", "Chile", "Peru", "Uruguai"],
+            "Código": ["ARG", "BRA", "CHL", "PER", "URY"],
+        }
+    )
+    # Anos fora de ordem e com lacuna
+    for position, year in enumerate([1995, 1990, 1991, 2010]):
+        wide[f"Emissões {year}"] = emissions[:, position]
+    return wide
+
+
+def test_detect_year_columns_picks_the_largest_group_in_year_order():
+    columns = ["País", "F1990", "Pop 2001", "F1961", "Pop 2000", "F2020", "Ano"]
+
+    year_columns = detect_year_columns_from(columns)
+
+    assert year_columns.prefix == "F"
+    assert year_columns.columns == ["F1961", "F1990", "F2020"]
+    np.testing.assert_array_equal(year_columns.years, [1961, 1990, 2020])
+    assert detect_year_columns_from(["País", "Pop 2000", "Pop 2001"]) is None
+
+
+def test_wide_to_long_to_wide_round_trip(wide):
+    long = wide_to_long_from(wide)
+
+    assert list(long.columns) == ["País", "Código", "Year", "Emissões"]
+    assert len(long) == 5 * 4
+    assert (
+        long["Emissões"].isna().sum() == wide.filter(like="Emissões").isna().sum().sum()
+    )
+
+    back = long_to_wide_from(long)
+
+    year_columns = detect_year_columns_from(list(wide.columns)).columns
+    expected = wide[["País", "Código"] + year_columns]
+    pd.testing.assert_frame_equal(back, expected, check_index_type=False)
+
+
+def test_long_to_wide_to_long_round_trip(wide):
+    long = wide_to_long_from(wide)
+
+    back = wide_to_long_from(long_to_wide_from(long))
+
+    expected = long.sort_values(["Year", "País"], kind="stable").reset_index(drop=True)
+    pd.testing.assert_frame_equal(back, expected)
+
+
+def test_single_letter_prefix_becomes_value(wide):
+    renamed = wide.rename(columns=lambda column: column.replace("Emissões ", "F"))
+
+    long = wide_to_long_from(renamed)
+    back = long_to_wide_from(long)
+
+    assert "Value" in long.columns
+    np.testing.assert_array_equal(
+        back[["Value 1990", "Value 1991"]].to_numpy(),
+        wide[["Emissões 1990", "Emissões 1991"]].to_numpy(),
+    )
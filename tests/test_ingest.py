@@ -0,0 +1,96 @@
+import io
+import os
+import numpy as np
+import pandas as pd
+from services.ingest import optimize_dtypes_from, read_csv_buffer_from
+
+DATASETS_DIRECTORY: str = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "datasets"
+)
+
+
+def test_floats_are_only_downcast_when_every_value_round_trips():
+    dataframe = pd.DataFrame(
+        {
+            "exato": [0.5, 1.25, np.nan, -8.0],
+            "impreciso": [0.1, 1.0 / 3.0, np.nan, 2.0**25 + 1],
+        }
+    )
+
+    optimized, report = optimize_dtypes_from(dataframe)
+
+    assert optimized["exato"].dtype == np.float32
+    assert optimized["impreciso"].dtype == np.float64
+    assert set(report.converted) == {"exato"}
+    pd.testing.assert_series_equal(
+        optimized["impreciso"], dataframe["impreciso"], check_exact=True
+    )
+
+
+def test_bundled_dataset_values_are_unchanged():
+    dataframe = pd.read_csv(
+        os.path.join(DATASETS_DIRECTORY, "global-data-on-sustainable-energy.csv")
+    )
+
+    optimized, _ = optimize_dtypes_from(dataframe)
+
+    for column in dataframe.select_dtypes(include="float").columns:
+        np.testing.assert_array_equal(
+            optimized[column].to_numpy(dtype=np.float64),
+            dataframe[column].to_numpy(),
+        )
+
+
+def test_integers_and_repeated_text_are_compacted():
+    dataframe = pd.DataFrame({"inteiro": [1, 2, 3, 4] * 10, "texto": ["a", "b"] * 20})
+
+    optimized, _ = optimize_dtypes_from(dataframe)
+
+    assert optimized["inteiro"].dtype == np.int8
+    assert isinstance(optimized["texto"].dtype, pd.CategoricalDtype)
+
+
+def _csv_buffer_from(text):
+    return io.BytesIO(text.encode("utf-8"))
+
+
+def test_chunked_csv_matches_a_single_read_when_dtypes_change_between_chunks():
+    # Os blocos de 2 linhas mudam de int para float (NaN), de bool para
+    # object e de int para texto
+    text = (
+        "nome,inteiro,logico,misto\n"
+        "a,1,True,1\n"
+        "b,2,False,2\n"
+        "c,,True,3\n"
+        "d,4,1.5,x\n"
+        '"e\nf",5,False,4\n'
+    )
+
+    # dtype={} desliga a inferência na amostra, que fixaria float e object
+    dataframe = read_csv_buffer_from(_csv_buffer_from(text), dtype={}, chunk_rows=2)
+
+    expected = pd.concat(
+        pd.read_csv(_csv_buffer_from(text), chunksize=2), ignore_index=True
+    )
+    pd.testing.assert_frame_equal(dataframe, expected)
+    assert dataframe["inteiro"].dtype == np.float64
+    assert dataframe["logico"].dtype == object
+
+
+def test_chunked_csv_grows_past_the_line_count():
+    # Só "\r" como quebra de linha: a contagem de "\n" fica curta
+    text = "a,b\r" + "".join(f"{row},{row / 2}\r" for row in range(10))
+
+    dataframe = read_csv_buffer_from(_csv_buffer_from(text), chunk_rows=3)
+
+    pd.testing.assert_frame_equal(dataframe, pd.read_csv(_csv_buffer_from(text)))
+
+
+def test_bundled_dataset_reads_the_same_in_chunks():
+    path = os.path.join(DATASETS_DIRECTORY, "global-data-on-sustainable-energy.csv")
+    with open(path, "rb") as source:
+        buffer = io.BytesIO(source.read())
+
+    dataframe = read_csv_buffer_from(buffer, chunk_rows=500)
+
+    pd.testing.assert_frame_equal(dataframe, pd.read_csv(path))
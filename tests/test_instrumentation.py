@@ -0,0 +1,104 @@
+import threading
+import warnings
+import dash
+import pytest
+from dash import Input, Output, dcc, html
+from services.instrumentation import (
+    MetricsRegistry,
+    RequestProfiler,
+    instrument_dash_app,
+)
+
+
+def test_profiler_claims_the_armed_slot_once():
+    profiler = RequestProfiler()
+    profiler.arm()
+
+    first = profiler.start("um")
+    second = profiler.start("outro")
+    assert first is not None
+    assert second is None
+
+    profiler.finish(first, "um")
+    assert profiler.report
+    # Já consumido: só volta a perfilar depois de um novo arm()
+    assert profiler.start("um") is None
+
+
+def test_profiler_waits_for_the_requested_callback():
+    profiler = RequestProfiler()
+    profiler.arm("pedido")
+
+    assert profiler.start("outro") is None
+    session = profiler.start("pedido")
+    assert session is not None
+    profiler.finish(session, "pedido")
+
+
+def test_concurrent_requests_start_a_single_profile():
+    profiler = RequestProfiler()
+    profiler.arm()
+    barrier = threading.Barrier(8)
+    sessions = []
+
+    def request() -> None:
+        barrier.wait()
+        sessions.append(profiler.start("callback"))
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    started = [session for session in sessions if session is not None]
+    assert len(started) == 1
+    profiler.finish(started[0], "callback")
+
+
+def _app_with_callback_registered(before_instrumentation: bool):
+    app = dash.Dash(__name__)
+    app.layout = html.Div([dcc.Input(id="entrada", value="a"), html.Div(id="saida")])
+
+    def register() -> None:
+        @app.callback(Output("saida", "children"), Input("entrada", "value"))
+        def echo(value):
+            return value
+
+    if before_instrumentation:
+        register()
+    registry = MetricsRegistry()
+    instrument_dash_app(app, registry, profiling=False)
+    if not before_instrumentation:
+        register()
+    return app, registry
+
+
+def _update_from(app) -> None:
+    response = app.server.test_client().post(
+        "/_dash-update-component",
+        json={
+            "output": "saida.children",
+            "outputs": {"id": "saida", "property": "children"},
+            "inputs": [{"id": "entrada", "property": "value", "value": "b"}],
+            "changedPropIds": ["entrada.value"],
+        },
+    )
+    assert response.status_code == 200
+
+
+def test_callbacks_registered_after_instrumentation_are_measured():
+    app, registry = _app_with_callback_registered(before_instrumentation=False)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        _update_from(app)
+
+    assert ("echo", "callback") in registry.snapshot()[0]
+
+
+def test_callbacks_registered_before_instrumentation_are_reported():
+    app, registry = _app_with_callback_registered(before_instrumentation=True)
+
+    with pytest.warns(UserWarning, match="echo"):
+        _update_from(app)
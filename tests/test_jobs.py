@@ -0,0 +1,99 @@
+import base64
+import time
+import pytest
+from services.jobs import JobManager, load_upload_job
+
+POLL_TIMEOUT_S: float = 60.0
+
+
+def _encoded_csv_from(text: str) -> str:
+    return "data:text/csv;base64," + base64.b64encode(text.encode("utf-8")).decode()
+
+
+def _final_status_from(manager: JobManager, job_id: str):
+    deadline = time.monotonic() + POLL_TIMEOUT_S
+    while time.monotonic() < deadline:
+        status = manager.status(job_id)
+        if status.state != "running":
+            return status
+        time.sleep(0.05)
+    pytest.fail("a tarefa não terminou a tempo")
+
+
+@pytest.fixture
+def submitting_manager(tmp_path):
+    manager = JobManager(str(tmp_path), max_workers=1)
+    yield manager
+    manager.shutdown()
+
+
+def test_status_from_another_manager_reads_the_stored_result(
+    tmp_path, submitting_manager
+):
+    job_id = submitting_manager.submit(
+        load_upload_job,
+        str(tmp_path),
+        "sessao",
+        _encoded_csv_from("nome,a,b\nx,1,2\ny,3,4\n"),
+    )
+    # Outro worker: mesmo diretório, sem o Future da tarefa
+    polling_manager = JobManager(str(tmp_path))
+    status = _final_status_from(polling_manager, job_id)
+
+    assert status.state == "done"
+    dataset_id, summary, profile, _ = status.result
+    assert dataset_id
+    assert profile.numeric_columns() == ["a", "b"]
+
+    polling_manager.forget(job_id)
+    assert polling_manager.status(job_id).state == "missing"
+
+
+def test_failure_is_visible_from_another_manager(tmp_path, submitting_manager):
+    job_id = submitting_manager.submit(
+        load_upload_job, str(tmp_path), "sessao", "sem base64"
+    )
+    status = _final_status_from(JobManager(str(tmp_path)), job_id)
+
+    assert status.state == "failed"
+    assert status.error
+
+
+def test_unknown_job_is_missing_with_an_error(tmp_path):
+    status = JobManager(str(tmp_path)).status("desconhecida")
+
+    assert status.state == "missing"
+    assert status.error
+
+
+def _job_files_in(tmp_path):
+    return sorted(path.name for path in (tmp_path / "jobs").iterdir())
+
+
+def test_cancelling_a_finished_job_removes_its_outcome(tmp_path, submitting_manager):
+    job_id = submitting_manager.submit(
+        load_upload_job,
+        str(tmp_path),
+        "sessao",
+        _encoded_csv_from("nome,a\nx,1\n"),
+    )
+    assert _final_status_from(JobManager(str(tmp_path)), job_id).state == "done"
+
+    submitting_manager.cancel(job_id)
+
+    assert _job_files_in(tmp_path) == []
+
+
+def test_expire_removes_files_nobody_polled(tmp_path, submitting_manager):
+    job_id = submitting_manager.submit(
+        load_upload_job,
+        str(tmp_path),
+        "sessao",
+        _encoded_csv_from("nome,a\nx,1\n"),
+    )
+    assert _final_status_from(JobManager(str(tmp_path)), job_id).state == "done"
+    assert f"{job_id}.outcome" in _job_files_in(tmp_path)
+
+    JobManager(str(tmp_path), ttl_seconds=-1).expire()
+
+    assert _job_files_in(tmp_path) == []
@@ -0,0 +1,50 @@
+import base64
+import numpy as np
+import pytest
+from services.payloads import typed_array_from, typed_figure_from
+
+
+def _decoded_from(typed: dict) -> np.ndarray:
+    dtypes = {"f4": np.float32, "f8": np.float64, "i4": np.int32}
+    return np.frombuffer(base64.b64decode(typed["bdata"]), dtype=dtypes[typed["dtype"]])
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        np.linspace(0.0, 1.0, 100),
+        np.array([0.5, 1.25, np.nan, 1024.0] * 25),
+        np.random.default_rng(0).normal(50.0, 10.0, 100),
+    ],
+)
+def test_values_that_fit_float32_are_sent_as_f4(values):
+    assert typed_array_from(values)["dtype"] == "f4"
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        # Ids acima de 2^24
+        np.arange(2**24, 2**24 + 100, dtype=np.float64) + 1,
+        # Timestamps próximos entre si
+        1.7e9 + np.arange(100, dtype=np.float64) * 0.001,
+    ],
+)
+def test_values_that_would_be_rounded_are_sent_as_f8(values):
+    typed = typed_array_from(values)
+
+    assert typed["dtype"] == "f8"
+    np.testing.assert_array_equal(_decoded_from(typed), values)
+
+
+def test_figure_keeps_short_arrays_and_layout():
+    figure = {
+        "data": [{"type": "bar", "x": np.arange(3.0), "y": np.linspace(0, 1, 100)}],
+        "layout": {"title": {"text": "t"}},
+    }
+
+    typed = typed_figure_from(figure)
+
+    assert isinstance(typed["data"][0]["x"], np.ndarray)
+    assert typed["data"][0]["y"]["dtype"] == "f4"
+    assert typed["layout"] == figure["layout"]
@@ -0,0 +1,162 @@
+import os
+import pandas as pd
+import pytest
+from services.dataset_store import DatasetStore
+from services.pipeline import (
+    PipelineRunner,
+    TransformPipeline,
+    checkpoint_key_for,
+    step_from,
+)
+
+
+class CountingOperations:
+    """Operações de teste que registram as chamadas recebidas."""
+
+    def __init__(self):
+        self.calls = []
+
+    def add(self, dataframe, params, record):
+        self.calls.append(("add", params["value"], dataframe is None))
+        return dataframe + params["value"], {}
+
+    def scale(self, dataframe, params, record):
+        self.calls.append(("scale", params["factor"], dataframe is None))
+        return dataframe * params["factor"], {"normalization": "scale"}
+
+    def first_rows(self, dataframe, params, record):
+        self.calls.append(("first_rows", params["rows"], dataframe is None))
+        store_dataframe = self.dataset_store.get(record["dataset_id"])
+        return store_dataframe.head(params["rows"]), {}
+
+
+@pytest.fixture
+def runner_and_operations(tmp_path):
+    dataset_store = DatasetStore(directory=str(tmp_path))
+    operations = CountingOperations()
+    operations.dataset_store = dataset_store
+    runner = PipelineRunner(
+        dataset_store,
+        {
+            "add": operations.add,
+            "scale": operations.scale,
+            "first_rows": operations.first_rows,
+        },
+        streaming_operations={"first_rows"},
+    )
+    base_id = dataset_store.put("sessao", pd.DataFrame({"valor": [1.0, 2.0, 3.0]}))
+    return runner, operations, base_id
+
+
+def _values_for(runner, record):
+    return runner.dataset_store.get(record["dataset_id"])["valor"].tolist()
+
+
+def test_push_discards_the_redo_steps():
+    pipeline = TransformPipeline("base").push(step_from("add", value=1))
+    pipeline = pipeline.push(step_from("add", value=2)).undo()
+
+    assert pipeline.can_undo() and pipeline.can_redo()
+    pipeline = pipeline.push(step_from("scale", factor=3))
+
+    assert [step["operation"] for step in pipeline.steps] == ["add", "scale"]
+    assert pipeline.position == 2 and not pipeline.can_redo()
+
+
+def test_undo_and_redo_stop_at_the_ends():
+    pipeline = TransformPipeline("base").push(step_from("add", value=1))
+
+    assert pipeline.undo().undo().position == 0
+    assert not pipeline.undo().can_undo()
+    assert pipeline.undo().redo().redo().position == 1
+    assert pipeline.undo().last_step() is None
+    assert pipeline.last_step() == step_from("add", value=1)
+
+
+def test_with_enabled_only_touches_applied_steps():
+    pipeline = TransformPipeline("base")
+    for value in (1, 2, 3):
+        pipeline = pipeline.push(step_from("add", value=value))
+    pipeline = pipeline.undo().with_enabled([1, 2])
+
+    assert [step["enabled"] for step in pipeline.steps] == [False, True, True]
+    assert [step["params"]["value"] for step in pipeline.active_steps()] == [2]
+    assert TransformPipeline.from_dict(pipeline.to_dict()) == pipeline
+
+
+def test_checkpoint_key_depends_only_on_base_operations_and_params():
+    steps = [step_from("add", value=1), step_from("scale", factor=2, offset=0)]
+    reordered_params = [
+        step_from("add", value=1),
+        {"operation": "scale", "params": {"offset": 0, "factor": 2}, "enabled": False},
+    ]
+
+    key = checkpoint_key_for("base", steps)
+
+    assert checkpoint_key_for("base", steps) == key
+    assert checkpoint_key_for("base", reordered_params) == key
+    assert checkpoint_key_for("outra", steps) != key
+    assert checkpoint_key_for("base", steps[::-1]) != key
+    assert checkpoint_key_for("base", steps[:1]) != key
+    assert checkpoint_key_for("base", [step_from("add", value=2)] + steps[1:]) != key
+
+
+def test_materialize_resumes_from_the_longest_checkpointed_prefix(
+    runner_and_operations,
+):
+    runner, operations, base_id = runner_and_operations
+    pipeline = TransformPipeline(base_id)
+    for step in (
+        step_from("add", value=1),
+        step_from("scale", factor=10),
+        step_from("add", value=5),
+    ):
+        pipeline = pipeline.push(step)
+
+    record = runner.materialize("sessao", pipeline)
+    assert _values_for(runner, record) == [25.0, 35.0, 45.0]
+    assert record["normalization"] == "scale"
+    assert len(operations.calls) == 3
+
+    # Desfazer e refazer só reaproveitam checkpoints
+    operations.calls.clear()
+    runner.materialize("sessao", pipeline.undo())
+    assert runner.materialize("sessao", pipeline) == record
+    assert operations.calls == []
+
+    # Desligar o passo do meio recalcula só o que vem depois do prefixo [add 1]
+    record = runner.materialize("sessao", pipeline.with_enabled([0, 2]))
+    assert _values_for(runner, record) == [7.0, 8.0, 9.0]
+    assert operations.calls == [("add", 5, False)]
+
+
+def test_materialize_recomputes_checkpoints_whose_version_expired(
+    runner_and_operations, tmp_path
+):
+    runner, operations, base_id = runner_and_operations
+    pipeline = TransformPipeline(base_id).push(step_from("add", value=1))
+    pipeline = pipeline.push(step_from("scale", factor=2))
+    first = runner.materialize("sessao", pipeline)
+    middle = runner.materialize("sessao", pipeline.undo())
+
+    # A versão do prefixo [add 1] some da memória e do disco
+    runner.dataset_store._forget(middle["dataset_id"])
+    os.remove(runner.dataset_store._path_for(middle["dataset_id"]))
+    runner.checkpoints.discard(checkpoint_key_for(base_id, pipeline.steps))
+    operations.calls.clear()
+
+    record = runner.materialize("sessao", pipeline)
+
+    assert [call[0] for call in operations.calls] == ["add", "scale"]
+    assert _values_for(runner, record) == _values_for(runner, first)
+
+
+def test_streaming_operations_do_not_load_their_input(runner_and_operations):
+    runner, operations, base_id = runner_and_operations
+    pipeline = TransformPipeline(base_id).push(step_from("first_rows", rows=2))
+    pipeline = pipeline.push(step_from("add", value=1))
+
+    record = runner.materialize("sessao", pipeline)
+
+    assert operations.calls == [("first_rows", 2, True), ("add", 1, False)]
+    assert _values_for(runner, record) == [2.0, 3.0]
@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+import pytest
+from services.dataset_store import DatasetStore
+from services.sampling import (
+    reservoir_sample_from,
+    rows_at_from,
+    stored_sample_from,
+    stratified_row_positions_from,
+)
+
+
+def _labels_from(class_sizes):
+    return pd.Series(
+        np.repeat(
+            [f"classe {position}" for position in range(len(class_sizes))], class_sizes
+        )
+    )
+
+
+@pytest.mark.parametrize(
+    "class_sizes, size",
+    [
+        ([1000, 1, 1, 1, 1, 1], 6),
+        ([1000, 1, 1, 1, 1, 1], 3),
+        ([1000] + [1] * 50, 10),
+        ([1] * 200, 7),
+        ([3, 2, 2, 1, 1, 1, 1], 5),
+        ([500, 300, 200], 10),
+        ([5, 5, 5], 15),
+        ([5, 5, 5], 0),
+    ],
+)
+def test_stratified_sample_has_exactly_size_rows(class_sizes, size):
+    labels = _labels_from(class_sizes)
+
+    positions = stratified_row_positions_from(labels, len(labels), size)
+
+    assert len(positions) == size
+    assert len(np.unique(positions)) == size
+    assert positions.min(initial=0) >= 0 and positions.max(initial=0) < len(labels)
+
+
+def test_every_class_is_sampled_when_there_is_room():
+    labels = _labels_from([1000, 1, 1, 1, 1, 1])
+
+    positions = stratified_row_positions_from(labels, len(labels), 6)
+
+    assert labels.iloc[positions].nunique() == 6
+
+
+def test_smallest_classes_are_dropped_when_there_are_more_classes_than_rows():
+    labels = _labels_from([100, 50, 20, 1, 1, 1])
+
+    positions = stratified_row_positions_from(labels, len(labels), 3)
+
+    assert set(labels.iloc[positions]) == {"classe 0", "classe 1", "classe 2"}
+
+
+def test_random_class_sizes_always_total_size():
+    rng = np.random.default_rng(1)
+    for _ in range(200):
+        class_sizes = rng.integers(1, 50, size=rng.integers(1, 40))
+        labels = _labels_from(class_sizes)
+        size = int(rng.integers(0, len(labels) + 1))
+
+        positions = stratified_row_positions_from(labels, len(labels), size)
+
+        assert len(positions) == size
+        assert len(np.unique(positions)) == size
+
+
+def _stored_dataset_from(tmp_path, dataframe):
+    dataset_id = DatasetStore(directory=str(tmp_path)).put("sessao", dataframe)
+    # Outro store no mesmo diretório, como outro worker: só o Parquet existe
+    return DatasetStore(directory=str(tmp_path)), dataset_id
+
+
+def test_iter_batches_index_is_the_global_row_position(tmp_path):
+    dataframe = pd.DataFrame({"valor": np.arange(25), "nome": list("abcde") * 5})
+    dataset_store, dataset_id = _stored_dataset_from(tmp_path, dataframe)
+
+    chunks = list(dataset_store.iter_batches(dataset_id, batch_rows=10))
+
+    assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+    pd.testing.assert_frame_equal(pd.concat(chunks), dataframe)
+
+
+def test_reservoir_sample_has_size_distinct_rows_in_order():
+    dataframe = pd.DataFrame({"valor": np.arange(1000)})
+    chunks = [dataframe.iloc[start : start + 64] for start in range(0, 1000, 64)]
+
+    sampled = reservoir_sample_from(chunks, 50, seed=3)
+
+    assert len(sampled) == 50
+    assert sampled["valor"].is_unique
+    assert sampled.index.is_monotonic_increasing
+    assert (sampled["valor"].to_numpy() == sampled.index.to_numpy()).all()
+
+
+def test_reservoir_sample_is_uniform():
+    # Cada linha deve aparecer em cerca de size / linhas das amostras
+    chunks = [
+        pd.DataFrame({"valor": np.arange(start, start + 10)}) for start in (0, 10)
+    ]
+    for chunk, start in zip(chunks, (0, 10)):
+        chunk.index = pd.RangeIndex(start, start + 10)
+    counts = np.zeros(20)
+    for seed in range(2000):
+        counts[reservoir_sample_from(chunks, 5, seed)["valor"].to_numpy()] += 1
+
+    np.testing.assert_allclose(counts / 2000, 5 / 20, atol=0.05)
+
+
+def test_reservoir_sample_keeps_every_row_when_size_is_larger():
+    dataframe = pd.DataFrame({"valor": np.arange(30)})
+
+    sampled = reservoir_sample_from([dataframe.iloc[:20], dataframe.iloc[20:]], 100)
+
+    pd.testing.assert_frame_equal(sampled, dataframe)
+
+
+def test_rows_at_matches_iloc():
+    dataframe = pd.DataFrame({"valor": np.arange(100) * 2})
+    chunks = [dataframe.iloc[start : start + 7] for start in range(0, 100, 7)]
+    positions = np.array([0, 6, 7, 50, 98, 99])
+
+    pd.testing.assert_frame_equal(
+        rows_at_from(chunks, positions), dataframe.iloc[positions]
+    )
+
+
+def test_stored_sample_streams_the_parquet_version(tmp_path):
+    dataframe = pd.DataFrame(
+        {"valor": np.arange(500), "classe": ["a"] * 450 + ["b"] * 50}
+    )
+    dataset_store, dataset_id = _stored_dataset_from(tmp_path, dataframe)
+
+    uniform = stored_sample_from(dataset_store, dataset_id, 40, seed=1)
+    stratified = stored_sample_from(
+        dataset_store, dataset_id, 40, seed=1, label_column="classe"
+    )
+
+    assert len(uniform) == 40 and uniform["valor"].is_unique
+    pd.testing.assert_frame_equal(uniform, dataframe.loc[uniform.index])
+    assert stratified["classe"].value_counts().to_dict() == {"a": 36, "b": 4}
+    pd.testing.assert_frame_equal(stratified, dataframe.loc[stratified.index])
@@ -0,0 +1,150 @@
+import numpy as np
+import pytest
+from services.sketches import HistogramSketch, QuantileSketch
+
+PROBABILITIES = np.linspace(0.01, 0.99, 25)
+
+
+def _values_from(seed, size=100_000):
+    rng = np.random.default_rng(seed)
+    # Mistura assimétrica, com NaN espalhados
+    values = np.concatenate(
+        [rng.lognormal(size=size // 2), rng.normal(-5, 2, size - size // 2)]
+    )
+    values[rng.choice(size, size // 100, replace=False)] = np.nan
+    return rng.permutation(values)
+
+
+def _slices_from(values, slice_rows):
+    return [
+        values[start : start + slice_rows]
+        for start in range(0, len(values), slice_rows)
+    ]
+
+
+def _rank_errors_for(sketch, values):
+    finite = np.sort(values[~np.isnan(values)])
+    ranks = np.searchsorted(finite, sketch.quantiles(PROBABILITIES), side="right")
+    return np.abs(ranks / len(finite) - PROBABILITIES)
+
+
+def _rank_error_bound_for(sketch):
+    return np.log2(sketch.count / sketch.capacity) / sketch.capacity
+
+
+def test_quantile_rank_error_stays_within_the_bound():
+    values = _values_from(0)
+    sketch = QuantileSketch()
+    for values_slice in _slices_from(values, 997):
+        sketch.update(values_slice)
+
+    assert sketch.count == np.count_nonzero(~np.isnan(values))
+    assert _rank_errors_for(sketch, values).max() <= _rank_error_bound_for(sketch)
+    # Memória: a soma dos níveis fica muito abaixo de n
+    assert sum(len(level) for level in sketch.levels) < 20 * sketch.capacity
+
+
+def test_merged_sketches_match_a_single_pass():
+    values = _values_from(1)
+    single = QuantileSketch()
+    single.update(values)
+    parts = []
+    for seed, values_slice in enumerate(np.array_split(values, 4)):
+        part = QuantileSketch(seed=seed)
+        for chunk in _slices_from(values_slice, 1000):
+            part.update(chunk)
+        parts.append(part)
+    merged = parts[0]
+    for part in parts[1:]:
+        merged.merge(part)
+
+    assert merged.count == single.count
+    bound = _rank_error_bound_for(merged)
+    assert _rank_errors_for(merged, values).max() <= bound
+    assert _rank_errors_for(single, values).max() <= bound
+
+
+def test_small_sketch_quantiles_are_exact():
+    sketch = QuantileSketch()
+    sketch.update(np.array([3.0, 1.0, np.nan, 2.0, 4.0]))
+
+    np.testing.assert_array_equal(sketch.quantiles([0.0, 0.5, 1.0]), [1.0, 2.0, 4.0])
+    assert np.isnan(QuantileSketch().quantiles([0.5])).all()
+
+
+@pytest.mark.parametrize("scale, shift", [(2.5, -3.0), (0.001, 10.0)])
+def test_scaled_quantiles_follow_the_affine_map(scale, shift):
+    sketch = QuantileSketch()
+    for values_slice in _slices_from(_values_from(2, 20_000), 500):
+        sketch.update(values_slice)
+
+    scaled = sketch.scaled(scale, shift)
+
+    np.testing.assert_allclose(
+        scaled.quantiles(PROBABILITIES), sketch.quantiles(PROBABILITIES) * scale + shift
+    )
+    assert scaled.count == sketch.count
+
+
+def _histogram_from(values, slice_rows):
+    histogram = HistogramSketch()
+    for values_slice in _slices_from(values, slice_rows):
+        histogram.update(values_slice)
+    return histogram
+
+
+def _assert_matches_numpy(histogram, values):
+    edges, counts = histogram.edges_and_counts()
+    finite = values[np.isfinite(values)]
+    expected, _ = np.histogram(finite, bins=edges)
+    np.testing.assert_array_equal(counts, expected)
+    assert counts.sum() == len(finite)
+    assert len(counts) <= histogram.bins
+    assert counts[0] > 0 and counts[-1] > 0
+
+
+def test_histogram_counts_match_numpy_with_slices_that_widen_the_range():
+    # Fatias ordenadas: cada uma estende o intervalo e força novas dobras
+    values = np.sort(_values_from(3))
+    values = np.concatenate([values[len(values) // 2 :], values[: len(values) // 2]])
+
+    _assert_matches_numpy(_histogram_from(values, 1000), values)
+
+
+def test_merged_histograms_match_numpy():
+    values = _values_from(4)
+    parts = [_histogram_from(part, 700) for part in np.array_split(np.sort(values), 3)]
+    merged = HistogramSketch()
+    for part in parts:
+        merged.merge(part)
+
+    _assert_matches_numpy(merged, values)
+
+
+def test_merge_rejects_different_grids():
+    first, second = HistogramSketch(), HistogramSketch(origin=0.5)
+    first.update(np.arange(10.0))
+    second.update(np.arange(10.0))
+
+    with pytest.raises(ValueError):
+        first.merge(second)
+
+
+def test_scaled_histogram_maps_the_edges():
+    values = _values_from(5, 10_000)
+    histogram = _histogram_from(values, 333)
+    edges, counts = histogram.edges_and_counts()
+
+    scaled_edges, scaled_counts = histogram.scaled(0.5, 7.0).edges_and_counts()
+
+    np.testing.assert_allclose(scaled_edges, edges * 0.5 + 7.0)
+    np.testing.assert_array_equal(scaled_counts, counts)
+
+
+def test_scaled_histogram_of_a_constant_column_has_one_bin():
+    histogram = _histogram_from(np.full(50, 4.0), 10)
+
+    edges, counts = histogram.scaled(0.0, 1.0).edges_and_counts()
+
+    np.testing.assert_array_equal(edges, [0.5, 1.5])
+    np.testing.assert_array_equal(counts, [50])
@@ -0,0 +1,61 @@
+import datetime
+import pyarrow as pa
+import pytest
+from services.table_backend import filter_table_from, query_page_from
+
+
+@pytest.fixture
+def table():
+    return pa.table(
+        {
+            "ativo": [True, False, None, True],
+            "nome": ["x", "true", "1", "2.5"],
+            "valor": [1, 2, 3, 4],
+            "data": [datetime.date(2020, 1, day) for day in range(1, 5)],
+            "grupo": pa.array(["a", "b", "a", "c"]).dictionary_encode(),
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    "filter_query, expected_rows",
+    [
+        ("{ativo} = true", 2),
+        ("{ativo} = True", 2),
+        ("{ativo} = 1", 2),
+        ("{ativo} = false", 1),
+        ("{ativo} != false", 2),
+        ("{ativo} = talvez", 0),
+        ("{ativo} > x", 0),
+        ("{ativo} contains tr", 2),
+    ],
+)
+def test_filter_on_bool_column(table, filter_query, expected_rows):
+    assert filter_table_from(table, filter_query).num_rows == expected_rows
+
+
+@pytest.mark.parametrize(
+    "filter_query, expected_rows",
+    [
+        ("{nome} = 1", 1),
+        ("{nome} = 2.5", 1),
+        ("{nome} = true", 1),
+        ("{valor} = a", 0),
+        ("{valor} >= 3", 2),
+        ("{data} = 2020-01-02", 1),
+        ("{data} contains 2020", 4),
+        ("{data} datestartswith 2020-01", 4),
+        ("{grupo} = a", 2),
+        ("{grupo} > 1", 4),
+        ("{ativo} = true && {grupo} = a", 1),
+    ],
+)
+def test_filter_with_mixed_types(table, filter_query, expected_rows):
+    assert filter_table_from(table, filter_query).num_rows == expected_rows
+
+
+def test_query_page_with_bool_filter(table):
+    rows, page_count = query_page_from(table, 0, 10, filter_query="{ativo} = true")
+
+    assert [row["valor"] for row in rows] == [1, 4]
+    assert page_count == 1